@@ -2,8 +2,9 @@
 """
 Add new customers to the api_customer_cidrs map in main.tf.
 
-This script inserts new customer entries after the cyberdyne entry,
-before the closing brace of the customer_cidrs map.
+This script inserts new customer entries at the end of the customer_cidrs
+map (after the cyberdyne entry), using the shared tf_locals editor. For
+large batches, call tf_locals.py --customers-json directly.
 
 Usage:
     python3 add-customers-to-main.py <main.tf path> <customers HCL>
@@ -12,55 +13,45 @@ Example:
     python3 add-customers-to-main.py main.tf "$CUSTOMER_HCL"
 """
 
-import re
 import sys
 import os
 
+from tf_locals import CUSTOMERS_LOCAL, EditError, LocalsEditor, customer_cidr_conflicts, parse_entries_hcl
+
 
 def add_customers_to_main(main_tf_path, new_customers_hcl):
     """
-    Add new customers to main.tf after the cyberdyne entry.
+    Add new customers to the end of the customer_cidrs map in main.tf.
+
+    Customers already present with the same CIDR and name are skipped, so
+    re-running is safe; a customer key that exists with different values,
+    or a CIDR overlapping another customer or api_internal_cidr, is an
+    error and nothing is written.
     
     Args:
         main_tf_path: Path to main.tf file
         new_customers_hcl: HCL-formatted string with new customer entries
     """
-    # Read the file
     try:
-        with open(main_tf_path, 'r') as f:
-            content = f.read()
-    except FileNotFoundError:
-        print(f"Error: File '{main_tf_path}' not found", file=sys.stderr)
-        sys.exit(1)
-    except Exception as e:
-        print(f"Error reading file '{main_tf_path}': {e}", file=sys.stderr)
-        sys.exit(1)
-
-    # Find the api_customer_cidrs block - look for cyberdyne closing brace
-    pattern = r'(api_customer_cidrs = \{.*?cyberdyne = \{[^}]+\}\n)(\s+\})'
-    match = re.search(pattern, content, re.DOTALL)
-
-    if not match:
-        print("Error: Could not find customer_cidrs block in main.tf", file=sys.stderr)
-        print("Expected to find 'api_customer_cidrs' with 'cyberdyne' entry", file=sys.stderr)
+        editor = LocalsEditor(main_tf_path)
+        customers = parse_entries_hcl(new_customers_hcl)
+        added, skipped = editor.add_map_entries(CUSTOMERS_LOCAL, customers)
+        conflicts = customer_cidr_conflicts(editor, [c for c in customers if c[0] in set(added)])
+        if conflicts:
+            for conflict in conflicts:
+                print(f"Error: {conflict}", file=sys.stderr)
+            sys.exit(1)
+        changed = editor.write()
+    except (EditError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Insert new customers after cyberdyne, before the closing brace
-    # The new_customers_hcl already has proper indentation (4 spaces)
-    new_customers = '    # New customers added by sales team\n' + new_customers_hcl.rstrip() + '\n'
-    
-    # Replace the closing brace with new customers + closing brace
-    replacement = match.group(1) + new_customers + '\n' + match.group(2)
-    content = content[:match.start()] + replacement + content[match.end():]
-    
-    # Write back
-    try:
-        with open(main_tf_path, 'w') as f:
-            f.write(content)
-        print(f"Successfully added customers to {main_tf_path}")
-    except Exception as e:
-        print(f"Error writing file '{main_tf_path}': {e}", file=sys.stderr)
-        sys.exit(1)
+    if skipped:
+        print(f"Skipped {len(skipped)} customers already in {main_tf_path}: {', '.join(skipped)}")
+    if changed:
+        print(f"Successfully added {len(added)} customers to {main_tf_path}")
+    else:
+        print(f"{main_tf_path} already up to date")
 
 
 def main():
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Check and time cidr_index.CidrIndex on a synthetic customer map.
+
+Builds a map of disjoint customer ranges (IPv4 /24 to /32, plus some IPv6
+/48 to /64), then validates a batch of candidates of which a share are
+free and the rest duplicate, sit inside, contain or overlap an existing
+range or another candidate. Every answer for a sample of candidates is
+compared with a brute-force scan, and the script exits non-zero on any
+mismatch. With --main-tf it also times the full path through a generated
+main.tf (tokenize, index the map, check the batch).
+
+Usage:
+    python3 bench-cidr-index.py                         # 100,000 entries, 5,000 candidates
+    python3 bench-cidr-index.py --entries 250000 --candidates 20000 --main-tf
+"""
+
+import argparse
+import ipaddress
+import os
+import random
+import sys
+import tempfile
+import time
+
+from cidr_index import CidrIndex, cidr_range
+from tf_locals import LocalsEditor, customer_cidr_conflicts, customer_hcl
+
+INTERNAL_CIDR = "10.0.0.0/8"
+
+
+def synthetic_map(n, rng):
+    """n disjoint (key, cidr) customers: one range per /24 or /48 block, in random order."""
+    entries = []
+    blocks = rng.sample(range(1 << 16), n) if n <= 1 << 16 else rng.sample(range(1 << 22), n)
+    for i, block in enumerate(blocks):
+        if i % 10 == 9:
+            prefix = rng.choice((48, 56, 64))
+            network = ipaddress.IPv6Network(((0x2001_0db8 << 96) | (block << 80), prefix))
+        else:
+            prefix = rng.choice((24, 26, 28, 30, 32))
+            # 100.64.0.0/10 and up: outside 10.0.0.0/8
+            network = ipaddress.IPv4Network(((100 << 24) | (64 << 16) | (block << 8), prefix), strict=False)
+        entries.append((f"customer_{i}", str(network)))
+    return entries
+
+
+def synthetic_candidates(existing, m, rng):
+    """m candidates: about half free, the rest conflicting with the map, api_internal_cidr or each other."""
+    candidates = []
+    for i in range(m):
+        kind = rng.random()
+        key = f"candidate_{i}"
+        _, cidr = rng.choice(existing)
+        network = ipaddress.ip_network(cidr)
+        if kind < 0.5:
+            # A /32 (or /128) in unused space
+            if network.version == 4:
+                candidates.append((key, f"198.18.{(i >> 8) & 255}.{i & 255}/32"))
+            else:
+                candidates.append((key, f"2001:db9::{i:x}/128"))
+        elif kind < 0.6:
+            candidates.append((key, cidr))
+        elif kind < 0.7:
+            candidates.append((key, str(network.supernet(new_prefix=network.prefixlen - 2))))
+        elif kind < 0.8 and network.prefixlen < network.max_prefixlen:
+            candidates.append((key, str(next(network.subnets()))))
+        elif kind < 0.9:
+            candidates.append((key, f"10.{i & 255}.0.0/16"))
+        else:
+            candidates.append((key, candidates[rng.randrange(len(candidates))][1] if candidates else cidr))
+    return candidates
+
+
+def brute_force_conflicts(first, last, version, others):
+    """Whether [first, last] overlaps any (version, first, last) range in others."""
+    return any(v == version and f <= last and first <= l for v, f, l in others)
+
+
+def verify(index, existing, candidates, conflicts, sample, rng):
+    """Compare check and check_many with brute force for a sample of candidates; returns mismatches."""
+    conflicted = {c.label for c in conflicts}
+    existing_ranges = [cidr_range(cidr) for _, cidr in existing]
+    candidate_ranges = [cidr_range(cidr) for _, cidr in candidates]
+    mismatches = 0
+    for position in rng.sample(range(len(candidates)), min(sample, len(candidates))):
+        label, cidr = candidates[position]
+        version, first, last = candidate_ranges[position]
+        # check_many reports a pair of overlapping candidates at the later one in address order
+        order = (version, first, -last, position)
+        earlier = [r for i, r in enumerate(candidate_ranges) if (r[0], r[1], -r[2], i) < order]
+        against_index = brute_force_conflicts(first, last, version, existing_ranges)
+        expected = against_index or brute_force_conflicts(first, last, version, earlier)
+        single = index.check(cidr, label) is not None
+        if expected != (label in conflicted) or single != against_index:
+            print(f"  MISMATCH {label} {cidr}: brute force {expected}, check_many {label in conflicted}, "
+                  f"check {single}")
+            mismatches += 1
+    return mismatches
+
+
+def bench_main_tf(existing, candidates):
+    """Seconds to load a generated main.tf with these customers and check the candidates."""
+    body = "\n".join("    " + line for key, cidr in existing
+                     for line in customer_hcl(key, cidr, key).split("\n"))
+    text = (f"locals {{\n  api_customer_cidrs = {{\n{body}\n  }}\n\n"
+            f"  api_internal_cidr = \"{INTERNAL_CIDR}\"\n}}\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "main.tf")
+        with open(path, "w") as f:
+            f.write(text)
+        new_entries = [(key, customer_hcl(key, cidr, key)) for key, cidr in candidates]
+        start = time.perf_counter()
+        editor = LocalsEditor(path)
+        conflicts = customer_cidr_conflicts(editor, new_entries)
+        return time.perf_counter() - start, len(text) / 1e6, len(conflicts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and time the CIDR conflict index")
+    parser.add_argument("--entries", type=int, default=100_000, help="Customers in the synthetic map")
+    parser.add_argument("--candidates", type=int, default=5_000, help="Candidates validated in one call")
+    parser.add_argument("--sample", type=int, default=200, help="Candidates cross-checked by brute force")
+    parser.add_argument("--main-tf", action="store_true", help="Also time the path through a generated main.tf")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    existing = synthetic_map(args.entries, rng) + [("api_internal_cidr", INTERNAL_CIDR)]
+    candidates = synthetic_candidates(existing, args.candidates, rng)
+
+    start = time.perf_counter()
+    index = CidrIndex(existing)
+    build_s = time.perf_counter() - start
+
+    probes = [cidr for _, cidr in candidates[:1000]]
+    start = time.perf_counter()
+    for cidr in probes:
+        index.check(cidr)
+    check_s = (time.perf_counter() - start) / len(probes)
+
+    start = time.perf_counter()
+    conflicts = index.check_many(candidates)
+    many_s = time.perf_counter() - start
+
+    print(f"Index of {len(index):,} ranges built in {build_s * 1000:.0f}ms")
+    print(f"Single check: {check_s * 1e6:.1f}µs")
+    print(f"Bulk check of {len(candidates):,} candidates: {many_s * 1000:.0f}ms, {len(conflicts):,} conflicts")
+
+    mismatches = verify(index, existing, candidates, conflicts, args.sample, rng)
+    print(f"Brute-force cross-check of {min(args.sample, len(candidates))} candidates: "
+          f"{'OK' if not mismatches else f'{mismatches} mismatches'}")
+
+    if args.main_tf:
+        seconds, size_mb, n_conflicts = bench_main_tf(existing[:-1], candidates)
+        print(f"main.tf path ({size_mb:.1f} MB): {seconds:.2f}s, {n_conflicts:,} conflicts")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Overlap index for the CIDR ranges allowed through the API security group.
+
+Every CIDR is an integer range [first address, last address] in the space
+of its IP version. The ranges are kept sorted by start, together with a
+running maximum of their ends, so one candidate is checked in O(log n):
+of the ranges starting at or before the candidate's last address, the one
+reaching furthest overlaps the candidate if anything does.
+
+A batch of candidates is checked against the index one by one and against
+each other with a single sweep over the sorted batch, which reports
+conflicts between thousands of new customers without re-sorting the
+existing entries.
+
+Usage (as a module):
+    index = CidrIndex([("acme_corp", "203.0.113.16/30"), ("api_internal_cidr", "10.0.0.0/8")])
+    index.check("203.0.113.16/28")          # -> CidrConflict(... relation='contains' ...)
+    index.check_many([("wonka", "198.51.100.0/24"), ...])
+"""
+
+import re
+import socket
+from bisect import bisect_right
+
+_FAMILIES = ((socket.AF_INET, 4, 32), (socket.AF_INET6, 6, 128))
+_PREFIX_LENGTH = re.compile(r"[0-9]{1,3}")
+
+
+class CidrConflict:
+    """A candidate CIDR that is invalid or overlaps another entry."""
+
+    __slots__ = ("label", "cidr", "other_label", "other_cidr", "relation")
+
+    def __init__(self, label, cidr, other_label, other_cidr, relation):
+        self.label = label
+        self.cidr = cidr
+        self.other_label = other_label
+        self.other_cidr = other_cidr
+        self.relation = relation  # 'invalid', 'duplicate', 'inside' or 'contains'
+
+    def __repr__(self):
+        return (f"CidrConflict({self.label!r}, {self.cidr!r}, {self.other_label!r}, "
+                f"{self.other_cidr!r}, relation={self.relation!r})")
+
+    def __str__(self):
+        if self.relation == "invalid":
+            return f"{self.label}: {self.cidr} is not a valid CIDR ({self.other_cidr})"
+        if self.relation == "duplicate":
+            return f"{self.label}: {self.cidr} is the same range as {self.other_label}"
+        if self.relation == "inside":
+            return f"{self.label}: {self.cidr} is inside {self.other_label} ({self.other_cidr})"
+        return f"{self.label}: {self.cidr} contains {self.other_label} ({self.other_cidr})"
+
+
+def cidr_range(cidr):
+    """
+    (IP version, first address, last address) of a CIDR string.
+
+    Raises ValueError for anything that is not a network address with a
+    prefix length, including host bits set ('10.0.0.1/8').
+    """
+    address, sep, prefix = cidr.strip().partition("/")
+    if not sep or not _PREFIX_LENGTH.fullmatch(prefix):
+        raise ValueError("expected ADDRESS/PREFIX")
+    for family, version, bits in _FAMILIES:
+        try:
+            first = int.from_bytes(socket.inet_pton(family, address), "big")
+            break
+        except OSError:
+            continue
+    else:
+        raise ValueError(f"'{address}' is not an IPv4 or IPv6 address")
+    length = int(prefix)
+    if length > bits:
+        raise ValueError(f"prefix length {length} is longer than {bits} bits")
+    host_mask = (1 << (bits - length)) - 1
+    if first & host_mask:
+        raise ValueError("host bits set")
+    return version, first, first | host_mask
+
+
+def _relation(first, last, other_first, other_last):
+    if (first, last) == (other_first, other_last):
+        return "duplicate"
+    if other_first <= first and last <= other_last:
+        return "inside"
+    return "contains"
+
+
+class _Ranges:
+    """Sorted ranges of one IP version, with prefix maxima of their ends."""
+
+    def __init__(self, ranges):
+        ranges.sort(key=lambda r: (r[0], -r[1]))
+        self.starts = [r[0] for r in ranges]
+        self.ends = [r[1] for r in ranges]
+        self.entries = [r[2] for r in ranges]
+        self.max_end = []
+        self.max_at = []
+        best, best_at = -1, -1
+        for i, end in enumerate(self.ends):
+            if end > best:
+                best, best_at = end, i
+            self.max_end.append(best)
+            self.max_at.append(best_at)
+
+    def overlapping(self, first, last):
+        """Position of a range overlapping [first, last], or None."""
+        i = bisect_right(self.starts, last)
+        if i and self.max_end[i - 1] >= first:
+            return self.max_at[i - 1]
+        return None
+
+
+class CidrIndex:
+    """Static overlap index over (label, cidr) entries."""
+
+    def __init__(self, entries):
+        by_version = {4: [], 6: []}
+        for label, cidr in entries:
+            version, first, last = cidr_range(cidr)
+            by_version[version].append((first, last, (label, cidr)))
+        self._ranges = {version: _Ranges(ranges) for version, ranges in by_version.items()}
+
+    def __len__(self):
+        return sum(len(r.starts) for r in self._ranges.values())
+
+    def _conflict(self, label, cidr, version, first, last):
+        ranges = self._ranges[version]
+        at = ranges.overlapping(first, last)
+        if at is None:
+            return None
+        other_label, other_cidr = ranges.entries[at]
+        relation = _relation(first, last, ranges.starts[at], ranges.ends[at])
+        return CidrConflict(label, cidr, other_label, other_cidr, relation)
+
+    def check(self, cidr, label=None):
+        """The conflict of one candidate CIDR with the index, or None if it is free."""
+        try:
+            version, first, last = cidr_range(cidr)
+        except ValueError as e:
+            return CidrConflict(label or cidr, cidr, None, str(e), "invalid")
+        return self._conflict(label or cidr, cidr, version, first, last)
+
+    def check_many(self, candidates):
+        """
+        Conflicts of a batch of (label, cidr) candidates, in candidate order.
+
+        Each candidate is checked against the index and against every other
+        candidate. A candidate overlapping an earlier one (by address) in the
+        batch is reported against it. Candidates are not added to the index.
+        """
+        conflicts = {}
+        parsed = []
+        for position, (label, cidr) in enumerate(candidates):
+            try:
+                version, first, last = cidr_range(cidr)
+            except ValueError as e:
+                conflicts[position] = CidrConflict(label, cidr, None, str(e), "invalid")
+                continue
+            conflict = self._conflict(label, cidr, version, first, last)
+            if conflict:
+                conflicts[position] = conflict
+            parsed.append((version, first, -last, position))
+
+        # Sweep the batch in address order, remembering the range reaching furthest so far
+        parsed.sort()
+        current_version, reach, reach_at = None, -1, None
+        for version, first, negative_last, position in parsed:
+            last = -negative_last
+            if version != current_version:
+                current_version, reach, reach_at = version, -1, None
+            if reach >= first and position not in conflicts:
+                other_label, other_cidr = candidates[reach_at]
+                _, other_first, other_last = cidr_range(other_cidr)
+                relation = _relation(first, last, other_first, other_last)
+                conflicts[position] = CidrConflict(*candidates[position], other_label, other_cidr, relation)
+            if last > reach:
+                reach, reach_at = last, position
+        return [conflicts[position] for position in sorted(conflicts)]
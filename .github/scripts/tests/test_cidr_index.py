@@ -0,0 +1,121 @@
+"""CidrIndex answers must match a brute-force scan over every entry."""
+
+import ipaddress
+import random
+
+import pytest
+
+from cidr_index import CidrIndex, _relation, cidr_range
+
+ENTRIES = 100_000
+BITS = {4: 32, 6: 128}
+
+
+def random_network(rng):
+    """A random network, nested in or overlapping others often enough to exercise the index."""
+    if rng.random() < 0.1:
+        prefix = rng.randint(40, 128)
+        address = (0x2001_0db8 << 96) | rng.getrandbits(32) << 64 | rng.getrandbits(64)
+        return ipaddress.IPv6Network((address, prefix), strict=False)
+    prefix = rng.choice((12, 16, 20) + (24,) * 3 + tuple(range(25, 33)) * 2)
+    address = (100 << 24) | (64 << 16) | rng.getrandbits(22)  # 100.64.0.0/10
+    return ipaddress.IPv4Network((address, prefix), strict=False)
+
+
+def host(version, address):
+    """A single address as a /32 or /128."""
+    cls = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+    return f"{cls(address)}/{BITS[version]}"
+
+
+@pytest.fixture(scope="module")
+def entries():
+    rng = random.Random(7)
+    return [(f"customer_{i}", str(random_network(rng))) for i in range(ENTRIES)]
+
+
+@pytest.fixture(scope="module")
+def index(entries):
+    return CidrIndex(entries)
+
+
+@pytest.fixture(scope="module")
+def ranges(entries):
+    """(label, first, last) of every entry, per IP version."""
+    by_version = {version: [] for version in BITS}
+    for label, cidr in entries:
+        version, first, last = cidr_range(cidr)
+        by_version[version].append((label, first, last))
+    return by_version
+
+
+def probes(entries, rng, n):
+    """Random networks, plus each boundary of random entries: first, last and one address either side."""
+    yield from (str(random_network(rng)) for _ in range(n))
+    for _, cidr in rng.sample(entries, n):
+        version, first, last = cidr_range(cidr)
+        yield cidr
+        yield str(ipaddress.ip_network(cidr).supernet(prefixlen_diff=1))
+        for address in (first - 1, first, last, last + 1):
+            if 0 <= address < 1 << BITS[version]:
+                yield host(version, address)
+
+
+def overlapping(ranges, version, first, last):
+    """Brute force: labels of the entries overlapping [first, last]."""
+    return {label for label, f, l in ranges[version] if f <= last and first <= l}
+
+
+def test_index_holds_every_entry(index, entries):
+    assert len(index) == len(entries)
+
+
+def test_check_matches_brute_force(index, entries, ranges):
+    rng = random.Random(11)
+    checked = conflicts = 0
+    for cidr in probes(entries, rng, 100):
+        version, first, last = cidr_range(cidr)
+        expected = overlapping(ranges, version, first, last)
+        conflict = index.check(cidr)
+        checked += 1
+        if not expected:
+            assert conflict is None, cidr
+            continue
+        conflicts += 1
+        assert conflict is not None, cidr
+        assert conflict.other_label in expected, cidr
+        _, other_first, other_last = cidr_range(conflict.other_cidr)
+        assert conflict.relation == _relation(first, last, other_first, other_last), cidr
+    # Both outcomes must actually have been exercised
+    assert 0 < conflicts < checked
+
+
+def test_check_reports_relations(index, entries, ranges):
+    cidr = next(cidr for _, cidr in entries if len(overlapping(ranges, *cidr_range(cidr))) == 1)
+    assert index.check(cidr).relation == "duplicate"
+    network = ipaddress.ip_network(cidr)
+    if network.prefixlen < network.max_prefixlen:
+        assert index.check(str(next(network.subnets()))).relation == "inside"
+    # Every entry lies in 100.0.0.0/8 or 2001:db8::/32
+    supernet = network.supernet(new_prefix=8 if network.version == 4 else 32)
+    assert index.check(str(supernet)).relation == "contains"
+    assert index.check("10.0.0.0/8") is None
+    assert index.check("10.0.0.1/8").relation == "invalid"
+
+
+def test_check_many_matches_brute_force(index, entries, ranges):
+    rng = random.Random(13)
+    candidates = [(f"candidate_{i}", cidr) for i, cidr in enumerate(probes(entries, rng, 40))]
+    candidates += [("fresh_a", "198.18.0.0/24"), ("fresh_b", "198.18.0.128/25"), ("fresh_c", "198.18.1.0/32")]
+    reported = {conflict.label for conflict in index.check_many(candidates)}
+
+    parsed = [cidr_range(cidr) for _, cidr in candidates]
+    for position, (label, cidr) in enumerate(candidates):
+        version, first, last = parsed[position]
+        order = (version, first, -last, position)
+        # An overlap within the batch is reported at the later candidate in address order
+        earlier = any(v == version and f <= last and first <= l and (v, f, -l, i) < order
+                      for i, (v, f, l) in enumerate(parsed))
+        expected = bool(overlapping(ranges, version, first, last)) or earlier
+        assert (label in reported) == expected, cidr
+    assert "fresh_b" in reported and not {"fresh_a", "fresh_c"} & reported
@@ -0,0 +1,117 @@
+"""tf_locals edits must be exact, idempotent and blind to braces inside strings, comments and heredocs."""
+
+import pytest
+
+from tf_locals import CUSTOMERS_LOCAL, EditError, LocalsEditor, customer_hcl
+
+MAIN_TF = '''\
+locals {
+  api_internal_cidr = "10.0.0.0/16" # Internal services
+
+  # Braces and equals signs that are not HCL structure: "{ x = 1 }" /* } { = */
+  banner = "a { b = c } }"
+  template = <<-EOT
+    server {
+      listen = 80
+    }
+  EOT
+  interpolated = "${var.prefix}-{=}"
+
+  api_customer_cidrs = {
+    acme = {
+      cidr = "100.64.1.0/24"
+      name = "Acme {Corp} = \\"quoted\\""
+    }
+    cyberdyne = {
+      cidr = "100.64.2.0/24"
+      name = "Cyberdyne" // trailing } comment
+    }
+  }
+}
+
+resource "null_resource" "after" {
+  triggers = { cidrs = jsonencode(local.api_customer_cidrs) }
+}
+'''
+
+
+@pytest.fixture
+def main_tf(tmp_path):
+    path = tmp_path / "main.tf"
+    path.write_text(MAIN_TF)
+    return str(path)
+
+
+def customer(key, cidr, name=None):
+    return key, customer_hcl(key, cidr, name or key.title())
+
+
+def add(path, customers):
+    editor = LocalsEditor(path)
+    result = editor.add_map_entries(CUSTOMERS_LOCAL, customers)
+    editor.write()
+    return result
+
+
+def test_rerunning_a_batch_leaves_the_file_unchanged(main_tf):
+    batch = [customer("initech", "100.64.3.0/24"), customer("umbrella", "100.64.4.0/24")]
+    assert add(main_tf, batch) == (["initech", "umbrella"], [])
+    first = open(main_tf, "rb").read()
+
+    assert add(main_tf, batch) == ([], ["initech", "umbrella"])
+    assert open(main_tf, "rb").read() == first
+    assert set(LocalsEditor(main_tf).map_entries(CUSTOMERS_LOCAL)) == {"acme", "cyberdyne", "initech", "umbrella"}
+
+
+def test_key_repeated_in_a_batch_is_an_error(main_tf):
+    editor = LocalsEditor(main_tf)
+    with pytest.raises(EditError, match="more than once"):
+        editor.add_map_entries(CUSTOMERS_LOCAL, [customer("initech", "100.64.3.0/24"),
+                                                 customer("initech", "100.64.3.0/24")])
+
+
+def test_existing_key_with_a_different_value_is_an_error(main_tf):
+    editor = LocalsEditor(main_tf)
+    with pytest.raises(EditError, match="different value"):
+        editor.add_map_entries(CUSTOMERS_LOCAL, [customer("acme", "100.64.9.0/24", "Acme")])
+    assert open(main_tf).read() == MAIN_TF
+
+
+def test_set_value_replaces_the_trailing_comment(main_tf):
+    editor = LocalsEditor(main_tf)
+    assert editor.set_value("api_internal_cidr", '"10.50.0.0/16"', "Narrowed per audit")
+    editor.write()
+    editor = LocalsEditor(main_tf)
+    assert editor.set_value("api_internal_cidr", '"10.60.0.0/16"', "Widened again")
+    editor.write()
+
+    lines = [line for line in open(main_tf).read().splitlines() if "api_internal_cidr =" in line]
+    assert lines == ['  api_internal_cidr = "10.60.0.0/16"  # Widened again']
+
+
+def test_set_value_without_a_comment_keeps_the_existing_one(main_tf):
+    editor = LocalsEditor(main_tf)
+    assert editor.set_value("api_internal_cidr", '"10.50.0.0/16"')
+    assert '  api_internal_cidr = "10.50.0.0/16" # Internal services\n' in editor.render()
+    assert not editor.set_value("api_internal_cidr", '"10.0.0.0/16"')
+
+
+def test_braces_and_equals_in_strings_comments_and_heredocs(main_tf):
+    editor = LocalsEditor(main_tf)
+    assert list(editor.locals) == ["api_internal_cidr", "banner", "template", "interpolated", "api_customer_cidrs"]
+    assert list(editor.map_entries(CUSTOMERS_LOCAL)) == ["acme", "cyberdyne"]
+    assert editor.map_attribute(CUSTOMERS_LOCAL, "name") == {"acme": 'Acme {Corp} = "quoted"',
+                                                             "cyberdyne": "Cyberdyne"}
+
+    editor.add_map_entries(CUSTOMERS_LOCAL, [customer("initech", "100.64.3.0/24", "Initech { = }")])
+    editor.write()
+    # The new entry lands at the end of the map, not after a brace in a string or comment
+    cyberdyne_end = MAIN_TF.index("    }\n  }\n}\n") + len("    }\n")
+    assert open(main_tf).read() == MAIN_TF[:cyberdyne_end] + (
+        "    # New customers added by sales team\n"
+        "    initech = {\n"
+        '      cidr = "100.64.3.0/24"\n'
+        '      name = "Initech { = }"\n'
+        "    }\n"
+    ) + MAIN_TF[cyberdyne_end:]
+    assert LocalsEditor(main_tf).map_attribute(CUSTOMERS_LOCAL, "name")["initech"] == "Initech { = }"
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Batch editor for the locals blocks in main.tf.
+
+Tokenizes main.tf once, indexes the entries of its locals blocks (and the
+entries of map-valued locals such as api_customer_cidrs), and applies any
+number of edits in a single pass over the text:
+
+    - add customers to a map local, skipping ones that are already present
+      with the same value and refusing conflicting duplicates or CIDRs
+      that overlap another customer or api_internal_cidr
+    - replace the value of a local, e.g. api_internal_cidr, with an
+      optional trailing comment
+
+The file is written atomically (temp file in the same directory, then
+rename), and re-running the same batch leaves it unchanged.
+
+Usage:
+    python3 tf_locals.py main.tf --customers-json customers.json
+    python3 tf_locals.py main.tf --customers-hcl customers.hcl --set api_internal_cidr=10.0.0.0/16
+    python3 tf_locals.py main.tf --set api_internal_cidr=10.50.0.0/16 --comment "Narrowed per audit" --dry-run
+
+customers.json is a list of {"key": ..., "cidr": ..., "name": ...} objects.
+"""
+
+import argparse
+import difflib
+import json
+import os
+import re
+import sys
+import tempfile
+
+from cidr_index import CidrIndex
+
+CUSTOMERS_LOCAL = "api_customer_cidrs"
+INTERNAL_CIDR_LOCAL = "api_internal_cidr"
+NEW_CUSTOMERS_COMMENT = "# New customers added by sales team"
+
+_TOKEN = re.compile(r'''
+    (?P<comment>\#[^\n]*|//[^\n]*|/\*.*?\*/)
+  | (?P<heredoc><<-?(?P<tag>[A-Za-z_][\w-]*)\n.*?\n[ \t]*(?P=tag)(?=\n|\Z))
+  | (?P<string>"(?:[^"\\$]|\\.|\$\{[^}]*\}|\$)*")
+  | (?P<open>[{\[(])
+  | (?P<close>[}\])])
+  | (?P<newline>\n)
+  | (?P<ident>[A-Za-z_][\w-]*)
+  | (?P<equals>=(?![=>]))
+  | (?P<space>[ \t\r]+)
+  | (?P<other>.)
+''', re.S | re.X)
+
+
+class EditError(Exception):
+    """main.tf does not have the expected shape, or an edit conflicts with it."""
+
+
+class Token:
+    __slots__ = ("kind", "text", "start", "end")
+
+    def __init__(self, kind, text, start, end):
+        self.kind = kind
+        self.text = text
+        self.start = start
+        self.end = end
+
+
+def tokenize(text):
+    """Split HCL text into tokens in one left-to-right scan."""
+    tokens = [Token(m.lastgroup if m.lastgroup != "tag" else "heredoc", m.group(), m.start(), m.end())
+              for m in _TOKEN.finditer(text)]
+    tokens.append(Token("eof", "", len(text), len(text)))
+    return tokens
+
+
+class Entry:
+    """One `name = value` attribute: its name, value span and trailing comment."""
+
+    def __init__(self, name, start, value_start, value_end, comment, open_index):
+        self.name = name
+        self.start = start              # offset of the name
+        self.value_start = value_start
+        self.value_end = value_end
+        self.comment = comment          # trailing comment Token, if any
+        self.open_index = open_index    # token index of a '{' value, for map locals
+        self.children = None            # name -> Entry, filled in for map values
+        self.close = None               # Token closing a map value
+
+
+def _key_name(token):
+    if token.kind == "ident":
+        return token.text
+    if token.kind == "string":
+        return json.loads(token.text)
+    return None
+
+
+def _next_significant(tokens, i):
+    while tokens[i].kind == "space":
+        i += 1
+    return i
+
+
+def parse_body(tokens, i):
+    """
+    Entries of a block or object body starting at token i.
+
+    Returns (entries in order, index of the closing token). The body ends
+    at the first unmatched closing bracket or at end of input.
+    """
+    entries = []
+    while True:
+        token = tokens[i]
+        if token.kind in ("close", "eof"):
+            return entries, i
+        name = _key_name(token)
+        eq = _next_significant(tokens, i + 1)
+        if name is None or tokens[eq].kind != "equals":
+            i += 1
+            continue
+
+        j = _next_significant(tokens, eq + 1)
+        k = j
+        depth = 0
+        last = j
+        while True:
+            t = tokens[k]
+            if t.kind == "open":
+                depth += 1
+            elif t.kind == "close":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif t.kind == "eof" or (depth == 0 and t.kind in ("newline", "comment")):
+                break
+            if t.kind != "space":
+                last = k
+            k += 1
+        comment = tokens[k] if tokens[k].kind == "comment" else None
+        open_index = j if tokens[j].text == "{" else None
+        entries.append(Entry(name, token.start, tokens[j].start, tokens[last].end, comment, open_index))
+        i = k if tokens[k].kind in ("close", "eof") else k + 1
+
+
+def string_value(text, entry):
+    """The value of an entry whose value is a plain string literal, else None."""
+    value = text[entry.value_start:entry.value_end]
+    if len(value) >= 2 and value[0] == value[-1] == '"' and "${" not in value:
+        return json.loads(value)
+    return None
+
+
+def object_attribute(text, tokens, entry, attribute):
+    """A string attribute of an entry whose value is an object, e.g. a customer's cidr."""
+    if entry.open_index is None:
+        return None
+    children, _ = parse_body(tokens, entry.open_index + 1)
+    for child in children:
+        if child.name == attribute:
+            return string_value(text, child)
+    return None
+
+
+def _line_start(text, offset):
+    return text.rfind("\n", 0, offset) + 1
+
+
+def _indent_of(text, offset):
+    return offset - _line_start(text, offset)
+
+
+def _normalize(hcl):
+    """Value text with whitespace and comments removed, for comparing entries."""
+    return "".join(t.text for t in tokenize(hcl) if t.kind not in ("space", "newline", "comment", "eof"))
+
+
+def hcl_string(value):
+    """Quote a Python string as an HCL string literal (no interpolation)."""
+    return json.dumps(value).replace("${", "$${").replace("%{", "%%{")
+
+
+def customer_hcl(key, cidr, name):
+    """A customer entry for the customers map, unindented."""
+    return f"{key} = {{\n  cidr = {hcl_string(cidr)}\n  name = {hcl_string(name)}\n}}"
+
+
+def parse_entries_hcl(hcl):
+    """
+    Split HCL map entries (e.g. the NEW_CUSTOMERS snippet) into (key, text) pairs.
+
+    The text of each entry is dedented to start at column 0.
+    """
+    tokens = tokenize(hcl)
+    entries, close = parse_body(tokens, 0)
+    if tokens[close].kind != "eof":
+        raise EditError("Unbalanced braces in customer entries")
+    result = []
+    for entry in entries:
+        indent = _indent_of(hcl, entry.start)
+        lines = hcl[entry.start:entry.value_end].split("\n")
+        lines[1:] = [line[indent:] if line[:indent].strip() == "" else line.lstrip() for line in lines[1:]]
+        result.append((entry.name, "\n".join(lines)))
+    return result
+
+
+class LocalsEditor:
+    """Indexed locals of one main.tf, with a queue of edits applied by render()/write()."""
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.text = f.read()
+        except OSError as e:
+            raise EditError(f"Could not read '{path}': {e}") from e
+        self.tokens = tokenize(self.text)
+        self.locals = self._index_locals()
+        self._splices = []  # (start, end, replacement)
+
+    def _index_locals(self):
+        """name -> Entry for every attribute of every top-level locals block."""
+        index = {}
+        depth = 0
+        i = 0
+        tokens = self.tokens
+        while tokens[i].kind != "eof":
+            token = tokens[i]
+            if token.kind == "open":
+                depth += 1
+            elif token.kind == "close":
+                depth -= 1
+            elif depth == 0 and token.kind == "ident" and token.text == "locals":
+                body = _next_significant(tokens, i + 1)
+                if tokens[body].text == "{":
+                    entries, close = parse_body(tokens, body + 1)
+                    for entry in entries:
+                        if entry.name in index:
+                            raise EditError(f"Local '{entry.name}' is defined more than once")
+                        index[entry.name] = entry
+                    i = close + 1
+                    continue
+            i += 1
+        return index
+
+    def local(self, name):
+        if name not in self.locals:
+            raise EditError(f"Could not find local '{name}' in {self.path}")
+        return self.locals[name]
+
+    def map_entries(self, name):
+        """The entries of a map-valued local, indexed by key."""
+        entry = self.local(name)
+        if entry.open_index is None:
+            raise EditError(f"Local '{name}' is not a map")
+        if entry.children is None:
+            children, close = parse_body(self.tokens, entry.open_index + 1)
+            entry.children = {child.name: child for child in children}
+            entry.close = self.tokens[close]
+        return entry.children
+
+    def map_attribute(self, name, attribute):
+        """key -> string attribute for every entry of a map-of-objects local."""
+        return {key: object_attribute(self.text, self.tokens, child, attribute)
+                for key, child in self.map_entries(name).items()}
+
+    def add_map_entries(self, name, new_entries, comment=NEW_CUSTOMERS_COMMENT):
+        """
+        Queue (key, hcl) entries for insertion at the end of a map local.
+
+        Entries already in the map with the same value are skipped, so
+        re-running a batch is a no-op. Returns (added keys, skipped keys).
+        Raises EditError for a key that is in the map with a different
+        value, or that appears twice in the batch.
+        """
+        existing = self.map_entries(name)
+        entry = self.locals[name]
+        seen = set()
+        added, skipped = [], []
+        lines = []
+        indent = " " * (_indent_of(self.text, next(iter(existing.values())).start) if existing
+                        else _indent_of(self.text, entry.close.start) + 2)
+
+        for key, hcl in new_entries:
+            if key in seen:
+                raise EditError(f"Customer '{key}' appears more than once in the batch")
+            seen.add(key)
+            value = hcl.split("=", 1)[1]
+            if key in existing:
+                current = existing[key]
+                if _normalize(self.text[current.value_start:current.value_end]) != _normalize(value):
+                    raise EditError(f"Customer '{key}' already exists in {name} with a different value")
+                skipped.append(key)
+                continue
+            lines += [indent + line if line else line for line in hcl.split("\n")]
+            added.append(key)
+
+        if added:
+            if comment and comment not in self.text[entry.value_start:entry.value_end]:
+                lines.insert(0, indent + comment)
+            position = _line_start(self.text, entry.close.start)
+            self._splices.append((position, position, "\n".join(lines) + "\n"))
+        return added, skipped
+
+    def set_value(self, name, value_hcl, comment=None):
+        """
+        Queue replacing a local's value (HCL text). A comment replaces any
+        trailing comment on the same line. Returns True if the text changes.
+        """
+        entry = self.local(name)
+        end = entry.comment.end if entry.comment else entry.value_end
+        replacement = value_hcl
+        if comment:
+            replacement += f"  # {comment}"
+        elif entry.comment:
+            replacement += self.text[entry.value_end:entry.comment.end]
+        if self.text[entry.value_start:end] == replacement:
+            return False
+        self._splices.append((entry.value_start, end, replacement))
+        return True
+
+    def render(self):
+        """The file text with every queued edit applied."""
+        parts = []
+        cursor = 0
+        for start, end, replacement in sorted(self._splices, key=lambda s: s[0]):
+            if start < cursor:
+                raise EditError("Overlapping edits")
+            parts += [self.text[cursor:start], replacement]
+            cursor = end
+        parts.append(self.text[cursor:])
+        return "".join(parts)
+
+    def write(self):
+        """Write the edited file atomically; returns False if nothing changed."""
+        new_text = self.render()
+        if new_text == self.text:
+            return False
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".main.tf.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(new_text)
+            os.chmod(tmp_path, os.stat(self.path).st_mode & 0o7777)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.text = new_text
+        self._splices = []
+        return True
+
+
+def customer_cidr_conflicts(editor, new_entries):
+    """
+    CIDR conflicts of (key, hcl) customers about to be added to main.tf.
+
+    Each customer's cidr is checked against the existing customers,
+    api_internal_cidr and the rest of the batch. A customer without a
+    literal cidr attribute is reported as invalid.
+    """
+    existing = [(key, cidr) for key, cidr in editor.map_attribute(CUSTOMERS_LOCAL, "cidr").items() if cidr]
+    internal = editor.locals.get(INTERNAL_CIDR_LOCAL)
+    internal_cidr = string_value(editor.text, internal) if internal else None
+    if internal_cidr:
+        existing.append((INTERNAL_CIDR_LOCAL, internal_cidr))
+
+    candidates = []
+    for key, hcl in new_entries:
+        tokens = tokenize(hcl)
+        entries, _ = parse_body(tokens, 0)
+        cidr = object_attribute(hcl, tokens, entries[0], "cidr") if entries else None
+        candidates.append((key, cidr or ""))
+    return CidrIndex(existing).check_many(candidates)
+
+
+def load_customers_json(path):
+    """(key, hcl) entries from a JSON list of {"key", "cidr", "name"} objects."""
+    with open(path) as f:
+        customers = json.load(f)
+    entries = []
+    for customer in customers:
+        key = customer.get("key")
+        if not key or not re.fullmatch(r"[A-Za-z_][\w-]*", key):
+            raise EditError(f"Invalid customer key: {key!r}")
+        entries.append((key, customer_hcl(key, customer["cidr"], customer.get("name", key))))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply a batch of customer and CIDR edits to main.tf locals")
+    parser.add_argument("main_tf", help="Path to main.tf")
+    parser.add_argument("--customers-json", help="JSON list of {key, cidr, name} customers to add")
+    parser.add_argument("--customers-hcl", help="File of HCL customer entries to add")
+    parser.add_argument("--set", action="append", default=[], metavar="LOCAL=VALUE",
+                        help="Set a string local, e.g. api_internal_cidr=10.0.0.0/16 (repeatable)")
+    parser.add_argument("--comment", help="Trailing comment for --set values")
+    parser.add_argument("--dry-run", action="store_true", help="Print the diff instead of writing")
+    args = parser.parse_args()
+
+    try:
+        editor = LocalsEditor(args.main_tf)
+        customers = []
+        if args.customers_hcl:
+            with open(args.customers_hcl) as f:
+                customers += parse_entries_hcl(f.read())
+        if args.customers_json:
+            customers += load_customers_json(args.customers_json)
+        if customers:
+            added, skipped = editor.add_map_entries(CUSTOMERS_LOCAL, customers)
+            print(f"Customers: {len(added)} added, {len(skipped)} already present")
+            added_keys = set(added)
+            conflicts = customer_cidr_conflicts(editor, [c for c in customers if c[0] in added_keys])
+            if conflicts:
+                for conflict in conflicts:
+                    print(f"Error: {conflict}", file=sys.stderr)
+                sys.exit(1)
+        for assignment in args.set:
+            name, sep, value = assignment.partition("=")
+            if not sep:
+                raise EditError(f"--set expects LOCAL=VALUE, got '{assignment}'")
+            changed = editor.set_value(name.strip(), hcl_string(value), args.comment)
+            print(f"{name.strip()}: {'updated to ' + value if changed else 'unchanged'}")
+
+        if args.dry_run:
+            sys.stdout.writelines(difflib.unified_diff(
+                editor.text.splitlines(True), editor.render().splitlines(True), args.main_tf, args.main_tf))
+            return
+        if editor.write():
+            print(f"Successfully updated {args.main_tf}")
+        else:
+            print(f"{args.main_tf} already up to date")
+    except (EditError, OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
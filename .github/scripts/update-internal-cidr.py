@@ -11,55 +11,32 @@ Example:
     python3 update-internal-cidr.py main.tf "10.0.0.0/16" "SECURITY HARDENING: Narrowed to VPC CIDR per audit findings"
 """
 
-import re
 import sys
 
+from tf_locals import EditError, LocalsEditor, hcl_string
+
 
 def update_internal_cidr(main_tf_path, new_cidr, comment=None):
     """
     Update the internal_cidr value in main.tf.
+
+    A comment replaces any comment already on that line, so running the
+    script twice leaves a single comment.
     
     Args:
         main_tf_path: Path to main.tf file
         new_cidr: New CIDR value (e.g., "10.0.0.0/16")
         comment: Optional comment to add after the value
     """
-    # Read the file
     try:
-        with open(main_tf_path, 'r') as f:
-            content = f.read()
-    except FileNotFoundError:
-        print(f"Error: File '{main_tf_path}' not found", file=sys.stderr)
-        sys.exit(1)
-    except Exception as e:
-        print(f"Error reading file '{main_tf_path}': {e}", file=sys.stderr)
-        sys.exit(1)
-
-    # Find the api_internal_cidr line
-    # Pattern matches: api_internal_cidr = "10.0.0.0/8"
-    pattern = r'(api_internal_cidr = )"([^"]+)"'
-    match = re.search(pattern, content)
-
-    if not match:
-        print("Error: Could not find api_internal_cidr in main.tf", file=sys.stderr)
+        editor = LocalsEditor(main_tf_path)
+        editor.set_value("api_internal_cidr", hcl_string(new_cidr), comment)
+        editor.write()
+    except (EditError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Build replacement string
-    replacement = f'{match.group(1)}"{new_cidr}"'
-    if comment:
-        replacement += f'  # {comment}'
-    
-    # Replace the line
-    content = content[:match.start()] + replacement + content[match.end():]
-    
-    # Write back
-    try:
-        with open(main_tf_path, 'w') as f:
-            f.write(content)
-        print(f"Successfully updated internal_cidr to {new_cidr} in {main_tf_path}")
-    except Exception as e:
-        print(f"Error writing file '{main_tf_path}': {e}", file=sys.stderr)
-        sys.exit(1)
+    print(f"Successfully updated internal_cidr to {new_cidr} in {main_tf_path}")
 
 
 def main():
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Compare the handler's streaming size count with len(json.dumps(event)).
+
+Builds synthetic SQS events (10 records of 256KB bodies by default, about
+2.5MB per batch), then times both measurements and traces their peak
+memory. The counts are checked against the compact UTF-8 serialization
+of each record, so a mismatch fails the run.
+
+Usage:
+    python3 bench_lambda.py
+    python3 bench_lambda.py --records 10 --body-kb 100 --repeat 20
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from lambda_function import DEFAULT_MAX_BYTES, json_size, measure_batch
+
+
+def synthetic_event(records, body_bytes):
+    """An SQS event whose records carry JSON bodies of about body_bytes each."""
+    filler = "rich metadata, colour analysis and style tags é "
+    body = json.dumps({"image": "product.jpg", "metadata": (filler * (body_bytes // len(filler) + 1))[:body_bytes]})
+    return {"Records": [{
+        "messageId": f"message-{i}",
+        "receiptHandle": "AQEB" + "x" * 180,
+        "body": body,
+        "attributes": {"ApproximateReceiveCount": "1", "SentTimestamp": "1735689600000",
+                       "SenderId": "AIDAEXAMPLE", "ApproximateFirstReceiveTimestamp": "1735689600001"},
+        "messageAttributes": {},
+        "md5OfBody": "0" * 32,
+        "eventSource": "aws:sqs",
+        "eventSourceARN": "arn:aws:sqs:eu-west-2:123456789012:image-processing-queue-demo",
+        "awsRegion": "eu-west-2",
+    } for i in range(records)]}
+
+
+def measure(fn, repeat):
+    """(best seconds, peak traced bytes, result) of fn()."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event size measurement")
+    parser.add_argument("--records", type=int, default=10, help="Records per batch")
+    parser.add_argument("--body-kb", type=int, default=256, help="Body size per record, in KB")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed repetitions (best is kept)")
+    args = parser.parse_args()
+
+    event = synthetic_event(args.records, args.body_kb * 1024)
+    expected = [len(json.dumps(r, ensure_ascii=False, separators=(",", ":")).encode()) for r in event["Records"]]
+    if [json_size(r) for r in event["Records"]] != expected:
+        print("Error: json_size does not match the serialized record sizes", file=sys.stderr)
+        sys.exit(1)
+
+    rows = [
+        ("len(json.dumps(event))", lambda: len(json.dumps(event))),
+        ("json_size per record", lambda: sum(json_size(r) for r in event["Records"])),
+        ("measure_batch (256KB limits)",
+         lambda: measure_batch(event["Records"], DEFAULT_MAX_BYTES, DEFAULT_MAX_BYTES)),
+    ]
+    print(f"{args.records} records x {args.body_kb}KB bodies ({sum(expected) / 1024:,.0f}KB of records)")
+    for name, fn in rows:
+        seconds, peak, _ = measure(fn, args.repeat)
+        print(f"  {name:<30} {seconds * 1000:8.2f}ms  peak {peak / 1024:9.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,251 @@
+import heapq
 import json
+import os
+import time
+
+# Lambda async invocation payload limit (256KB)
+DEFAULT_MAX_BYTES = 262144
+DEFAULT_NAMESPACE = "MessageSizeBreach"
+LARGEST_RECORDS = 3
+# Flush pending metrics when an invocation has less than this left
+FLUSH_MARGIN_MS = 1000
+# EMF accepts at most 100 distinct values per metric
+_MAX_EMF_VALUES = 100
+_SIGNIFICANT_BITS = 4
+_EXACT_BELOW = 1 << _SIGNIFICANT_BITS
+
+# Bytes json.dumps writes as two-character escapes, and the control bytes it writes as \u00XX
+_SHORT_ESCAPES = b'"\\\n\r\t\b\f'
+_LONG_ESCAPES = bytes(b for b in range(0x20) if b not in _SHORT_ESCAPES)
+# bytes.translate deletion tables that keep only those bytes
+_ALL_BUT_SHORT = bytes(b for b in range(256) if b not in _SHORT_ESCAPES)
+_ALL_BUT_LONG = bytes(b for b in range(256) if b not in _LONG_ESCAPES)
+_ENCODE_CHUNK = 65536
+
+
+def _string_size(s, limit=None):
+    """Bytes of s as a UTF-8 JSON string literal, quotes and escapes included (stops past limit)."""
+    size = 2
+    # Encode a chunk at a time so a large body is never copied whole
+    for i in range(0, len(s), _ENCODE_CHUNK):
+        chunk = s[i:i + _ENCODE_CHUNK].encode('utf-8', 'surrogatepass')
+        size += (len(chunk)
+                 + len(chunk.translate(None, _ALL_BUT_SHORT))
+                 + 5 * len(chunk.translate(None, _ALL_BUT_LONG)))
+        if limit is not None and size > limit:
+            break
+    return size
+
+
+def json_size(value, limit=None):
+    """
+    Bytes of value as compact UTF-8 JSON, counted without serializing it.
+
+    Once the count passes limit, counting stops and the partial count (which
+    is already over the limit) is returned.
+    """
+    size = 0
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            size += _string_size(node, None if limit is None else limit - size)
+        elif isinstance(node, dict):
+            # Braces, a colon per member, commas between members
+            size += 2 + 2 * len(node) - (1 if node else 0)
+            for key, item in node.items():
+                size += _string_size(key if isinstance(key, str) else str(key))
+                stack.append(item)
+        elif isinstance(node, (list, tuple)):
+            size += 2 + len(node) - (1 if node else 0)
+            stack.extend(node)
+        elif node is None or node is True:
+            size += 4
+        elif node is False:
+            size += 5
+        elif isinstance(node, (int, float)):
+            size += len(json.dumps(node))
+        else:
+            raise TypeError(f"Object of type {type(node).__name__} is not JSON serializable")
+        if limit is not None and size > limit:
+            return size
+    return size
+
+
+class Histogram:
+    """
+    Counts of integer values in log-scale buckets keyed by their lower
+    bound. Values keep _SIGNIFICANT_BITS bits, so a bucket is at most
+    12.5% of its lower bound wide.
+    """
+
+    __slots__ = ("counts",)
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, value):
+        if value >= _EXACT_BELOW:
+            shift = value.bit_length() - _SIGNIFICANT_BITS
+            value = (value >> shift) << shift
+        self.counts[value] = self.counts.get(value, 0) + 1
+
+    def emf(self, scale=1):
+        """{"Values": bucket midpoints / scale, "Counts": counts}, coarsened to fit EMF's 100 values."""
+        counts = self.counts
+        bits = _SIGNIFICANT_BITS
+        while len(counts) > _MAX_EMF_VALUES:
+            bits -= 1
+            merged = {}
+            for value, count in counts.items():
+                if value >= 1 << bits:
+                    shift = value.bit_length() - bits
+                    value = (value >> shift) << shift
+                merged[value] = merged.get(value, 0) + count
+            counts = merged
+        values = sorted(counts)
+        return {
+            "Values": [(v + (1 << (v.bit_length() - bits)) / 2 if v >= 1 << bits else v) / scale
+                       for v in values],
+            "Counts": [counts[v] for v in values],
+        }
+
+
+class Metrics:
+    """
+    Per-record and per-batch histograms, kept across warm invocations and
+    written as one Embedded Metric Format log line per flush.
+    """
+
+    def __init__(self, namespace=DEFAULT_NAMESPACE, flush_seconds=0):
+        self.namespace = namespace
+        self.flush_seconds = flush_seconds
+        self._reset(time.monotonic())
+
+    def _reset(self, now):
+        self.record_bytes = Histogram()
+        self.batch_bytes = Histogram()
+        self.batch_records = Histogram()
+        self.latency_us = Histogram()
+        self.invocations = 0
+        self.failed_records = 0
+        self.batch_limit_hits = 0
+        self.largest = []
+        self.started = now
+
+    def observe_batch(self, total_bytes, records, failed, stopped, largest, latency_us):
+        self.batch_bytes.add(total_bytes)
+        self.batch_records.add(records)
+        self.latency_us.add(latency_us)
+        self.invocations += 1
+        self.failed_records += failed
+        self.batch_limit_hits += stopped
+        self.largest = heapq.nlargest(LARGEST_RECORDS, self.largest + largest)
+
+    def due(self, remaining_ms=None):
+        """
+        Whether to flush: the interval has passed (always, with an interval of
+        0), or the invocation has less than FLUSH_MARGIN_MS left, since the
+        environment may be frozen or recycled once it ends.
+        """
+        if not self.invocations:
+            return False
+        if remaining_ms is not None and remaining_ms < FLUSH_MARGIN_MS:
+            return True
+        return time.monotonic() - self.started >= self.flush_seconds
+
+    def emf(self, function_name):
+        """The EMF document for everything observed since the last flush."""
+        metrics = [
+            ("RecordSize", "Bytes", self.record_bytes.emf()),
+            ("BatchSize", "Bytes", self.batch_bytes.emf()),
+            ("BatchRecords", "Count", self.batch_records.emf()),
+            ("HandlerLatency", "Milliseconds", self.latency_us.emf(scale=1000)),
+            ("FailedRecords", "Count", self.failed_records),
+            ("BatchLimitHits", "Count", self.batch_limit_hits),
+            ("Invocations", "Count", self.invocations),
+        ]
+        # A histogram with nothing in it (RecordSize for an empty batch) is left out:
+        # EMF rejects a metric with no values
+        metrics = [m for m in metrics if not (isinstance(m[2], dict) and not m[2]["Values"])]
+        document = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": [["FunctionName"]],
+                    "Metrics": [{"Name": name, "Unit": unit} for name, unit, _ in metrics],
+                }],
+            },
+            "FunctionName": function_name,
+            "LargestRecords": [{"messageId": message_id, "bytes": size} for size, message_id in self.largest],
+        }
+        document.update((name, value) for name, _, value in metrics)
+        return document
+
+    def flush(self, function_name):
+        """Print the EMF line and start a new interval."""
+        print(json.dumps(self.emf(function_name), separators=(",", ":")))
+        self._reset(time.monotonic())
+
+
+_metrics = Metrics(os.environ.get("METRICS_NAMESPACE", DEFAULT_NAMESPACE),
+                   float(os.environ.get("METRICS_FLUSH_SECONDS", 0)))
+
+
+def measure_batch(records, max_record_bytes, max_batch_bytes, largest=LARGEST_RECORDS, observe=None):
+    """
+    Sizes of an SQS batch, record by record.
+
+    A record larger than max_record_bytes is counted only up to the limit
+    and fails. Once the running total would pass max_batch_bytes, the
+    remaining records are not measured and fail too, so SQS redelivers
+    them in a later batch. observe, if given, is called with the size of
+    every measured record. Returns (accepted bytes, failed message ids,
+    largest (bytes, message id) pairs, whether measurement stopped early).
+    """
+    total = 0
+    failures = []
+    sizes = []
+    stopped = False
+    for i, record in enumerate(records):
+        message_id = record.get('messageId', str(i))
+        if stopped:
+            failures.append(message_id)
+            continue
+        size = json_size(record, max_record_bytes)
+        if observe:
+            observe(size)
+        if size > max_record_bytes:
+            failures.append(message_id)
+        elif total + size > max_batch_bytes:
+            failures.append(message_id)
+            stopped = True
+        else:
+            total += size
+        sizes.append((size, message_id))
+    return total, failures, heapq.nlargest(largest, sizes), stopped
+
 
 def lambda_handler(event, context):
-    # Log event size to demonstrate payload limit breach
-    event_size = len(json.dumps(event))
-    print(f"Event size: {event_size} bytes, Records: {len(event.get('Records', []))}")
-    
-    return {'statusCode': 200, 'body': f'Processed {len(event.get("Records", []))} messages'}
+    started = time.perf_counter_ns()
+    records = event.get('Records', [])
+    max_record_bytes = int(os.environ.get('MAX_RECORD_BYTES', DEFAULT_MAX_BYTES))
+    max_batch_bytes = int(os.environ.get('MAX_BATCH_BYTES', DEFAULT_MAX_BYTES))
+
+    total, failures, largest, stopped = measure_batch(
+        records, max_record_bytes, max_batch_bytes, observe=_metrics.record_bytes.add)
+    latency_us = (time.perf_counter_ns() - started) // 1000
+    _metrics.observe_batch(total, len(records), len(failures), stopped, largest, latency_us)
+
+    # Log record sizes to demonstrate payload limit breach: one EMF line per flush
+    remaining = getattr(context, 'get_remaining_time_in_millis', None)
+    if _metrics.due(remaining() if remaining else None):
+        _metrics.flush(getattr(context, 'function_name', None)
+                       or os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local'))
+
+    return {
+        'statusCode': 200,
+        'body': f'Processed {len(records) - len(failures)} messages',
+        'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failures],
+    }
@@ -13,10 +13,11 @@ resource "aws_sqs_queue" "image_processing_queue" {
   visibility_timeout_seconds = 1080    # 18 minutes (6x Lambda timeout of 180 seconds)
   receive_wait_time_seconds  = 20      # Long polling
 
-  # Dead letter queue for failed messages
+  # Dead letter queue for failed messages. Records the Lambda defers past
+  # max_batch_bytes count as receives too (see max_receive_count)
   redrive_policy = jsonencode({
     deadLetterTargetArn = aws_sqs_queue.image_processing_dlq.arn
-    maxReceiveCount     = 3
+    maxReceiveCount     = var.max_receive_count
   })
 
   tags = {
@@ -52,6 +53,17 @@ resource "aws_lambda_function" "image_processor" {
   # This will fail when batch size × message size > 256KB (Lambda async limit)
   memory_size = 1024
 
+  # Records and batches past these sizes are returned as batch item failures;
+  # size and latency histograms are logged in Embedded Metric Format
+  environment {
+    variables = {
+      MAX_RECORD_BYTES      = var.max_record_bytes
+      MAX_BATCH_BYTES       = var.max_batch_bytes
+      METRICS_NAMESPACE     = "MessageSizeBreach"
+      METRICS_FLUSH_SECONDS = var.metrics_flush_seconds
+    }
+  }
+
   depends_on = [
     aws_iam_role.lambda_role
   ]
@@ -75,6 +87,9 @@ resource "aws_lambda_event_source_mapping" "sqs_trigger" {
   # These settings make the failure more dramatic
   maximum_batching_window_in_seconds = 5
 
+  # Only the records the handler lists in batchItemFailures are retried
+  function_response_types = ["ReportBatchItemFailures"]
+
   depends_on = [aws_iam_role_policy_attachment.lambda_sqs_policy]
 }
 
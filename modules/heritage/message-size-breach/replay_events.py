@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Replay synthetic SQS events through the handler and check its metrics.
+
+Each event has 0-10 records with bodies from 1KB to 300KB, so some batches
+pass the 256KB limits and some are empty. The handler's output is captured
+and every EMF line is checked:
+    - it parses, and every metric it declares is present
+    - no histogram is empty or has more than 100 values
+    - the RecordSize, BatchRecords and Invocations counts add up to what
+      was replayed
+It also reports what the histograms cost per record. With
+--flush-seconds, metrics are flushed at that interval instead of once per
+invocation, and the script checks that fewer lines were written.
+
+Usage:
+    python3 replay_events.py                        # 1,000 events, one EMF line per invocation
+    python3 replay_events.py --events 5000 --flush-seconds 0.5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import time
+
+import lambda_function
+from bench_lambda import synthetic_event
+from lambda_function import DEFAULT_MAX_BYTES, Histogram, Metrics, json_size, lambda_handler, measure_batch
+
+
+def replay(events, flush_seconds):
+    """(captured output lines, seconds) of running every event through the handler."""
+    lambda_function._metrics = Metrics(flush_seconds=flush_seconds)
+    out = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        for event in events:
+            lambda_handler(event, None)
+        if lambda_function._metrics.invocations:
+            lambda_function._metrics.flush("local")
+    return out.getvalue().splitlines(), time.perf_counter() - start
+
+
+def check_emf(lines, events):
+    """Problems found in the EMF lines, given the replayed events."""
+    problems = []
+    documents = []
+    for line in lines:
+        if line.startswith("{"):
+            try:
+                documents.append(json.loads(line))
+            except ValueError as e:
+                problems.append(f"Unparseable EMF line: {e}")
+    for document in documents:
+        for directive in document["_aws"]["CloudWatchMetrics"]:
+            for metric in directive["Metrics"]:
+                value = document.get(metric["Name"])
+                if value is None:
+                    problems.append(f"Declared metric {metric['Name']} is missing")
+                elif isinstance(value, dict) and not 0 < len(value["Values"]) <= 100:
+                    problems.append(f"{metric['Name']} has {len(value['Values'])} values")
+
+    def total(name):
+        # An empty histogram is left out of its line
+        return sum(sum(d[name]["Counts"]) if isinstance(d[name], dict) else d[name]
+                   for d in documents if name in d)
+
+    records = sum(len(event["Records"]) for event in events)
+    if total("BatchRecords") != len(events) or total("Invocations") != len(events):
+        problems.append(f"Batches counted {total('BatchRecords')}, invocations {total('Invocations')}, "
+                        f"replayed {len(events)}")
+    # Records after the batch limit is reached are failed without being measured
+    measured = sum(sum(1 for _ in _measured_records(event)) for event in events)
+    if total("RecordSize") != measured:
+        problems.append(f"RecordSize counted {total('RecordSize')} records, expected {measured} of {records}")
+    return documents, problems
+
+
+def _measured_records(event):
+    sizes = []
+    measure_batch(event["Records"], DEFAULT_MAX_BYTES, DEFAULT_MAX_BYTES, observe=sizes.append)
+    return sizes
+
+
+def overhead(events):
+    """Nanoseconds per record of Histogram.add, and of json_size for comparison."""
+    sizes = [json_size(record) for event in events for record in event["Records"]]
+    histogram = Histogram()
+    start = time.perf_counter_ns()
+    for size in sizes:
+        histogram.add(size)
+    add_ns = (time.perf_counter_ns() - start) / len(sizes)
+    start = time.perf_counter_ns()
+    for event in events[:100]:
+        for record in event["Records"]:
+            json_size(record)
+    measure_ns = (time.perf_counter_ns() - start) / sum(len(e["Records"]) for e in events[:100])
+    return add_ns, measure_ns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay synthetic SQS events and check the EMF metrics")
+    parser.add_argument("--events", type=int, default=1000, help="Events to replay")
+    parser.add_argument("--flush-seconds", type=float, default=0, help="Metrics flush interval (0: every invocation)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    templates = {kb: synthetic_event(1, kb * 1024)["Records"][0] for kb in (1, 4, 16, 25, 64, 100, 256, 300)}
+    events = []
+    for i in range(args.events):
+        records = []
+        for j in range(rng.randint(0, 10)):
+            record = dict(templates[rng.choice(list(templates))])
+            record["messageId"] = f"message-{i}-{j}"
+            records.append(record)
+        events.append({"Records": records})
+
+    lines, seconds = replay(events, args.flush_seconds)
+    documents, problems = check_emf(lines, events)
+    add_ns, measure_ns = overhead(events)
+
+    print(f"Replayed {len(events):,} events ({sum(len(e['Records']) for e in events):,} records) "
+          f"in {seconds:.2f}s: {len(lines):,} log lines, {len(documents):,} EMF lines")
+    print(f"Histogram.add: {add_ns:.0f}ns per record (json_size: {measure_ns / 1000:.1f}µs per record)")
+    if args.flush_seconds and len(documents) >= len(events):
+        problems.append(f"Flushing every {args.flush_seconds}s still wrote one EMF line per event")
+    for problem in problems:
+        print(f"Error: {problem}", file=sys.stderr)
+    if problems:
+        sys.exit(1)
+    print("EMF lines OK")
+
+
+if __name__ == "__main__":
+    main()
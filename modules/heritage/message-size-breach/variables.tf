@@ -25,6 +25,40 @@ variable "batch_size" {
   }
 }
 
+variable "max_record_bytes" {
+  description = "Records larger than this (serialized JSON, bytes) are returned to the queue as batch item failures"
+  type        = number
+  default     = 262144 # 256KB Lambda async payload limit
+}
+
+variable "max_batch_bytes" {
+  description = "Records past this running total (serialized JSON, bytes) in a batch are returned to the queue as batch item failures. Each return uses up one of max_receive_count"
+  type        = number
+  default     = 262144 # 256KB Lambda async payload limit
+}
+
+variable "max_receive_count" {
+  description = "Receives before SQS moves a message to the DLQ. Records deferred by max_batch_bytes are received again, so keep this above the number of times a valid record can be deferred"
+  type        = number
+  default     = 3
+
+  validation {
+    condition     = var.max_receive_count >= 1 && var.max_receive_count <= 1000
+    error_message = "Max receive count must be between 1 and 1000."
+  }
+}
+
+variable "metrics_flush_seconds" {
+  description = "How often the Lambda writes its size and latency histograms (EMF log line). 0 writes one line per invocation"
+  type        = number
+  default     = 0
+
+  validation {
+    condition     = var.metrics_flush_seconds >= 0
+    error_message = "Metrics flush interval cannot be negative."
+  }
+}
+
 variable "lambda_timeout" {
   description = "Lambda function timeout in seconds"
   type        = number
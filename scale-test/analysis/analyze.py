@@ -5,18 +5,49 @@ Quick CLI script for scale test duration analysis.
 Usage:
     python analyze.py                    # Use sample data
     python analyze.py --fetch            # Fetch from dashboard API
+    python analyze.py --fetch --pages runs-pages/   # Paginated, resumable fetch
+    python analyze.py --fetch --pages runs-pages/ --refresh   # Re-fetch every page
+    python analyze.py --fetch --store runs/         # Append new runs to the store, analyze it
+    python analyze.py --store runs/                 # Analyze the local run store
     python analyze.py --json data.json   # Load from JSON file
+    python analyze.py --json runs.ndjson --stream   # Stream a large file in chunks
+    python analyze.py --model-state model.json      # Formula/R²/importance from model_state.py
+    python analyze.py --summary          # Correlations + scenario summary only (fast start)
+    python analyze.py --outliers residual --outliers-json out.json  # Pick detector, export flags
+    python analyze.py --format json --profile   # Structured report with per-stage timings
+    python analyze.py --json runs.ndjson --by scenario,scale --jobs 8   # Per-group models in parallel
+    python analyze.py --json data.json --cache .analysis-cache   # Reuse the report while data.json is unchanged
+    python analyze.py --store runs/ --hypothesis-costs   # Time per hypothesis category, per scale
+    python analyze.py --store runs/ --gate   # CI gate: JSON verdict, exit 3 if a scenario regressed
 """
 
 import argparse
 import json
+import math
 import os
 import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
 
-import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
+
+from fetch import DEFAULT_PAGE_SIZE, DEFAULT_WORKERS, FetchError, fetch_pages, load_pages, to_record
+from gate import GATE_ALPHA, GATE_METHODS, GATE_MIN_EFFECT, REGRESSION_EXIT_CODE
+from model_state import load_state
+from run_store import add_age_hours, fetch_into_store, load_hypotheses, load_store
+
+# Time series windows (hours ago): runs within RECENT_HOURS are "recent",
+# runs older than OLDER_HOURS are "older", and PERIOD_BINS groups runs by age
+RECENT_HOURS = 24
+OLDER_HOURS = 48
+PERIOD_BINS = [0, 24, 48, 72, 200]
+
+# Metrics correlated with duration, and the subset used to predict it
+METRICS = ['blast_radius', 'edges', 'observations', 'risk_count']
+FEATURES = ['blast_radius', 'edges', 'observations']
+OUTLIER_METHODS = ['scenario_mad', 'rolling_quantile', 'residual']
+DEFAULT_CACHE_MB = 256
 
 # Sample data from recent runs (50 runs across 4 days)
 # Added 'age_hours' to track when each run occurred (0 = most recent)
@@ -101,31 +132,204 @@ def fetch_from_api():
         response.raise_for_status()
         api_data = response.json()
         
-        data = []
-        for run in api_data.get('results', api_data):
-            data.append({
-                "scenario": run.get('scenario'),
-                "duration_seconds": run.get('overmindDurationMs', 0) / 1000,
-                "risk_count": run.get('riskCount', 0),
-                "blast_radius": run.get('blastRadiusNodes', 0),
-                "edges": run.get('blastRadiusEdges', 0),
-                "observations": run.get('observations', 0),
-            })
-        return data
+        return [to_record(run) for run in api_data.get('results', api_data)]
     except Exception as e:
         print(f"Error fetching from API: {e}")
         sys.exit(1)
 
 
+def fetch_paginated(pages_dir, page_size, workers, refresh=False):
+    """Fetch run data page by page into pages_dir, resuming a partial pull (or, with refresh, from scratch)."""
+    try:
+        fetch_pages(pages_dir, page_size=page_size, workers=workers, refresh=refresh)
+    except FetchError as e:
+        print(f"Error fetching from API: {e}")
+        print(f"Pages fetched so far are kept in {pages_dir}; rerun to resume")
+        sys.exit(1)
+    return load_pages(pages_dir)
+
+
+def load_from_store(store_dir, fetch, page_size, workers, ages=True):
+    """Load data from the run store, first appending new runs if fetch is set (ages: see load_store)."""
+    if not fetch and not os.path.isdir(store_dir):
+        print(f"Error: Run store '{store_dir}' not found", file=sys.stderr)
+        sys.exit(1)
+    if fetch:
+        try:
+            appended = fetch_into_store(store_dir, page_size=page_size, workers=workers)
+        except FetchError as e:
+            print(f"Error fetching from API: {e}")
+            sys.exit(1)
+        print(f"Appended {appended} new runs to {store_dir}\n", file=sys.stderr)
+    df = load_store(store_dir, ages=ages)
+    # Backfilled artifacts without a sidecar have no measured duration
+    timed_runs = df['duration_seconds'].notna()
+    if not timed_runs.all():
+        print(f"Skipping {(~timed_runs).sum()} runs without a duration\n", file=sys.stderr)
+        df = df[timed_runs].reset_index(drop=True)
+    return df
+
+
 def load_from_json(filepath):
     """Load data from JSON file."""
     with open(filepath) as f:
         return json.load(f)
 
 
-def analyze_time_series(df):
-    """Analyze trends over time."""
+class StageProfile:
+    """Profiling hook that collects stage timings and row counts."""
+
+    def __init__(self):
+        self.stages = []
+
+    def __call__(self, stage, seconds, rows=None):
+        self.stages.append({'stage': stage, 'seconds': seconds, 'rows': rows})
+
+
+@contextmanager
+def timed(profile, stage, rows=None):
+    """
+    Report the wall-clock time of the block to profile(stage, seconds, rows).
+
+    Does nothing when profile is None. The yielded dict's 'rows' entry can
+    be set inside the block when the row count is only known afterwards.
+    """
+    info = {'rows': rows}
+    start = time.perf_counter()
+    yield info
+    if profile is not None:
+        profile(stage, time.perf_counter() - start, info['rows'])
+
+
+def print_profile(stages):
+    """Print the stage timings collected by a StageProfile."""
+    print("-" * 40)
+    print("STAGE TIMINGS")
+    print("-" * 40)
+    total = sum(s['seconds'] for s in stages)
+    for s in stages:
+        rows = f"{s['rows']:>10,}" if s['rows'] is not None else f"{'':>10s}"
+        pct = s['seconds'] / total * 100 if total else 0
+        print(f"  {s['stage']:28s} {s['seconds'] * 1000:9.1f}ms {pct:5.1f}% {rows} rows")
+    print()
+
+
+def period_labels(bins):
+    """Human-readable labels for age bins, e.g. [0, 24, 48] -> 'Last 24h', '1+ days ago'."""
+    def fmt(hours):
+        return f"{hours / 24:g}" if hours % 24 == 0 else None
+
+    labels = []
+    for i, (lo, hi) in enumerate(zip(bins[:-1], bins[1:])):
+        if i == 0:
+            labels.append(f"Last {hi:g}h")
+        elif i == len(bins) - 2:
+            labels.append(f"{fmt(lo)}+ days ago" if fmt(lo) else f"{lo:g}h+ ago")
+        elif fmt(lo) and fmt(hi):
+            labels.append(f"{fmt(lo)}-{fmt(hi)} days ago")
+        else:
+            labels.append(f"{lo:g}-{hi:g}h ago")
+    return labels
+
+
+def trend_windows(age_hours, recent_hours=RECENT_HOURS, older_hours=OLDER_HOURS):
+    """Label each age as 'recent', 'older' or None (neither window)."""
+    return np.where(age_hours <= recent_hours, 'recent',
+                    np.where(age_hours > older_hours, 'older', None))
+
+
+def trend_table(means, counts, min_runs=3):
+    """
+    Build the recent-vs-older table from per-scenario window means.
+
+    Args:
+        means: DataFrame indexed by scenario with 'recent' and 'older' columns
+        counts: Series of total runs per scenario
+        min_runs: Scenarios with fewer runs are left out
+
+    Returns a DataFrame indexed by scenario with recent_avg, older_avg and
+    change_pct columns, sorted by change_pct (largest slowdown first).
+    """
+    import pandas as pd
+
+    trends = pd.DataFrame({
+        'recent_avg': means['recent'],
+        'older_avg': means['older'],
+    })
+    trends = trends[(counts.reindex(trends.index) >= min_runs)
+                    & trends['recent_avg'].notna()
+                    & trends['older_avg'].notna()
+                    & (trends['older_avg'] > 0)]
+    trends['change_pct'] = (trends['recent_avg'] - trends['older_avg']) / trends['older_avg'] * 100
+    return trends.sort_values('change_pct', ascending=False, kind='stable')
+
+
+def scenario_trends(df, recent_hours=RECENT_HOURS, older_hours=OLDER_HOURS, min_runs=3):
+    """
+    Compare recent vs older mean duration for every scenario at once.
+
+    Runs with age_hours <= recent_hours form the recent window and runs with
+    age_hours > older_hours the older one. Scenarios with fewer than
+    min_runs runs, or without runs in both windows, are left out.
+    """
+    import pandas as pd
+
+    window = pd.Series(trend_windows(df['age_hours'], recent_hours, older_hours), index=df.index)
+    means = (df.groupby(['scenario', window], sort=False)['duration_minutes']
+               .mean()
+               .unstack()
+               .reindex(columns=['recent', 'older']))
+    return trend_table(means, df['scenario'].value_counts(), min_runs)
+
+
+def period_stats(df, period_bins=PERIOD_BINS):
+    """Mean, std and count of duration per age period; returns (labels, stats)."""
+    import pandas as pd
+
+    labels = period_labels(period_bins)
+    df['period'] = pd.cut(df['age_hours'], bins=period_bins, labels=labels)
+    stats = df.groupby('period', observed=True).agg({
+        'duration_minutes': ['mean', 'std', 'count']
+    }).round(1)
+    stats.columns = ['avg_min', 'std_min', 'count']
+    return labels, stats
+
+
+def time_series_stats(df, recent_hours=RECENT_HOURS, older_hours=OLDER_HOURS, period_bins=PERIOD_BINS,
+                      profile=None):
+    """Compute the time series section: overall trend, period stats and scenario trends."""
     if 'age_hours' not in df.columns:
+        return None
+
+    rows = len(df)
+    with timed(profile, 'time_series.trend_corr', rows):
+        time_corr = df['duration_seconds'].corr(df['age_hours'])
+    with timed(profile, 'time_series.periods', rows):
+        labels, stats = period_stats(df, period_bins)
+    with timed(profile, 'time_series.scenario_trends', rows):
+        trends = scenario_trends(df, recent_hours, older_hours)
+
+    return {
+        'time_corr': time_corr,
+        'labels': labels,
+        'period_stats': stats,
+        'trends': trends,
+    }
+
+
+def trend_label(time_corr):
+    """Overall trend name and description from the correlation of duration with age."""
+    # Lower age_hours = more recent, so negative correlation = getting slower
+    if time_corr > 0.1:
+        return "IMPROVING", "Recent runs are faster than older runs"
+    if time_corr < -0.1:
+        return "DEGRADING", "Recent runs are slower than older runs"
+    return "STABLE", "No significant change over time"
+
+
+def print_time_series(ts):
+    """Print the time series section computed by time_series_stats()."""
+    if ts is None:
         print("  No time data available (add age_hours to data)")
         return
     
@@ -134,39 +338,21 @@ def analyze_time_series(df):
     print("-" * 40)
     
     # Overall trend: is duration getting better or worse?
-    # Lower age_hours = more recent, so negative correlation = getting slower
-    time_corr = df['duration_seconds'].corr(df['age_hours'])
-    
-    if time_corr > 0.1:
-        trend = "IMPROVING"
-        trend_desc = "Recent runs are faster than older runs"
-    elif time_corr < -0.1:
-        trend = "DEGRADING"
-        trend_desc = "Recent runs are slower than older runs"
-    else:
-        trend = "STABLE"
-        trend_desc = "No significant change over time"
+    time_corr = ts['time_corr']
+    trend, trend_desc = trend_label(time_corr)
     
     print(f"\n  Overall trend: {trend}")
     print(f"  {trend_desc}")
     print(f"  (correlation with age: {time_corr:+.3f})")
     
     # Group by time period
-    df['period'] = pd.cut(df['age_hours'], 
-                          bins=[0, 24, 48, 72, 200],
-                          labels=['Last 24h', '1-2 days ago', '2-3 days ago', '3+ days ago'])
-    
     print("\n  Average Duration by Time Period:")
-    period_stats = df.groupby('period', observed=True).agg({
-        'duration_minutes': ['mean', 'std', 'count']
-    }).round(1)
-    period_stats.columns = ['avg_min', 'std_min', 'count']
+    period_stats = ts['period_stats']
     
     # Calculate change from oldest to newest
-    periods = ['3+ days ago', '2-3 days ago', '1-2 days ago', 'Last 24h']
     prev_avg = None
     
-    for period in periods:
+    for period in reversed(ts['labels']):
         if period in period_stats.index:
             row = period_stats.loc[period]
             change_str = ""
@@ -182,75 +368,237 @@ def analyze_time_series(df):
     # Per-scenario trends
     print("\n  Trend by Scenario (recent vs older):")
     
-    scenario_trends = []
-    for scenario in df['scenario'].unique():
-        sdf = df[df['scenario'] == scenario]
-        if len(sdf) >= 3:  # Need at least 3 points
-            recent = sdf[sdf['age_hours'] <= 24]['duration_minutes'].mean()
-            older = sdf[sdf['age_hours'] > 48]['duration_minutes'].mean()
-            
-            if pd.notna(recent) and pd.notna(older) and older > 0:
-                change_pct = ((recent - older) / older) * 100
-                scenario_trends.append({
-                    'scenario': scenario,
-                    'recent_avg': recent,
-                    'older_avg': older,
-                    'change_pct': change_pct
-                })
-    
-    if scenario_trends:
-        scenario_trends.sort(key=lambda x: x['change_pct'], reverse=True)
-        
-        for st in scenario_trends:
-            if abs(st['change_pct']) > 10:
-                arrow = "↑ SLOWER" if st['change_pct'] > 0 else "↓ FASTER"
-                print(f"    {st['scenario']:25s}: {arrow} ({st['change_pct']:+.0f}%)")
-                print(f"      Recent: {st['recent_avg']:.1f}m → Older: {st['older_avg']:.1f}m")
-            else:
-                print(f"    {st['scenario']:25s}: stable")
-
-
-def analyze(data):
-    """Run analysis on the data."""
-    df = pd.DataFrame(data)
-    df['duration_minutes'] = df['duration_seconds'] / 60
+    for scenario, st in ts['trends'].iterrows():
+        if abs(st['change_pct']) > 10:
+            arrow = "↑ SLOWER" if st['change_pct'] > 0 else "↓ FASTER"
+            print(f"    {scenario:25s}: {arrow} ({st['change_pct']:+.0f}%)")
+            print(f"      Recent: {st['recent_avg']:.1f}m → Older: {st['older_avg']:.1f}m")
+        else:
+            print(f"    {scenario:25s}: stable")
+
+
+def analyze_time_series(df, recent_hours=RECENT_HOURS, older_hours=OLDER_HOURS, period_bins=PERIOD_BINS):
+    """Analyze trends over time."""
+    print_time_series(time_series_stats(df, recent_hours, older_hours, period_bins))
+
+
+def finalize_summary(summary):
+    """Round the per-scenario summary and order it slowest first."""
+    summary = summary[['avg_min', 'std_min', 'avg_edges', 'avg_nodes']].round(1)
+    return summary.sort_values('avg_min', ascending=False)
+
+
+def correlation_stats(df):
+    """Correlation of duration with each metric."""
+    return {m: df['duration_seconds'].corr(df[m]) for m in METRICS}
+
+
+def fit_duration_model(df, model_fit=None):
+    """
+    Linear model of duration on FEATURES, plus standardized feature importance.
+
+    With model_fit (the "fit" of a model_state.py state) the stored model is
+    used instead of fitting one on df. Returns a dict with intercept,
+    coefficients, r2, importance and per-run predicted durations.
+    """
+    X = df[FEATURES]
+    y = df['duration_seconds']
     
-    print("=" * 60)
-    print("SCALE TEST DURATION ANALYSIS")
-    print("=" * 60)
-    print(f"\nAnalyzing {len(df)} runs across {df['scenario'].nunique()} scenarios\n")
+    if model_fit is not None:
+        intercept = model_fit['intercept']
+        coefficients = [model_fit['coefficients'][f] for f in FEATURES]
+        return {
+            'intercept': intercept,
+            'coefficients': coefficients,
+            'r2': model_fit['r2'],
+            'importance': [model_fit['importance'][f] for f in FEATURES],
+            'predicted': intercept + X.to_numpy(dtype=float) @ np.array(coefficients),
+        }
+    
+    from sklearn.linear_model import LinearRegression
+    from sklearn.preprocessing import StandardScaler
+
+    model = LinearRegression()
+    model.fit(X, y)
     
-    # === Correlation Analysis ===
+    # Feature importance: coefficients of the same fit on standardized features
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    model_scaled = LinearRegression()
+    model_scaled.fit(X_scaled, y)
+    
+    return {
+        'intercept': model.intercept_,
+        'coefficients': model.coef_,
+        'r2': model.score(X, y),
+        'importance': np.abs(model_scaled.coef_),
+        'predicted': model.predict(X),
+    }
+
+
+def outlier_stats(df, predicted, outlier_method=OUTLIER_METHODS[0]):
+    """Attach predictions and residuals to df and return the flagged runs."""
+    from outliers import flagged, score_runs
+
+    df['predicted'] = predicted
+    df['residual_pct'] = (df['duration_seconds'] - df['predicted']) / df['predicted'] * 100
+    return flagged(df, score_runs(df, outlier_method))
+
+
+def scenario_summary(df):
+    """Per-scenario duration mean/std and mean size, slowest first."""
+    summary = df.groupby('scenario').agg({
+        'duration_minutes': ['mean', 'std'],
+        'edges': 'mean',
+        'blast_radius': 'mean'
+    })
+    summary.columns = ['avg_min', 'std_min', 'avg_edges', 'avg_nodes']
+    return finalize_summary(summary)
+
+
+def compute_report(df, recent_hours=RECENT_HOURS, older_hours=OLDER_HOURS, period_bins=PERIOD_BINS,
+                   model_fit=None, outlier_method=OUTLIER_METHODS[0], profile=None, cache=None):
+    """
+    Compute every section of the report from an in-memory DataFrame.
+
+    If model_fit (the "fit" of a model_state.py state) is given, the formula,
+    R², importance and outlier predictions come from it instead of a fresh
+    regression on df. Outliers are scored by the outliers.py detector named
+    by outlier_method. profile, if given, is called as
+    profile(stage, seconds, rows) after each stage (see StageProfile).
+    With cache (a report_cache.ReportCache), the time series aggregates
+    of blocks of runs seen before are reused (see report_cache.py).
+
+    Returns a dict consumed by print_report(); streaming.stream_report()
+    builds the same dict without materializing all runs.
+    """
+    from outliers import DESCRIPTIONS
+
+    df['duration_minutes'] = df['duration_seconds'] / 60
+    rows = len(df)
+    
+    with timed(profile, 'correlations', rows):
+        correlations = correlation_stats(df)
+    with timed(profile, 'model', rows):
+        model = fit_duration_model(df, model_fit)
+    with timed(profile, 'outliers', rows):
+        outliers = outlier_stats(df, model['predicted'], outlier_method)
+    with timed(profile, 'scenario_summary', rows):
+        summary = scenario_summary(df)
+    if cache is not None:
+        from report_cache import cached_time_series
+
+        time_series = cached_time_series(cache, df, recent_hours, older_hours, period_bins, profile)
+    else:
+        time_series = time_series_stats(df, recent_hours, older_hours, period_bins, profile)
+    
+    return {
+        'n_runs': len(df),
+        'n_scenarios': df['scenario'].nunique(),
+        'correlations': correlations,
+        'intercept': model['intercept'],
+        'coefficients': dict(zip(FEATURES, model['coefficients'])),
+        'r2': model['r2'],
+        'importance': dict(zip(FEATURES, model['importance'])),
+        'outlier_method': outlier_method,
+        'outlier_description': DESCRIPTIONS[outlier_method],
+        'outliers': outliers,
+        'summary': summary,
+        'time_series': time_series,
+    }
+
+
+def print_correlations(correlations):
+    """Print the correlation section."""
     print("-" * 40)
     print("CORRELATION WITH DURATION")
     print("-" * 40)
     
-    metrics = ['blast_radius', 'edges', 'observations', 'risk_count']
-    correlations = {}
-    for m in metrics:
-        corr = df['duration_seconds'].corr(df[m])
-        correlations[m] = corr
+    for m, corr in correlations.items():
         strength = "STRONG" if abs(corr) > 0.7 else "moderate" if abs(corr) > 0.4 else "weak"
         print(f"  {m:20s}: {corr:+.3f} ({strength})")
+
+
+def print_scenario_summary(rows):
+    """Print the scenario summary from (scenario, avg_min, std_min, avg_edges) rows, slowest first."""
+    print("\n" + "-" * 40)
+    print("SCENARIO SUMMARY")
+    print("-" * 40)
+    
+    print(f"\n  {'Scenario':25s} {'Avg Duration':>12s} {'Std Dev':>10s} {'Avg Edges':>12s}")
+    print("  " + "-" * 60)
+    for name, avg_min, std_min, avg_edges in rows:
+        std = f"±{std_min:.1f}m" if not math.isnan(std_min) else "N/A"
+        print(f"  {name:25s} {avg_min:>10.1f}m {std:>10s} {avg_edges:>12,.0f}")
+
+
+def summary_report(data):
+    """
+    Scenario summary and correlations using only the standard library and numpy.
+
+    Mirrors the corresponding sections of compute_report() without pandas
+    or scikit-learn, for quick looks where import time dominates.
+    """
+    by_scenario = {}
+    for record in data:
+        by_scenario.setdefault(record['scenario'], []).append(record)
+    
+    columns = ['duration_seconds'] + METRICS
+    values = np.array([[record[c] for c in columns] for record in data], dtype=float)
+    correlations = {m: np.corrcoef(values[:, 0], values[:, i + 1])[0, 1] for i, m in enumerate(METRICS)}
+    
+    rows = []
+    for scenario in sorted(by_scenario):
+        runs = by_scenario[scenario]
+        minutes = np.array([r['duration_seconds'] for r in runs], dtype=float) / 60
+        std = minutes.std(ddof=1) if len(minutes) > 1 else math.nan
+        rows.append((scenario,
+                     np.round(minutes.mean(), 1),
+                     np.round(std, 1),
+                     np.round(np.mean([r['edges'] for r in runs]), 1)))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    
+    return {
+        'n_runs': len(data),
+        'n_scenarios': len(by_scenario),
+        'correlations': correlations,
+        'summary': rows,
+    }
+
+
+def print_summary(summary):
+    """Print the output of summary_report()."""
+    print("=" * 60)
+    print("SCALE TEST DURATION SUMMARY")
+    print("=" * 60)
+    print(f"\nAnalyzing {summary['n_runs']} runs across {summary['n_scenarios']} scenarios\n")
+    print_correlations(summary['correlations'])
+    print_scenario_summary(summary['summary'])
+    print("\n" + "=" * 60 + "\n")
+
+
+def print_report(report):
+    """Print the formatted report for a dict from compute_report()."""
+    print("=" * 60)
+    print("SCALE TEST DURATION ANALYSIS")
+    print("=" * 60)
+    print(f"\nAnalyzing {report['n_runs']} runs across {report['n_scenarios']} scenarios\n")
+    
+    # === Correlation Analysis ===
+    correlations = report['correlations']
+    print_correlations(correlations)
     
     # === Linear Model ===
     print("\n" + "-" * 40)
     print("DURATION PREDICTION FORMULA")
     print("-" * 40)
     
-    features = ['blast_radius', 'edges', 'observations']
-    X = df[features]
-    y = df['duration_seconds']
-    
-    model = LinearRegression()
-    model.fit(X, y)
-    
-    print(f"\n  duration_seconds = {model.intercept_:.1f}")
-    for feat, coef in zip(features, model.coef_):
+    print(f"\n  duration_seconds = {report['intercept']:.1f}")
+    for feat, coef in report['coefficients'].items():
         sign = '+' if coef >= 0 else '-'
         print(f"    {sign} {abs(coef):.4f} × {feat}")
     
-    r2 = model.score(X, y)
+    r2 = report['r2']
     print(f"\n  R² = {r2:.3f} ({r2*100:.0f}% of variance explained)")
     
     # === Feature Importance ===
@@ -258,61 +606,47 @@ def analyze(data):
     print("FEATURE IMPORTANCE")
     print("-" * 40)
     
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    model_scaled = LinearRegression()
-    model_scaled.fit(X_scaled, y)
-    
-    importance = pd.DataFrame({
-        'Feature': features,
-        'Importance': np.abs(model_scaled.coef_)
-    }).sort_values('Importance', ascending=False)
+    importance = sorted(report['importance'].items(), key=lambda item: item[1], reverse=True)
     
-    total = importance['Importance'].sum()
-    for _, row in importance.iterrows():
-        pct = row['Importance'] / total * 100
+    total = sum(value for _, value in importance)
+    for feature, value in importance:
+        pct = value / total * 100
         bar = "█" * int(pct / 5)
-        print(f"  {row['Feature']:20s}: {pct:5.1f}% {bar}")
+        print(f"  {feature:20s}: {pct:5.1f}% {bar}")
     
     # === Outliers ===
     print("\n" + "-" * 40)
-    print("OUTLIERS (>30% deviation from expected)")
+    print(f"OUTLIERS ({report['outlier_description']})")
     print("-" * 40)
     
-    df['predicted'] = model.predict(X)
-    df['residual_pct'] = (df['duration_seconds'] - df['predicted']) / df['predicted'] * 100
+    outliers = report['outliers']
+    residual_rule = report['outlier_method'] == 'residual'
     
-    outliers = df[abs(df['residual_pct']) > 30].sort_values('residual_pct', ascending=False)
+    def print_outlier(row):
+        if residual_rule:
+            detail = f"{row['predicted']/60:.1f}m expected ({row['residual_pct']:+.0f}%)"
+        else:
+            detail = f"{row['baseline']/60:.1f}m expected (score {row['score']:+.1f})"
+        print(f"    {row['scenario']:25s}: {row['duration_minutes']:.1f}m actual vs {detail}")
     
     if len(outliers) > 0:
         print("\n  Slower than expected:")
-        for _, row in outliers[outliers['residual_pct'] > 0].iterrows():
-            print(f"    {row['scenario']:25s}: {row['duration_minutes']:.1f}m actual vs {row['predicted']/60:.1f}m expected ({row['residual_pct']:+.0f}%)")
+        for _, row in outliers[outliers['score'] > 0].iterrows():
+            print_outlier(row)
         
         print("\n  Faster than expected:")
-        for _, row in outliers[outliers['residual_pct'] < 0].iterrows():
-            print(f"    {row['scenario']:25s}: {row['duration_minutes']:.1f}m actual vs {row['predicted']/60:.1f}m expected ({row['residual_pct']:+.0f}%)")
-    else:
+        for _, row in outliers[outliers['score'] < 0].iterrows():
+            print_outlier(row)
+    elif residual_rule:
         print("  None (all runs within 30% of expected)")
+    else:
+        print("  None")
     
     # === Scenario Summary ===
-    print("\n" + "-" * 40)
-    print("SCENARIO SUMMARY")
-    print("-" * 40)
-    
-    summary = df.groupby('scenario').agg({
-        'duration_minutes': ['mean', 'std'],
-        'edges': 'mean',
-        'blast_radius': 'mean'
-    }).round(1)
-    summary.columns = ['avg_min', 'std_min', 'avg_edges', 'avg_nodes']
-    summary = summary.sort_values('avg_min', ascending=False)
-    
-    print(f"\n  {'Scenario':25s} {'Avg Duration':>12s} {'Std Dev':>10s} {'Avg Edges':>12s}")
-    print("  " + "-" * 60)
-    for name, row in summary.iterrows():
-        std = f"±{row['std_min']:.1f}m" if not pd.isna(row['std_min']) else "N/A"
-        print(f"  {name:25s} {row['avg_min']:>10.1f}m {std:>10s} {row['avg_edges']:>12,.0f}")
+    summary = report['summary']
+    print_scenario_summary(
+        (name, row['avg_min'], row['std_min'], row['avg_edges']) for name, row in summary.iterrows()
+    )
     
     # === Key Insights ===
     print("\n" + "=" * 60)
@@ -335,26 +669,287 @@ def analyze(data):
     print("\n" + "=" * 60)
     
     # Time series analysis
-    analyze_time_series(df)
+    print_time_series(report['time_series'])
     
     print("\n" + "=" * 60 + "\n")
 
 
+def analyze(data, recent_hours=RECENT_HOURS, older_hours=OLDER_HOURS, period_bins=PERIOD_BINS,
+            model_fit=None, outlier_method=OUTLIER_METHODS[0], outliers_json=None,
+            output_format='text', profile=None, by=None, jobs=None, cache=None, cache_key=None, hypotheses=None,
+            ages_at=None):
+    """
+    Run analysis on the data.
+
+    by (columns from grouped.parse_by()) adds a per-group breakdown with
+    its own models, computed across jobs worker processes. With cache (a
+    report_cache.ReportCache) the report is stored under cache_key, or
+    under a key from the runs' fingerprint, and reused when it is there.
+    hypotheses (run_store.load_hypotheses()) adds the analysis time by
+    hypothesis category (see hypothesis_costs.py).
+
+    ages_at (a datetime) is for store rows loaded without age_hours: the
+    ages are derived at that time after the cache lookup, so the key covers
+    the stored created_at rather than ages that change on every load.
+    """
+    import pandas as pd
+
+    with timed(profile, 'build_frame', len(data)):
+        df = pd.DataFrame(data)
+    report = None
+    if cache is not None and cache_key is None:
+        from report_cache import frame_fingerprint, report_key, report_params
+
+        with timed(profile, 'cache.lookup', len(df)):
+            params = report_params(recent_hours, older_hours, period_bins, model_fit, outlier_method, by,
+                                   hypothesis_costs=hypotheses is not None, ages_at=ages_at)
+            fingerprint = frame_fingerprint(df)
+            if hypotheses is not None:
+                fingerprint = [fingerprint, frame_fingerprint(hypotheses)]
+            cache_key = report_key(fingerprint, params)
+            report = cache.get(cache_key)
+    if report is None:
+        if ages_at is not None:
+            add_age_hours(df, ages_at)
+        report = compute_report(df, recent_hours, older_hours, period_bins, model_fit, outlier_method, profile,
+                                cache)
+        if by:
+            from grouped import group_reports
+
+            with timed(profile, 'groups', len(df)):
+                report['groups'] = group_reports(df, by, jobs, outlier_method, recent_hours, older_hours)
+        if hypotheses is not None:
+            from hypothesis_costs import cost_breakdown
+
+            with timed(profile, 'hypothesis_costs', len(hypotheses)):
+                report['hypothesis_costs'] = cost_breakdown(df, hypotheses)
+        if cache is not None:
+            with timed(profile, 'cache.store'):
+                cache.put(cache_key, report)
+    emit_report(report, output_format, profile)
+    if outliers_json:
+        write_outliers_json(report, outliers_json)
+
+
+def emit_report(report, output_format='text', profile=None):
+    """Write the report to stdout as text, a JSON object or NDJSON records."""
+    stages = profile.stages if profile is not None else None
+    if output_format == 'text':
+        print_report(report)
+        if report.get('groups'):
+            from grouped import print_groups
+
+            print_groups(report['groups'])
+        if 'hypothesis_costs' in report:
+            from hypothesis_costs import print_cost_breakdown
+
+            print_cost_breakdown(report['hypothesis_costs'])
+        if stages:
+            print_profile(stages)
+        return
+    
+    from report_json import iter_ndjson, report_to_dict
+    
+    result = report_to_dict(report, stages)
+    if output_format == 'json':
+        print(json.dumps(result, indent=2))
+    else:
+        for record in iter_ndjson(result):
+            print(json.dumps(record))
+
+
+def write_outliers_json(report, path):
+    """Write the report's flagged runs as a JSON list."""
+    from outliers import to_records
+
+    with open(path, 'w') as f:
+        json.dump(to_records(report['outliers'], report['outlier_method']), f, indent=2)
+
+
+def run_gate(data, args, model_fit, profile):
+    """
+    Print the gate verdict for --gate as JSON.
+
+    Exits with REGRESSION_EXIT_CODE if a scenario regressed, and 1 if the
+    runs cannot be gated, so CI can tell a regression from a broken gate.
+    """
+    import pandas as pd
+
+    from gate import GateError, gate
+
+    with timed(profile, 'build_frame', len(data)):
+        df = pd.DataFrame(data)
+    try:
+        verdict = gate(df, args.recent_hours, args.older_hours, args.gate_method, args.gate_alpha,
+                       args.gate_min_effect, model_fit, profile)
+    except GateError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if profile is not None:
+        verdict['profile'] = [
+            {'stage': s['stage'], 'seconds': round(s['seconds'], 6), 'rows': s['rows']} for s in profile.stages
+        ]
+    print(json.dumps(verdict, indent=2))
+    for row in verdict['scenarios']:
+        if row['status'] == 'regressed':
+            print(f"REGRESSION: {row['scenario']} is {row['change_pct']:+.1f}% slower than predicted "
+                  f"(p={row['p_adjusted']:.4f}, {row['candidate_runs']} vs {row['baseline_runs']} runs)",
+                  file=sys.stderr)
+    if not verdict['passed']:
+        sys.exit(REGRESSION_EXIT_CODE)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Analyze scale test durations")
     parser.add_argument('--fetch', action='store_true', help="Fetch from dashboard API")
+    parser.add_argument('--pages', type=str, help="With --fetch: page through results into this directory (resumable)")
+    parser.add_argument('--refresh', action='store_true', help="With --pages: fetch every page again instead of resuming")
+    parser.add_argument('--store', type=str, help="Load from the local run store (with --fetch: append new runs first)")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help="Runs per page for --pages/--store")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Page requests in flight for --pages/--store")
     parser.add_argument('--json', type=str, help="Load from JSON file")
+    parser.add_argument('--summary', action='store_true', help="Only print correlations and the scenario summary (no pandas/sklearn)")
+    parser.add_argument('--stream', action='store_true', help="With --json: stream the file (NDJSON or JSON array) in chunks")
+    parser.add_argument('--chunk-size', type=int, default=50_000, help="Rows per chunk for --stream")
+    parser.add_argument('--model-state', type=str, help="Take the prediction model from a model_state.py state file")
+    parser.add_argument('--outliers', choices=OUTLIER_METHODS, default=OUTLIER_METHODS[0], help="Outlier detector")
+    parser.add_argument('--outliers-json', type=str, help="Write the flagged runs to this JSON file")
+    parser.add_argument('--format', choices=['text', 'json', 'ndjson'], default='text', help="Report output format")
+    parser.add_argument('--profile', action='store_true', help="Record per-stage timings and row counts")
+    parser.add_argument('--by', type=str, help="Also break the analysis down by scenario, scale or both (e.g. scenario,scale)")
+    parser.add_argument('--jobs', type=int, help="Worker processes for --by (default: CPU count)")
+    parser.add_argument('--hypothesis-costs', action='store_true',
+                        help="With --store: break analysis time down by hypothesis category, per scale")
+    parser.add_argument('--gate', action='store_true',
+                        help="Test recent runs against older ones per scenario; print a JSON verdict, "
+                             f"exit {REGRESSION_EXIT_CODE} on a regression")
+    parser.add_argument('--gate-method', choices=GATE_METHODS, default=GATE_METHODS[0], help="Significance test for --gate")
+    parser.add_argument('--gate-alpha', type=float, default=GATE_ALPHA, help="Significance level for --gate (Holm-adjusted)")
+    parser.add_argument('--gate-min-effect', type=float, default=GATE_MIN_EFFECT,
+                        help="Smallest rise in duration relative to the model (0.05 = 5%%) that fails --gate")
+    parser.add_argument('--cache', type=str, help="Reuse reports and time-window aggregates from this directory")
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_CACHE_MB, help="Size bound of --cache (LRU)")
+    parser.add_argument('--recent-hours', type=float, default=RECENT_HOURS, help="Age (hours) up to which runs count as recent")
+    parser.add_argument('--older-hours', type=float, default=OLDER_HOURS, help="Age (hours) beyond which runs count as older")
+    parser.add_argument('--period-bins', type=str, default=",".join(str(b) for b in PERIOD_BINS),
+                        help="Comma-separated age bin edges in hours for the period breakdown")
     args = parser.parse_args()
+    period_bins = [float(b) for b in args.period_bins.split(",")]
+    by = None
+    if args.by:
+        from grouped import parse_by
+
+        try:
+            by = parse_by(args.by)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.stream or args.summary:
+            parser.error("--by cannot be combined with --stream or --summary")
+    if args.hypothesis_costs:
+        if not args.store:
+            parser.error("--hypothesis-costs requires --store")
+        if args.summary:
+            parser.error("--hypothesis-costs cannot be combined with --summary")
+    if args.gate and (args.stream or args.summary or by or args.hypothesis_costs):
+        parser.error("--gate cannot be combined with --stream, --summary, --by or --hypothesis-costs")
+    
+    model_fit = None
+    if args.model_state:
+        state = load_state(args.model_state)
+        if state is None or state['fit'] is None:
+            print(f"Error: Model state '{args.model_state}' is missing or has too few runs")
+            sys.exit(1)
+        model_fit = state['fit']
+    
+    profile = StageProfile() if args.profile else None
+    # Keep stdout machine-readable for json/ndjson
+    info = sys.stdout if args.format == 'text' and not args.gate else sys.stderr
+    
+    cache = cache_key = None
+    if args.cache and not args.summary and not args.gate:
+        from report_cache import ReportCache, file_fingerprint, report_key, report_params
+
+        cache = ReportCache(args.cache, int(args.cache_max_mb * 2**20))
+        if args.json:
+            # Key on the file itself, so a hit skips loading it
+            with timed(profile, 'cache.lookup') as lookup:
+                params = report_params(args.recent_hours, args.older_hours, period_bins, model_fit, args.outliers,
+                                       by, args.stream)
+                cache_key = report_key(file_fingerprint(args.json), params)
+                report = cache.get(cache_key)
+                lookup['rows'] = report['n_runs'] if report else None
+            if report is not None:
+                emit_report(report, args.format, profile)
+                if args.outliers_json:
+                    write_outliers_json(report, args.outliers_json)
+                return
+    
+    if args.stream:
+        if not args.json:
+            parser.error("--stream requires --json")
+        from streaming import EmptyInputError, stream_report
+        try:
+            report = stream_report(args.json, args.chunk_size, args.recent_hours, args.older_hours,
+                                   period_bins, model_fit, args.outliers, profile)
+        except EmptyInputError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        except ValueError as e:
+            parser.error(str(e))
+        if cache is not None:
+            cache.put(cache_key, report)
+        emit_report(report, args.format, profile)
+        if args.outliers_json:
+            write_outliers_json(report, args.outliers_json)
+        return
     
-    if args.fetch:
-        data = fetch_from_api()
-    elif args.json:
-        data = load_from_json(args.json)
-    else:
-        print("Using sample data (use --fetch or --json for real data)\n")
-        data = SAMPLE_DATA
+    with timed(profile, 'load') as load:
+        if args.summary and args.store:
+            data = load_from_store(args.store, args.fetch, args.page_size, args.workers).to_dict('records')
+        elif args.store:
+            # With --cache the ages are derived once the report key is known (see analyze())
+            data = load_from_store(args.store, args.fetch, args.page_size, args.workers, ages=cache is None)
+        elif args.fetch and args.pages:
+            data = fetch_paginated(args.pages, args.page_size, args.workers, args.refresh)
+        elif args.fetch:
+            data = fetch_from_api()
+        elif args.json:
+            data = load_from_json(args.json)
+        else:
+            print("Using sample data (use --fetch or --json for real data)\n", file=info)
+            data = SAMPLE_DATA
+        load['rows'] = len(data)
+    if len(data) == 0:
+        print("Error: No runs to analyze", file=sys.stderr)
+        sys.exit(1)
     
-    analyze(data)
+    if args.summary:
+        print_summary(summary_report(data))
+        return
+    
+    if args.gate:
+        run_gate(data, args, model_fit, profile)
+        return
+
+    hypotheses = None
+    if args.hypothesis_costs:
+        hypotheses = load_hypotheses(args.store)
+        if hypotheses is None:
+            print(f"Error: '{args.store}' has no hypotheses table (backfill it with ingest_results.py)",
+                  file=sys.stderr)
+            sys.exit(1)
+
+    if by:
+        from grouped import missing_columns
+
+        missing = missing_columns(data, by)
+        if missing:
+            print(f"Error: Runs have no {', '.join(missing)} to group by", file=sys.stderr)
+            sys.exit(1)
+    
+    analyze(data, args.recent_hours, args.older_hours, period_bins, model_fit, args.outliers, args.outliers_json,
+            args.format, profile, by, args.jobs, cache, cache_key, hypotheses,
+            datetime.now(timezone.utc) if args.store and cache is not None else None)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Stage-by-stage benchmark of analyze() and analyze_time_series().
+
+Generates seeded synthetic runs (see synthetic.py) at each requested size
+and times every stage of the report separately, best of --repeat runs. It
+also records each stage's peak traced memory. Results are written as JSON
+so runs from different commits can be compared with --compare.
+
+Usage:
+    python bench_analysis.py                                  # 10k and 100k runs
+    python bench_analysis.py --sizes 10000,100000,1000000 --out bench.json
+    python bench_analysis.py --out new.json --compare old.json --max-slowdown 1.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import analyze
+from synthetic import generate_runs
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Stages faster than this are too noisy to fail a comparison on
+MIN_COMPARABLE_SECONDS = 0.005
+
+
+def stages(records, outlier_method):
+    """
+    The report's stages in order, as (name, fn) pairs.
+
+    Each fn takes the shared state dict, so later stages can use what
+    earlier ones produced (the DataFrame, the model's predictions).
+    """
+    def build_frame(state):
+        state['df'] = pd.DataFrame(records)
+        state['df']['duration_minutes'] = state['df']['duration_seconds'] / 60
+
+    def model(state):
+        state['model'] = analyze.fit_duration_model(state['df'])
+
+    return [
+        ("build_frame", build_frame),
+        ("correlations", lambda state: analyze.correlation_stats(state['df'])),
+        ("model", model),
+        ("outliers", lambda state: analyze.outlier_stats(state['df'], state['model']['predicted'], outlier_method)),
+        ("scenario_summary", lambda state: analyze.scenario_summary(state['df'])),
+        ("time_series.trend_corr", lambda state: state['df']['duration_seconds'].corr(state['df']['age_hours'])),
+        ("time_series.periods", lambda state: analyze.period_stats(state['df'])),
+        ("time_series.scenario_trends", lambda state: analyze.scenario_trends(state['df'])),
+    ]
+
+
+def bench_size(n, seed, repeat, outlier_method):
+    """Time and trace every stage for n synthetic runs."""
+    records = generate_runs(n, seed).to_dict('records')
+    results = {}
+    state = {}
+
+    for name, fn in stages(records, outlier_method):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(state)
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        fn(state)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[name] = {"seconds": min(timings), "peak_bytes": peak}
+        print(f"  {n:>9,} runs  {name:30s} {min(timings) * 1000:9.1f}ms  peak {peak / 1e6:8.1f} MB")
+
+    return {
+        "runs": n,
+        "stages": results,
+        "total_seconds": sum(r["seconds"] for r in results.values()),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, max_slowdown):
+    """Print per-stage ratios against a baseline; return the regressions."""
+    regressions = []
+    old_by_size = {r["runs"]: r for r in baseline["results"]}
+    print(f"\n  Compared with {baseline['meta'].get('commit') or 'baseline'}:")
+    for result in current["results"]:
+        old = old_by_size.get(result["runs"])
+        if old is None:
+            continue
+        for name, stage in result["stages"].items():
+            if name not in old["stages"]:
+                continue
+            before = old["stages"][name]["seconds"]
+            ratio = stage["seconds"] / before if before else float('inf')
+            flag = ""
+            if ratio > max_slowdown and stage["seconds"] >= MIN_COMPARABLE_SECONDS:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} at {result['runs']:,} runs: {ratio:.2f}x slower")
+            print(f"  {result['runs']:>9,} runs  {name:30s} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analysis stages on synthetic runs")
+    parser.add_argument('--sizes', default="10000,100000", help="Comma-separated run counts")
+    parser.add_argument('--seed', type=int, default=0, help="Generator seed")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed repetitions per stage (best is kept)")
+    parser.add_argument('--outliers', choices=analyze.OUTLIER_METHODS, default=analyze.OUTLIER_METHODS[0],
+                        help="Outlier detector to benchmark")
+    parser.add_argument('--out', type=str, help="Write results JSON here")
+    parser.add_argument('--compare', type=str, help="Baseline results JSON to compare against")
+    parser.add_argument('--max-slowdown', type=float, default=1.25,
+                        help="With --compare: fail if a stage is slower than this factor")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "outlier_method": args.outliers,
+        },
+        "results": [bench_size(int(n), args.seed, args.repeat, args.outliers) for n in args.sizes.split(",")],
+    }
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_slowdown)
+        if regressions:
+            for regression in regressions:
+                print(f"FAIL: {regression}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
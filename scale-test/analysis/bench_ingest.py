@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark ingest_results.py against the workflow's jq recipe.
+
+Writes --artifacts synthetic change-analysis-<scenario>-<run id>/
+directories, each holding a change-results.json with risks, hypotheses
+and change metadata (padded to --kb kilobytes with risk descriptions, as
+large results are) and a sidecar with the dashboard payload. It then
+times ingesting all of them into a fresh run store with one worker and
+with --workers, and times the nine `jq` calls the workflow makes per file
+on a sample, extrapolated to every artifact. Finally it checks the store
+against the metrics the generator wrote, and that hypothesis_costs.py
+recovers the seconds per observation the generator's durations were built
+from (SECONDS_PER_OBSERVATION, with each scenario's own mix of hypothesis
+categories in SCENARIO_MIX).
+
+Usage:
+    python bench_ingest.py                          # 2,000 artifacts of 200KB
+    python bench_ingest.py --artifacts 10000 --kb 1000 --workers 16
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+
+from hypothesis_costs import cost_breakdown
+from ingest_results import ingest
+from run_store import load_hypotheses, load_store
+
+JQ_METRICS = [
+    '.risks | length // 0',
+    '[.risks[]? | select(.severity == "high")] | length',
+    '[.risks[]? | select(.severity == "medium")] | length',
+    '.change.metadata.numAffectedItems // 0',
+    '.change.metadata.numAffectedEdges // 0',
+    '.change.metadata.total_observations // 0',
+    '.hypotheses | length // 0',
+    '[.risks[]? | {title: .title, severity: .severity, description: .description}]',
+    '.hypotheses | group_by(.status) | map({status: .[0].status, count: length})',
+]
+# Hypothesis titles of each category (see hypothesis_costs.HYPOTHESIS_CATEGORIES)
+TITLES = {
+    "network_exposure": "Security group ingress opened to 0.0.0.0/0",
+    "connectivity": "VPC peering route table change",
+    "iam_access": "IAM role policy grants new permissions",
+    "encryption": "KMS key scheduled for deletion breaks decrypt",
+    "compute": "Lambda timeout shorter than downstream calls",
+    "messaging": "SNS topic subscription fan-out",
+}
+SECONDS_PER_OBSERVATION = {"network_exposure": 1.5, "connectivity": 1.0, "iam_access": 2.0,
+                           "encryption": 0.5, "compute": 6.0, "messaging": 3.0}
+# Relative weight of each category in a scenario's hypotheses
+SCENARIO_MIX = {
+    "shared_sg_open": {"network_exposure": 6, "connectivity": 3, "iam_access": 1},
+    "lambda_timeout": {"compute": 6, "messaging": 3, "iam_access": 1},
+    "combined_all": {category: 1 for category in TITLES},
+    "kms_orphan_simulation": {"encryption": 6, "iam_access": 3, "compute": 1},
+}
+SCENARIOS = list(SCENARIO_MIX)
+SEVERITIES = ["SEVERITY_HIGH", "SEVERITY_MEDIUM", "SEVERITY_LOW"]
+STATUSES = ["PROVEN", "DISPROVEN", "INVESTIGATING", "FORMING"]
+
+
+def write_artifacts(root, count, kb, seed=0):
+    """Write count artifacts under root; returns {run_id: expected columns}."""
+    rng = random.Random(seed)
+    expected = {}
+    for i in range(count):
+        scenario = SCENARIOS[i % len(SCENARIOS)]
+        run_id = 10_000_000 + i
+        risks = [{"title": f"Risk {j}", "severity": rng.choice(SEVERITIES), "description": ""}
+                 for j in range(rng.randint(0, 12))]
+        mix = SCENARIO_MIX[scenario]
+        categories = rng.choices(list(mix), weights=list(mix.values()), k=rng.randint(1, 30))
+        hypotheses = [{"title": TITLES[category], "status": f"INVESTIGATED_HYPOTHESIS_STATUS_{rng.choice(STATUSES)}",
+                       "numObservations": rng.randint(1, 80)} for category in categories]
+        items, edges = rng.randint(100, 5000), rng.randint(100, 20000)
+        duration = (120 + 0.05 * items + 0.01 * edges + rng.gauss(0, 20)
+                    + sum(SECONDS_PER_OBSERVATION[c] * h["numObservations"] for c, h in zip(categories, hypotheses)))
+        if risks:
+            risks[0]["description"] = "x" * (kb * 1024)
+        results = {
+            "risks": risks,
+            "hypotheses": hypotheses,
+            "change": {"metadata": {"numAffectedItems": items,
+                                    "numAffectedEdges": edges,
+                                    "total_observations": sum(h["numObservations"] for h in hypotheses)}},
+            "status": "CHANGE_STATUS_DONE",
+        }
+        directory = os.path.join(root, f"change-analysis-{scenario}-{run_id}")
+        os.makedirs(directory)
+        with open(os.path.join(directory, "change-results.json"), 'w') as f:
+            json.dump(results, f)
+        with open(os.path.join(directory, "run.json"), 'w') as f:
+            json.dump({"runId": f"{run_id}-{scenario}", "scenario": scenario, "scaleMultiplier": 25,
+                       "overmindDurationMs": int(duration * 1000),
+                       "createdAt": f"2026-0{1 + i % 3}-{1 + i % 28:02d}T12:00:00Z"}, f)
+        expected[f"{run_id}-{scenario}"] = {
+            "blast_radius": results["change"]["metadata"]["numAffectedItems"],
+            "high_risk_count": sum(r["severity"] == "SEVERITY_HIGH" for r in risks),
+            "hypotheses_proven": sum(h["status"].endswith("PROVEN") and not h["status"].endswith("DISPROVEN")
+                                     for h in hypotheses),
+        }
+    return expected
+
+
+def time_ingest(root, store, workers):
+    shutil.rmtree(store, ignore_errors=True)
+    start = time.perf_counter()
+    stats = ingest(root, store, workers=workers)
+    return time.perf_counter() - start, stats
+
+
+def time_jq(root, sample):
+    """Seconds per artifact of the workflow's jq calls, over the first sample artifacts."""
+    paths = sorted(os.path.join(root, d, "change-results.json") for d in os.listdir(root))[:sample]
+    start = time.perf_counter()
+    for path in paths:
+        for expression in JQ_METRICS:
+            subprocess.run(["jq", "-c", expression, path], check=True, stdout=subprocess.DEVNULL)
+    return (time.perf_counter() - start) / len(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk ingestion of change results")
+    parser.add_argument('--artifacts', type=int, default=2000, help="Artifacts to generate")
+    parser.add_argument('--kb', type=int, default=200, help="Approximate size of each results file")
+    parser.add_argument('--workers', type=int, default=8, help="Workers for the parallel run")
+    parser.add_argument('--jq-sample', type=int, default=20, help="Artifacts to time jq on (0 to skip)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "artifacts")
+        store = os.path.join(tmp, "runs")
+        expected = write_artifacts(root, args.artifacts, args.kb)
+        print(f"{args.artifacts:,} artifacts of ~{args.kb}KB")
+
+        serial, _ = time_ingest(root, store, 1)
+        print(f"  ingest, 1 worker:  {serial:7.2f}s ({serial / args.artifacts * 1000:.2f}ms per file)")
+        parallel, stats = time_ingest(root, store, args.workers)
+        print(f"  ingest, {args.workers} workers: {parallel:7.2f}s ({stats['written']:,} runs written)")
+        if args.jq_sample and shutil.which("jq"):
+            per_file = time_jq(root, args.jq_sample)
+            print(f"  jq recipe:         {per_file * args.artifacts:7.2f}s extrapolated "
+                  f"({per_file * 1000:.1f}ms per file over {args.jq_sample})")
+
+        df = load_store(store, columns=["run_id", "scenario", "blast_radius", "edges", "observations",
+                                        "high_risk_count", "hypotheses_proven", "duration_seconds",
+                                        "scale_multiplier"]).set_index("run_id")
+        mismatched = [run_id for run_id, columns in expected.items()
+                      if any(df.at[run_id, name] != value for name, value in columns.items())]
+        again = ingest(root, store, workers=args.workers)
+        problems = []
+        if len(df) != args.artifacts or mismatched:
+            problems.append(f"{len(df)} runs stored, {len(mismatched)} with wrong metrics")
+        if again['written'] or again['duplicates'] != args.artifacts:
+            problems.append(f"Re-ingesting wrote {again['written']} runs")
+        if df['duration_seconds'].isna().any() or (df['scale_multiplier'] != 25).any():
+            problems.append("Sidecar duration or scale missing from the store")
+        costs = cost_breakdown(df.reset_index(), load_hypotheses(store))
+        fit = costs and costs['scales'][0]['costs']
+        if fit is None:
+            problems.append("No hypothesis cost model")
+        else:
+            recovered = {row['category']: row['seconds_per_observation'] for row in fit['categories']}
+            off = {category: recovered.get(category, 0) for category, seconds in SECONDS_PER_OBSERVATION.items()
+                   if abs(recovered.get(category, 0) - seconds) > 0.1 * seconds}
+            print(f"  hypothesis costs: R² {fit['r2']:.2f} (vs {fit['r2_base']:.2f}), "
+                  + ", ".join(f"{c} {s:.2f}s/obs" for c, s in recovered.items()))
+            if off:
+                problems.append(f"Recovered seconds per observation off by over 10%: {off}")
+        for problem in problems:
+            print(f"Error: {problem}")
+        if problems:
+            raise SystemExit(1)
+        print("  store matches the generated metrics; re-ingesting adds nothing")
+
+
+if __name__ == "__main__":
+    main()
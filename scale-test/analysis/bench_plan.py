@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark plan_reader.PlanIndex against json.load on scaled-up plans.
+
+The checked-in plan.json has 154 resource changes. A scale_multiplier=50
+plan has about 8,700. This script replicates the resources of every
+per-resource section (resource_changes, resource_drift, planned_values,
+prior_state) until the plan reaches each requested size. Configuration
+stays as it is, because count/for_each do not grow it. For each size it
+compares full json.load, building the index, and two queries, taking the
+best of --repeat runs and the peak traced memory.
+
+Usage:
+    python bench_plan.py                                # 154 (as checked in), 1,000 and 8,700 resources
+    python bench_plan.py --sizes 8700,20000 --out bench-plan.json
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from plan_reader import PlanIndex
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PLAN = os.path.join(HERE, "..", "..", "plan.json")
+
+# resource_changes at scale_multiplier=50
+SCALE_50_RESOURCES = 8700
+
+
+def _replicate_module(module, copies):
+    """A planned_values/prior_state root_module with its resources repeated as child modules."""
+    replicas = [
+        {**module, "address": f"module.replica_{i}"} for i in range(1, copies)
+    ]
+    return {**module, "child_modules": module.get("child_modules", []) + replicas}
+
+
+def replicate_plan(plan, resources):
+    """A copy of plan scaled up to roughly the given number of resource changes."""
+    copies = max(1, round(resources / len(plan["resource_changes"])))
+
+    def renamed(changes):
+        out = list(changes)
+        for i in range(1, copies):
+            prefix = f"module.replica_{i}"
+            out += [
+                {**c, "address": f"{prefix}.{c['address']}",
+                 "module_address": f"{prefix}.{c['module_address']}" if c.get("module_address") else prefix}
+                for c in changes
+            ]
+        return out
+
+    scaled = dict(plan)
+    scaled["resource_changes"] = renamed(plan["resource_changes"])
+    scaled["resource_drift"] = renamed(plan.get("resource_drift", []))
+    scaled["planned_values"] = {
+        **plan["planned_values"],
+        "root_module": _replicate_module(plan["planned_values"]["root_module"], copies),
+    }
+    prior_values = plan["prior_state"]["values"]
+    scaled["prior_state"] = {
+        **plan["prior_state"],
+        "values": {**prior_values, "root_module": _replicate_module(prior_values["root_module"], copies)},
+    }
+    return scaled
+
+
+def best_of(fn, repeat):
+    """(best seconds, peak traced bytes, last result) of calling fn."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak, result
+
+
+def bench_file(path, repeat):
+    def full_load():
+        with open(path) as f:
+            return json.load(f)
+
+    size_mb = os.path.getsize(path) / 1e6
+    load_s, load_peak, plan = best_of(full_load, repeat)
+    n = len(plan["resource_changes"])
+    del plan
+    index_s, index_peak, index = best_of(lambda: PlanIndex.build(path), repeat)
+    sg_s, _, sg = best_of(lambda: index.select(type="aws_security_group", changed=True), repeat)
+    del_s, _, deletes = best_of(lambda: index.select(action="delete"), repeat)
+
+    result = {
+        "resources": n,
+        "file_mb": round(size_mb, 1),
+        "json_load": {"seconds": load_s, "peak_bytes": load_peak},
+        "index_build": {"seconds": index_s, "peak_bytes": index_peak},
+        "query_changed_security_groups": {"seconds": sg_s, "matches": len(sg)},
+        "query_delete_actions": {"seconds": del_s, "matches": len(deletes)},
+    }
+    print(f"  {n:>7,} resources ({size_mb:7.1f} MB)  json.load {load_s * 1000:8.1f}ms peak {load_peak / 1e6:8.1f} MB"
+          f"  |  index {index_s * 1000:8.1f}ms peak {index_peak / 1e6:6.1f} MB"
+          f"  |  queries {(sg_s + del_s) * 1e6:6.0f}µs")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming plan reader")
+    parser.add_argument('--plan', default=DEFAULT_PLAN, help="Plan JSON to scale up")
+    parser.add_argument('--sizes', default=f"1000,{SCALE_50_RESOURCES}",
+                        help="Comma-separated resource counts to replicate the plan to")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed repetitions (best is kept)")
+    parser.add_argument('--out', type=str, help="Write results JSON here")
+    args = parser.parse_args()
+
+    with open(args.plan) as f:
+        plan = json.load(f)
+
+    results = [bench_file(args.plan, args.repeat)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(s) for s in args.sizes.split(",")):
+            path = os.path.join(tmp, f"plan-{size}.json")
+            with open(path, 'w') as f:
+                json.dump(replicate_plan(plan, size), f, separators=(',', ':'))
+            results.append(bench_file(path, args.repeat))
+            os.remove(path)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({"results": results}, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
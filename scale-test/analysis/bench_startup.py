@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for analyze.py.
+
+Runs `analyze.py --help` and `analyze.py --summary` in fresh interpreters,
+takes the median wall-clock time of several runs, and exits non-zero if
+either exceeds its budget or if the summary path imported one of
+HEAVY_MODULES.
+
+Usage:
+    python bench_startup.py                       # Default budgets
+    python bench_startup.py --runs 10 --summary-budget 0.4
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ANALYZE = os.path.join(HERE, "analyze.py")
+
+# Modules the fast paths must not import
+HEAVY_MODULES = ["pandas", "sklearn", "pyarrow", "scipy", "requests"]
+
+
+def time_command(args, runs):
+    """Median wall-clock seconds of running analyze.py with args in a fresh interpreter."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, ANALYZE, *args], check=True,
+                       stdout=subprocess.DEVNULL, cwd=HERE)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def heavy_imports():
+    """Heavy modules loaded by importing analyze and building the summary."""
+    code = (
+        "import sys, analyze;"
+        "analyze.summary_report(analyze.SAMPLE_DATA);"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], check=True,
+                            capture_output=True, text=True, cwd=HERE)
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analyze.py cold start")
+    parser.add_argument('--runs', type=int, default=5, help="Runs per command (median is reported)")
+    parser.add_argument('--help-budget', type=float, default=0.5, help="Budget in seconds for --help")
+    parser.add_argument('--summary-budget', type=float, default=0.6, help="Budget in seconds for --summary")
+    args = parser.parse_args()
+
+    failures = []
+
+    loaded = heavy_imports()
+    if loaded:
+        failures.append(f"summary path imported {', '.join(loaded)}")
+
+    for name, cmd, budget in [
+        ("--help", ["--help"], args.help_budget),
+        ("--summary", ["--summary"], args.summary_budget),
+    ]:
+        elapsed = time_command(cmd, args.runs)
+        status = "ok" if elapsed <= budget else "OVER BUDGET"
+        print(f"  analyze.py {name:10s}: {elapsed * 1000:7.1f}ms (budget {budget * 1000:.0f}ms) {status}")
+        if elapsed > budget:
+            failures.append(f"{name} took {elapsed * 1000:.0f}ms, budget {budget * 1000:.0f}ms")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}", file=sys.stderr)
+        sys.exit(1)
+    print("Cold start within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Extract every metric from an Overmind change-results.json in one pass.
+
+docs/extracting-change-results.md builds its reports from a series of
+`jq` calls. Each call re-parses the same file, and at scale 50 the file
+is several megabytes. This script parses it once and derives every
+documented metric from that one parse:
+
+    - risk count, and risks per severity (high/medium/low)
+    - blast radius nodes and edges (numAffectedItems / numAffectedEdges)
+    - total_observations
+    - hypothesis count, and hypotheses per status
+
+Severities and statuses are accepted in either form the CLI emits
+("high" or "SEVERITY_HIGH", "proven" or
+"INVESTIGATED_HYPOTHESIS_STATUS_PROVEN"). From the metrics it writes the
+GitHub step outputs, the job summary, the PR comment, and a run record
+in the format analyze.py reads.
+
+Usage:
+    python change_results.py change-results.json                      # Metrics as JSON
+    python change_results.py change-results.json \\
+        --github-output "$GITHUB_OUTPUT" --step-summary "$GITHUB_STEP_SUMMARY" \\
+        --title "Nightly Scenario: shared_sg_open" --duration-ms "$DURATION_MS" \\
+        --risks-json /tmp/risks.json
+    python change_results.py change-results.json --pr-comment comment.md
+    python change_results.py change-results.json --append-run runs.json \\
+        --scenario shared_sg_open --duration-ms 512000 --run-id "$GITHUB_RUN_ID"
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+SEVERITIES = ["high", "medium", "low"]
+HYPOTHESIS_STATUSES = ["forming", "investigating", "proven", "disproven"]
+
+SEVERITY_PREFIX = "SEVERITY_"
+STATUS_PREFIX = "INVESTIGATED_HYPOTHESIS_STATUS_"
+
+
+def normalize_enum(value, prefix):
+    """'SEVERITY_HIGH' or 'high' -> 'high'; missing values become 'unknown'."""
+    if not value:
+        return "unknown"
+    value = str(value)
+    if value.upper().startswith(prefix):
+        value = value[len(prefix):]
+    return value.lower()
+
+
+def load_change_results(path):
+    """Parse a change-results.json file (the one and only parse)."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def extract_metrics(results):
+    """
+    Every documented metric from parsed change results, in one walk.
+
+    Missing fields count as zero, like jq's `// 0`.
+    """
+    risks = results.get('risks') or []
+    hypotheses = results.get('hypotheses') or []
+    metadata = (results.get('change') or {}).get('metadata') or {}
+
+    by_severity = dict.fromkeys(SEVERITIES, 0)
+    risk_details = []
+    for risk in risks:
+        severity = normalize_enum(risk.get('severity'), SEVERITY_PREFIX)
+        by_severity[severity] = by_severity.get(severity, 0) + 1
+        risk_details.append({
+            'title': risk.get('title'),
+            'severity': severity,
+            'description': risk.get('description'),
+        })
+
+    by_status = dict.fromkeys(HYPOTHESIS_STATUSES, 0)
+    for hypothesis in hypotheses:
+        status = normalize_enum(hypothesis.get('status'), STATUS_PREFIX)
+        by_status[status] = by_status.get(status, 0) + 1
+
+    return {
+        'risk_count': len(risks),
+        'risks_by_severity': by_severity,
+        'blast_radius_nodes': metadata.get('numAffectedItems') or 0,
+        'blast_radius_edges': metadata.get('numAffectedEdges') or 0,
+        'observations': metadata.get('total_observations') or 0,
+        'hypotheses': len(hypotheses),
+        'hypotheses_by_status': by_status,
+        'risks': risk_details,
+    }
+
+
+def hypothesis_rows(results):
+    """One (title, status, num_observations) dict per hypothesis, for the run store's hypotheses table."""
+    return [
+        {
+            'title': hypothesis.get('title'),
+            'status': normalize_enum(hypothesis.get('status'), STATUS_PREFIX),
+            'num_observations': hypothesis.get('numObservations') or 0,
+        }
+        for hypothesis in results.get('hypotheses') or []
+    ]
+
+
+def github_outputs(metrics):
+    """The step outputs the scale test workflow sets, as (name, value) pairs."""
+    return [
+        ('risk_count', metrics['risk_count']),
+        ('high_risk_count', metrics['risks_by_severity']['high']),
+        ('medium_risk_count', metrics['risks_by_severity']['medium']),
+        ('blast_radius_nodes', metrics['blast_radius_nodes']),
+        ('blast_radius_edges', metrics['blast_radius_edges']),
+        ('observations', metrics['observations']),
+        ('hypotheses', metrics['hypotheses']),
+    ]
+
+
+def step_summary_markdown(metrics, title="Change Analysis Results", duration_ms=None):
+    """Job summary markdown: headline metrics followed by the risk list."""
+    severity = metrics['risks_by_severity']
+    lines = [
+        f"## {title}",
+        f"- **Total Risks:** {metrics['risk_count']}",
+        f"- **High/Critical Risks:** {severity['high']}",
+        f"- **Medium Risks:** {severity['medium']}",
+    ]
+    if duration_ms is not None:
+        lines.append(f"- **Analysis Duration:** {duration_ms // 1000}s")
+    lines += [
+        f"- **Blast Radius:** {metrics['blast_radius_nodes']} nodes, {metrics['blast_radius_edges']} edges",
+        f"- **Observations:** {metrics['observations']}",
+        f"- **Hypotheses:** {metrics['hypotheses']}",
+        "",
+        "### Detected Risks",
+    ]
+    if metrics['risks']:
+        lines += [f"- **[{risk['severity']}]** {risk['title']}" for risk in metrics['risks']]
+    else:
+        lines.append("_No risks detected_")
+    return "\n".join(lines) + "\n"
+
+
+def pr_comment_markdown(metrics):
+    """PR comment markdown, as in the docs' github-script example."""
+    high = metrics['risks_by_severity']['high']
+    status = '🔴' if high > 0 else '🟡' if metrics['risk_count'] > 0 else '✅'
+    hypotheses = ", ".join(
+        f"{count} {status_name}" for status_name, count in metrics['hypotheses_by_status'].items() if count
+    )
+    lines = [
+        f"## {status} Overmind Analysis",
+        "",
+        "| Metric | Value |",
+        "|--------|-------|",
+        f"| Blast Radius | {metrics['blast_radius_nodes']} resources |",
+        f"| Relationships | {metrics['blast_radius_edges']} edges |",
+        f"| Observations | {metrics['observations']} |",
+        f"| Total Risks | {metrics['risk_count']} |",
+        f"| High Risks | {high} |",
+        f"| Hypotheses | {metrics['hypotheses']}{f' ({hypotheses})' if hypotheses else ''} |",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def metric_columns(metrics):
+    """The metrics as run store columns (see run_store.SCHEMA_FIELDS)."""
+    severity = metrics['risks_by_severity']
+    status = metrics['hypotheses_by_status']
+    return {
+        "risk_count": metrics['risk_count'],
+        "blast_radius": metrics['blast_radius_nodes'],
+        "edges": metrics['blast_radius_edges'],
+        "observations": metrics['observations'],
+        "high_risk_count": severity['high'],
+        "medium_risk_count": severity['medium'],
+        "low_risk_count": severity['low'],
+        "hypotheses": metrics['hypotheses'],
+        "hypotheses_proven": status['proven'],
+        "hypotheses_disproven": status['disproven'],
+    }
+
+
+def to_run_record(metrics, scenario, duration_ms, run_id=None, created_at=None):
+    """A run record in the flat format analyze.py and fetch.to_record() use."""
+    return {
+        "scenario": scenario,
+        "duration_seconds": duration_ms / 1000,
+        **metric_columns(metrics),
+        "run_id": run_id,
+        "created_at": created_at or datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def append_run(path, record):
+    """
+    Append a run record to a file analyze.py --json can read.
+
+    .ndjson files get one more line; JSON arrays are rewritten atomically.
+    """
+    if path.endswith('.ndjson'):
+        with open(path, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+        return
+
+    runs = []
+    if os.path.exists(path):
+        with open(path) as f:
+            runs = json.load(f)
+    runs.append(record)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(runs, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract metrics from Overmind change results in one pass")
+    parser.add_argument('results', help="change-results.json from `overmind changes get-change --format json`")
+    parser.add_argument('--github-output', type=str, help="Append step outputs (name=value) to this file")
+    parser.add_argument('--step-summary', type=str, help="Append the job summary markdown to this file")
+    parser.add_argument('--title', default="Change Analysis Results", help="Job summary heading")
+    parser.add_argument('--pr-comment', type=str, help="Write PR comment markdown to this file")
+    parser.add_argument('--risks-json', type=str, help="Write the risks array (title, severity, description) here")
+    parser.add_argument('--append-run', type=str, help="Append the run to this analyze.py input (.json or .ndjson)")
+    parser.add_argument('--scenario', type=str, help="With --append-run: scenario name")
+    parser.add_argument('--duration-ms', type=int, help="Analysis duration in milliseconds (measured externally)")
+    parser.add_argument('--run-id', type=str, help="With --append-run: run identifier")
+    args = parser.parse_args()
+
+    if args.append_run and (args.scenario is None or args.duration_ms is None):
+        parser.error("--append-run requires --scenario and --duration-ms")
+
+    try:
+        results = load_change_results(args.results)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Error: Could not read change results from {args.results}: {e}", file=sys.stderr)
+        sys.exit(1)
+    metrics = extract_metrics(results)
+
+    if args.github_output:
+        with open(args.github_output, 'a') as f:
+            for name, value in github_outputs(metrics):
+                f.write(f"{name}={value}\n")
+    if args.step_summary:
+        with open(args.step_summary, 'a') as f:
+            f.write(step_summary_markdown(metrics, args.title, args.duration_ms))
+    if args.pr_comment:
+        with open(args.pr_comment, 'w') as f:
+            f.write(pr_comment_markdown(metrics))
+    if args.risks_json:
+        with open(args.risks_json, 'w') as f:
+            json.dump(metrics['risks'], f, separators=(',', ':'))
+    if args.append_run:
+        append_run(args.append_run, to_run_record(metrics, args.scenario, args.duration_ms, args.run_id))
+
+    if not any([args.github_output, args.step_summary, args.pr_comment, args.risks_json, args.append_run]):
+        print(json.dumps(metrics, indent=2))
+
+
+if __name__ == "__main__":
+    main()
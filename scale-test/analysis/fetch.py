@@ -0,0 +1,296 @@
+"""
+Paginated, concurrent, resumable fetch of run history from the dashboard API.
+
+Pages are requested from `/api/results?page=N&limit=M` over a pooled
+session with several requests in flight. Each page is written to its own
+file in the output directory as soon as it arrives, so an interrupted pull
+can be resumed: pages already on disk are not requested again. When a page
+fails, the pages already in flight are still written before the error is
+raised. --refresh fetches every page again, for a directory whose pages
+are complete but out of date.
+
+Usage:
+    python fetch.py --out runs-pages/              # Fetch all pages
+    python fetch.py --out runs-pages/ --workers 8  # More pages in flight
+    python fetch.py --out runs-pages/ --refresh    # Re-fetch pages already on disk
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_WORKERS = 4
+PAGE_FILE_FORMAT = "page-{:06d}.json"
+
+
+class FetchError(Exception):
+    """Raised when a page cannot be fetched from the dashboard API."""
+
+
+def to_record(run):
+    """Convert one dashboard API result into the flat record analyze.py uses."""
+    return {
+        "scenario": run.get('scenario'),
+        "duration_seconds": (run.get('overmindDurationMs') or 0) / 1000,
+        "risk_count": run.get('riskCount', 0),
+        "blast_radius": run.get('blastRadiusNodes', 0),
+        "edges": run.get('blastRadiusEdges', 0),
+        "observations": run.get('observations', 0),
+        "scale_multiplier": run.get('scaleMultiplier'),
+        "high_risk_count": run.get('highRiskCount'),
+        "medium_risk_count": run.get('mediumRiskCount'),
+        "hypotheses": run.get('hypotheses'),
+        "run_id": run.get('runId'),
+        "created_at": run.get('createdAt') or run.get('timestamp'),
+    }
+
+
+def get_credentials():
+    """Read the dashboard URL and API key from the environment."""
+    url = os.getenv('SCALE_DASHBOARD_URL', '')
+    api_key = os.getenv('SCALE_DASHBOARD_API_KEY', '')
+    if not url or not api_key:
+        raise FetchError("Set SCALE_DASHBOARD_URL and SCALE_DASHBOARD_API_KEY env vars")
+    return url.rstrip('/'), api_key
+
+
+def make_session(api_key, pool_size=DEFAULT_WORKERS, retries=3):
+    """Create a connection-pooled session with retry on transient errors."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Authorization"] = f"Bearer {api_key}"
+    return session
+
+
+def page_path(out_dir, page):
+    return os.path.join(out_dir, PAGE_FILE_FORMAT.format(page))
+
+
+def _write_atomic(path, payload):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+def _read_page(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _first_run_id(runs):
+    return runs[0].get('runId') if runs else None
+
+
+def _page_files(out_dir):
+    return sorted(n for n in os.listdir(out_dir) if n.startswith("page-") and n.endswith(".json"))
+
+
+def _fetch_page(session, url, page, page_size, timeout, params=None):
+    """Fetch one page and return (runs, total_pages or None)."""
+    try:
+        response = session.get(
+            f"{url}/api/results",
+            params={**(params or {}), "page": page, "limit": page_size},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        body = response.json()
+    except Exception as e:
+        raise FetchError(f"page {page}: {e}") from e
+
+    if isinstance(body, list):
+        return body, None
+    return body.get('results', []), body.get('totalPages')
+
+
+def fetch_pages(out_dir, url=None, api_key=None, page_size=DEFAULT_PAGE_SIZE,
+                workers=DEFAULT_WORKERS, timeout=30, session=None, params=None, stop=None, refresh=False):
+    """
+    Fetch every page of results into out_dir, skipping pages already on disk.
+
+    Pages are requested with up to `workers` in flight. Fetching stops after
+    the first page that is shorter than `page_size` (or at `totalPages` when
+    the API reports it), or after the first page for which `stop(runs)` is
+    true. A page that starts with the same run as the page before it ends
+    the fetch too, so an API that ignores `page` cannot loop forever. If a
+    page fails, no more pages are requested, but the ones in flight are
+    waited for and written before the first error is raised, so a rerun
+    resumes after every page that arrived.
+
+    Results come newest first, so runs that arrive between an interrupted
+    fetch and its resume shift every page boundary. A resume therefore
+    fetches page 1 again first, and starts over if its first run changed.
+    A directory that holds a finished fetch is reused as it is.
+
+    Args:
+        out_dir: Directory to write page files into (created if missing)
+        url: Dashboard base URL (defaults to SCALE_DASHBOARD_URL)
+        api_key: Dashboard API key (defaults to SCALE_DASHBOARD_API_KEY)
+        page_size: Number of runs requested per page
+        workers: Maximum number of page requests in flight
+        timeout: Per-request timeout in seconds
+        session: Optional pre-built session (mainly for reuse across calls)
+        params: Extra query parameters sent with every page request
+        stop: Optional predicate on a page's runs that ends the fetch there
+        refresh: Fetch pages again even if they are already on disk
+
+    Returns:
+        Number of pages on disk once the fetch is complete.
+    """
+    if url is None or api_key is None:
+        url, api_key = get_credentials()
+    url = url.rstrip('/')
+    os.makedirs(out_dir, exist_ok=True)
+    if session is None:
+        session = make_session(api_key, pool_size=workers)
+
+    last_page = None  # Last page number, once known
+    next_page = 1
+    error = None  # First failed page; nothing more is requested after it
+
+    def is_last(page, runs, total_pages):
+        if stop is not None and stop(runs):
+            return True
+        if total_pages is not None:
+            return page >= total_pages
+        return len(runs) < page_size
+
+    def saved_fetch_finished():
+        page = 1
+        while os.path.exists(page_path(out_dir, page)):
+            saved = _read_page(page_path(out_dir, page))
+            if is_last(page, saved['results'], saved.get('totalPages')):
+                return True
+            page += 1
+        return False
+
+    first_path = page_path(out_dir, 1)
+    if not refresh and os.path.exists(first_path) and not saved_fetch_finished():
+        runs, total_pages = _fetch_page(session, url, 1, page_size, timeout, params)
+        if _first_run_id(runs) != _first_run_id(_read_page(first_path)['results']):
+            # New runs since the interrupted fetch: the saved pages no longer line up
+            for name in _page_files(out_dir):
+                os.remove(os.path.join(out_dir, name))
+        _write_atomic(first_path, {"page": 1, "totalPages": total_pages, "results": runs})
+
+    first_ids = {}  # page -> its first run ID
+
+    def repeats_previous(page, runs):
+        """Note a page's first run; if it shows a page repeating the one before, return that earlier page."""
+        first_ids[page] = _first_run_id(runs)
+        for later in (page, page + 1):
+            if first_ids.get(later) is not None and first_ids.get(later) == first_ids.get(later - 1):
+                return later - 1
+        return None
+
+    def end_at(page):
+        nonlocal last_page
+        last_page = page if last_page is None else min(last_page, page)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        while True:
+            # Keep the window full, serving pages already on disk first
+            while error is None and len(in_flight) < workers and (last_page is None or next_page <= last_page):
+                page = next_page
+                next_page += 1
+                path = page_path(out_dir, page)
+                if not refresh and os.path.exists(path):
+                    saved = _read_page(path)
+                    if is_last(page, saved['results'], saved.get('totalPages')):
+                        end_at(page)
+                    repeated = repeats_previous(page, saved['results'])
+                    if repeated is not None:
+                        end_at(repeated)
+                    continue
+                in_flight[pool.submit(_fetch_page, session, url, page, page_size, timeout, params)] = page
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                page = in_flight.pop(future)
+                try:
+                    runs, total_pages = future.result()
+                except FetchError as e:
+                    error = error or e
+                    continue
+                _write_atomic(page_path(out_dir, page),
+                              {"page": page, "totalPages": total_pages, "results": runs})
+                if is_last(page, runs, total_pages):
+                    end_at(page)
+                repeated = repeats_previous(page, runs)
+                if repeated is not None:
+                    end_at(repeated)
+
+    if error is not None:
+        raise error
+
+    # Pages past the last one may have been fetched speculatively (or repeat it); drop them
+    for name in _page_files(out_dir):
+        if int(name[5:-5]) > last_page:
+            os.remove(os.path.join(out_dir, name))
+    return last_page
+
+
+def iter_page_runs(out_dir):
+    """
+    Yield raw API runs from the page files in out_dir, in page order.
+
+    A run that shows up on two pages (runs arriving mid-fetch shift the page
+    boundaries) is yielded once.
+    """
+    seen = set()
+    for name in _page_files(out_dir):
+        for run in _read_page(os.path.join(out_dir, name))['results']:
+            run_id = run.get('runId')
+            if run_id is not None:
+                if run_id in seen:
+                    continue
+                seen.add(run_id)
+            yield run
+
+
+def load_pages(out_dir):
+    """Load page files from out_dir as analyze.py records."""
+    return [to_record(run) for run in iter_page_runs(out_dir)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch scale test run history page by page")
+    parser.add_argument('--out', required=True, help="Directory to write page files into")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help="Runs per page")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Page requests in flight")
+    parser.add_argument('--timeout', type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument('--refresh', action='store_true', help="Fetch pages again even if they are on disk")
+    args = parser.parse_args()
+
+    try:
+        pages = fetch_pages(args.out, page_size=args.page_size,
+                            workers=args.workers, timeout=args.timeout, refresh=args.refresh)
+    except FetchError as e:
+        print(f"Error fetching from API: {e}", file=sys.stderr)
+        print(f"Pages fetched so far are kept in {args.out}; rerun to resume", file=sys.stderr)
+        sys.exit(1)
+    print(f"Fetched {pages} pages into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
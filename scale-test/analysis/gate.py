@@ -0,0 +1,188 @@
+"""
+Regression gate: does any scenario's analysis latency regress significantly?
+
+The report's trend label (correlation of duration with age beyond ±0.1)
+and the recent-vs-older table (change_pct) describe drift, but neither
+says whether a change is more than noise, and both mix in the size of
+each run's change. This compares, per scenario, the runs in a candidate
+window (age_hours <= recent_hours) with those in a baseline window
+(age_hours > older_hours), the same windows as the trend table:
+
+1. A linear model of duration on FEATURES is fitted on the baseline runs
+   only (or taken from --model-state), so a regression in the candidate
+   window cannot absorb itself into the model.
+2. Every run's duration is divided by the model's prediction. Ratios are
+   comparable across blast radius, edges and observations.
+3. The candidate and baseline ratios are compared with a one-sided test:
+   - bootstrap (default): BOOTSTRAP_SAMPLES resampled medians of both
+     windows, drawn as one vector each, giving the distribution of the
+     change in median ratio, its confidence interval and a p-value
+   - mann_whitney: the rank-sum test that candidate ratios are larger
+4. p-values are Holm-adjusted across scenarios, since every scenario is
+   another chance to flag noise.
+
+A scenario regresses when its adjusted p-value is below alpha and the
+median ratio rose by at least min_effect. Scenarios with fewer than
+MIN_GATE_RUNS runs in either window are reported but not judged.
+
+analyze.py --gate exits with REGRESSION_EXIT_CODE when a scenario
+regressed. Exit status 1 (runs that cannot be gated, like any other error
+or a traceback) and 2 (bad arguments) mean there is no verdict.
+
+Usage (from analyze.py):
+    python analyze.py --store runs/ --gate                     # JSON verdict, exit 3 on a regression
+    python analyze.py --store runs/ --gate --gate-method mann_whitney --gate-alpha 0.01
+"""
+
+import numpy as np
+
+GATE_METHODS = ['bootstrap', 'mann_whitney']
+GATE_ALPHA = 0.05
+# Smallest rise in the median duration/predicted ratio that fails the gate
+GATE_MIN_EFFECT = 0.05
+# Runs needed in each window before a scenario is judged
+MIN_GATE_RUNS = 5
+BOOTSTRAP_SAMPLES = 10_000
+BOOTSTRAP_SEED = 0
+# Exit status of analyze.py --gate on a regression, distinct from errors (1) and usage errors (2)
+REGRESSION_EXIT_CODE = 3
+
+
+class GateError(ValueError):
+    """The runs cannot be gated (no baseline to fit the model on)."""
+
+
+def bootstrap_medians(values, samples, rng):
+    """
+    Medians of samples bootstrap resamples of values.
+
+    Rather than resampling, each median is drawn from its exact bootstrap
+    distribution: the median of n draws from sorted values is at or below
+    values[j] when at least (n + 1) // 2 draws are, a binomial tail in
+    (j + 1) / n. That is O(n + samples log n) instead of O(samples × n);
+    for even n it is the lower median.
+    """
+    from scipy.stats import binom
+
+    ordered = np.sort(values)
+    n = len(ordered)
+    cdf = binom.sf((n + 1) // 2 - 1, n, np.arange(1, n + 1) / n)
+    return ordered[np.minimum(np.searchsorted(cdf, rng.random(samples)), n - 1)]
+
+
+def bootstrap_change(candidate, baseline, alpha=GATE_ALPHA, samples=BOOTSTRAP_SAMPLES, seed=BOOTSTRAP_SEED):
+    """
+    Bootstrap the relative change in median from baseline to candidate.
+
+    Returns (p-value that the median did not rise, CI low, CI high), the
+    interval two-sided at 1 - alpha.
+    """
+    rng = np.random.default_rng(seed)
+    changes = bootstrap_medians(candidate, samples, rng) / bootstrap_medians(baseline, samples, rng) - 1
+    p_value = (np.count_nonzero(changes <= 0) + 1) / (samples + 1)
+    low, high = np.quantile(changes, [alpha / 2, 1 - alpha / 2])
+    return float(p_value), float(low), float(high)
+
+
+def mann_whitney_p(candidate, baseline):
+    """One-sided Mann-Whitney U p-value that candidate values are larger."""
+    from scipy.stats import mannwhitneyu
+
+    return float(mannwhitneyu(candidate, baseline, alternative='greater').pvalue)
+
+
+def holm(p_values):
+    """Holm-Bonferroni adjusted p-values, in the input order."""
+    p_values = np.asarray(p_values, dtype=float)
+    m = len(p_values)
+    order = np.argsort(p_values, kind='stable')
+    adjusted = np.empty(m)
+    adjusted[order] = np.minimum(np.maximum.accumulate((m - np.arange(m)) * p_values[order]), 1.0)
+    return adjusted
+
+
+def duration_ratios(df, window, model_fit=None):
+    """
+    Each run's duration over the duration predicted for it, and the model.
+
+    The model is fitted on the baseline window's runs unless model_fit is
+    given. Runs predicted to take no time get NaN.
+    """
+    from analyze import FEATURES, fit_duration_model
+
+    if model_fit is None:
+        baseline = df[window == 'older']
+        if len(baseline) < len(FEATURES) + 2:
+            raise GateError(f"{len(baseline)} baseline runs are too few to fit the duration model")
+        model = fit_duration_model(baseline)
+    else:
+        model = fit_duration_model(df, model_fit)
+    predicted = model['intercept'] + df[FEATURES].to_numpy(dtype=float) @ np.asarray(model['coefficients'])
+    ratios = df['duration_seconds'].to_numpy(dtype=float) / np.where(predicted > 0, predicted, np.nan)
+    return ratios, model
+
+
+def gate(df, recent_hours, older_hours, method=GATE_METHODS[0], alpha=GATE_ALPHA, min_effect=GATE_MIN_EFFECT,
+         model_fit=None, profile=None):
+    """
+    Gate verdict for the runs in df (which needs age_hours), as a JSON-ready dict.
+
+    'passed' is False when any scenario regressed; 'regressions' lists them.
+    Raises GateError if there is no baseline to fit the model on.
+    """
+    import pandas as pd
+
+    from analyze import timed, trend_windows
+
+    if 'age_hours' not in df.columns:
+        raise GateError("Runs have no age_hours (or created_at) to split into windows")
+    rows = len(df)
+    window = trend_windows(df['age_hours'], recent_hours, older_hours)
+    with timed(profile, 'gate.model', rows):
+        ratios, model = duration_ratios(df, window, model_fit)
+
+    scenarios = []
+    with timed(profile, 'gate.tests', rows):
+        frame = pd.DataFrame({'scenario': df['scenario'].to_numpy(), 'window': window, 'ratio': ratios})
+        frame = frame[frame['window'].notna() & frame['ratio'].notna()]
+        for scenario, runs in frame.groupby('scenario', sort=True):
+            candidate = runs.loc[runs['window'] == 'recent', 'ratio'].to_numpy()
+            baseline = runs.loc[runs['window'] == 'older', 'ratio'].to_numpy()
+            row = {'scenario': scenario, 'candidate_runs': len(candidate), 'baseline_runs': len(baseline),
+                   'candidate_ratio': None, 'baseline_ratio': None, 'change_pct': None,
+                   'ci_low_pct': None, 'ci_high_pct': None, 'p_value': None, 'p_adjusted': None,
+                   'status': 'insufficient_runs'}
+            scenarios.append(row)
+            if min(len(candidate), len(baseline)) < MIN_GATE_RUNS:
+                continue
+            row['candidate_ratio'] = float(np.median(candidate))
+            row['baseline_ratio'] = float(np.median(baseline))
+            row['change_pct'] = (row['candidate_ratio'] / row['baseline_ratio'] - 1) * 100
+            if method == 'bootstrap':
+                row['p_value'], low, high = bootstrap_change(candidate, baseline, alpha)
+                row['ci_low_pct'], row['ci_high_pct'] = low * 100, high * 100
+            else:
+                row['p_value'] = mann_whitney_p(candidate, baseline)
+
+        judged = [row for row in scenarios if row['p_value'] is not None]
+        for row, adjusted in zip(judged, holm([row['p_value'] for row in judged])):
+            row['p_adjusted'] = float(adjusted)
+            regressed = adjusted < alpha and row['change_pct'] >= min_effect * 100
+            row['status'] = 'regressed' if regressed else 'ok'
+
+    regressions = [row['scenario'] for row in scenarios if row['status'] == 'regressed']
+    return {
+        'passed': not regressions,
+        'regressions': regressions,
+        'method': method,
+        'alpha': alpha,
+        'min_effect_pct': min_effect * 100,
+        'windows': {'candidate_max_age_hours': recent_hours, 'baseline_min_age_hours': older_hours},
+        'model': {
+            'fitted_on': 'baseline' if model_fit is None else 'model_state',
+            'intercept': round(float(model['intercept']), 2),
+            'r2': round(float(model['r2']), 4),
+        },
+        'scenarios': [{key: round(value, 4) if isinstance(value, float) else value for key, value in row.items()}
+                      for row in scenarios],
+    }
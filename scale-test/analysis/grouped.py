@@ -0,0 +1,245 @@
+"""
+Per-scenario / per-scale breakdown of the analysis, fanned out over processes.
+
+analyze.compute_report() fits one model over every run. This module
+splits the runs by scenario, scale_multiplier or both (--by) and gives
+each group its own statistics:
+
+- duration mean, standard deviation, median and p95
+- correlations of duration with each metric
+- a separate linear model of duration on FEATURES, with R² and
+  standardized importance (groups with fewer than MIN_MODEL_RUNS runs
+  get no model)
+- outliers against the group's own model, with the report's detector
+- the trend of duration with age, and the recent vs older change
+
+The base columns are written once, sorted by group, to an Arrow IPC file
+on a RAM-backed directory where one exists. Every worker memory-maps that
+file, so a task is only (group key, first row, row count) and reads its
+slice of the shared buffers without copying or unpickling the dataset.
+With jobs=1 the groups run in-process on the same table.
+
+Usage (from analyze.py):
+    python analyze.py --json runs.ndjson --by scenario,scale --jobs 8
+"""
+
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analyze import FEATURES, METRICS, OLDER_HOURS, RECENT_HOURS, trend_label, trend_windows
+from moments import RunningMoments
+
+# --by names -> run columns
+GROUP_COLUMNS = {'scenario': 'scenario', 'scale': 'scale_multiplier'}
+# Fewer runs than this and a group gets no model (or outliers against it)
+MIN_MODEL_RUNS = 10
+# Fewer runs than this per window and a group gets no recent vs older change
+MIN_TREND_RUNS = 3
+# Preferred location of the shared file: tmpfs keeps it in memory
+SHARED_DIR = "/dev/shm"
+
+_BASE_COLUMNS = ['duration_seconds'] + METRICS + ['age_hours']
+
+# Set in each worker by _attach()
+_table = None
+_options = None
+
+
+def parse_by(value):
+    """'scenario,scale' -> ['scenario', 'scale_multiplier']; raises ValueError for unknown names."""
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in GROUP_COLUMNS]
+    if not names or unknown:
+        raise ValueError(f"--by takes a comma-separated list of {', '.join(GROUP_COLUMNS)}"
+                         + (f" (got {', '.join(unknown)})" if unknown else ""))
+    return [GROUP_COLUMNS[name] for name in dict.fromkeys(names)]
+
+
+def missing_columns(data, keys):
+    """Group columns that no run has, for a DataFrame or a list of run dicts."""
+    if hasattr(data, 'columns'):
+        return [key for key in keys if key not in data.columns]
+    return [key for key in keys if not any(record.get(key) is not None for record in data)]
+
+
+def _shared_table(df, keys):
+    """
+    The analysis columns of df as an Arrow table sorted by keys.
+
+    Returns (table, groups) where groups lists (key values, first row,
+    row count) for each group in table order.
+    """
+    import pyarrow as pa
+
+    columns = [c for c in _BASE_COLUMNS if c in df.columns]
+    frame = df[keys + [c for c in columns + ['scenario'] if c not in keys]]
+    frame = frame.sort_values(keys, kind='stable', na_position='last').reset_index(drop=True)
+
+    groups = []
+    for key, index in frame.groupby(keys, sort=False, dropna=False).indices.items():
+        key = key if isinstance(key, tuple) else (key,)
+        key = tuple(None if _missing(k) else getattr(k, 'item', lambda: k)() for k in key)
+        groups.append((key, int(index[0]), len(index)))
+    groups.sort(key=lambda group: group[1])
+    return pa.Table.from_pandas(frame, preserve_index=False), groups
+
+
+def _missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _attach(path, options):
+    """Worker initializer: memory-map the shared table."""
+    import pyarrow as pa
+
+    global _table, _options
+    with pa.memory_map(path) as source:
+        _table = pa.ipc.open_file(source).read_all()
+    _options = options
+
+
+def _run_group(task):
+    key, start, length = task
+    return group_stats(_table.slice(start, length).to_pandas(), key, **_options)
+
+
+def _float(value):
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def group_stats(df, key, outlier_method='scenario_mad', recent_hours=RECENT_HOURS, older_hours=OLDER_HOURS):
+    """Statistics for the runs of one group (see the module docstring); plain Python types only."""
+    from outliers import score_runs
+
+    minutes = df['duration_seconds'].to_numpy(dtype=float) / 60
+    n = len(df)
+    stats = {
+        'key': list(key),
+        'n_runs': n,
+        'avg_min': _float(minutes.mean()),
+        'std_min': _float(minutes.std(ddof=1)) if n > 1 else None,
+        'p50_min': _float(np.percentile(minutes, 50)),
+        'p95_min': _float(np.percentile(minutes, 95)),
+        'correlations': {},
+        'model': None,
+        'outliers': None,
+        'time_series': None,
+    }
+
+    moments = RunningMoments(['duration_seconds'] + METRICS)
+    moments.update(df[moments.columns].to_numpy(dtype=float))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        stats['correlations'] = {m: _float(moments.corr('duration_seconds', m)) for m in METRICS}
+
+        if n >= MIN_MODEL_RUNS:
+            try:
+                intercept, coef, r2, standardized = moments.linear_fit(FEATURES, 'duration_seconds')
+            except np.linalg.LinAlgError:
+                intercept = None
+            if intercept is not None and np.isfinite(r2):
+                stats['model'] = {
+                    'intercept': float(intercept),
+                    'coefficients': dict(zip(FEATURES, map(float, coef))),
+                    'r2': float(r2),
+                    'importance': dict(zip(FEATURES, map(float, np.abs(standardized)))),
+                }
+                df = df.assign(predicted=intercept + df[FEATURES].to_numpy(dtype=float) @ coef)
+                scores = score_runs(df, outlier_method)
+                outlier = scores['is_outlier'].fillna(False).astype(bool)
+                stats['outliers'] = {
+                    'slower': int((outlier & (scores['score'] > 0)).sum()),
+                    'faster': int((outlier & (scores['score'] < 0)).sum()),
+                }
+
+    if 'age_hours' in df.columns and df['age_hours'].notna().any():
+        age = df['age_hours'].to_numpy(dtype=float)
+        window = trend_windows(age, recent_hours, older_hours)
+        recent, older = minutes[window == 'recent'], minutes[window == 'older']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            time_corr = _float(np.corrcoef(df['duration_seconds'], age)[0, 1]) if n > 1 else None
+        change_pct = None
+        if len(recent) >= MIN_TREND_RUNS and len(older) >= MIN_TREND_RUNS and older.mean() > 0:
+            change_pct = float((recent.mean() - older.mean()) / older.mean() * 100)
+        stats['time_series'] = {
+            'time_corr': time_corr,
+            'trend': trend_label(time_corr)[0] if time_corr is not None else None,
+            'recent_avg': _float(recent.mean()) if len(recent) else None,
+            'older_avg': _float(older.mean()) if len(older) else None,
+            'change_pct': change_pct,
+        }
+    return stats
+
+
+def group_reports(df, keys, jobs=None, outlier_method='scenario_mad',
+                  recent_hours=RECENT_HOURS, older_hours=OLDER_HOURS):
+    """
+    group_stats() for every group of df by keys, in key order.
+
+    jobs is the number of worker processes (default: CPU count); with one
+    job, or a single group, everything runs in this process.
+    """
+    import pyarrow as pa
+
+    table, groups = _shared_table(df, keys)
+    options = {'outlier_method': outlier_method, 'recent_hours': recent_hours, 'older_hours': older_hours}
+    jobs = min(jobs or os.cpu_count() or 1, len(groups))
+    results = {'keys': keys, 'groups': []}
+
+    if jobs <= 1:
+        results['groups'] = [group_stats(table.slice(start, length).to_pandas(), key, **options)
+                             for key, start, length in groups]
+        return results
+
+    directory = SHARED_DIR if os.path.isdir(SHARED_DIR) and os.access(SHARED_DIR, os.W_OK) else None
+    with tempfile.TemporaryDirectory(dir=directory, prefix="analysis-groups-") as tmp:
+        path = os.path.join(tmp, "runs.arrow")
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        del table
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_attach, initargs=(path, options)) as pool:
+            chunksize = max(1, len(groups) // (jobs * 4))
+            results['groups'] = list(pool.map(_run_group, groups, chunksize=chunksize))
+    return results
+
+
+def _label(value):
+    if value is None:
+        return "n/a"
+    if isinstance(value, float) and value.is_integer():
+        return f"{value:.0f}"
+    return str(value)
+
+
+def print_groups(grouped):
+    """Print the breakdown computed by group_reports()."""
+    keys = grouped['keys']
+    names = [name for name, column in GROUP_COLUMNS.items() if column in keys]
+    print("-" * 40)
+    print(f"BREAKDOWN BY {', '.join(names).upper()}")
+    print("-" * 40)
+
+    widths = [25 if key == 'scenario' else 6 for key in keys]
+    header = " ".join(f"{name.capitalize():{width}s}" for name, width in zip(names, widths))
+    print(f"\n  {header} {'Runs':>6s} {'Avg':>7s} {'p95':>7s} {'R²':>6s} {'Top feature':>14s} "
+          f"{'Outliers':>9s} {'Trend':>10s}")
+    print("  " + "-" * (len(header) + 66))
+    for group in grouped['groups']:
+        key = " ".join(f"{_label(value):{width}s}" for value, width in zip(group['key'], widths))
+        model = group['model']
+        r2 = f"{model['r2']:.2f}" if model else "-"
+        top = max(model['importance'], key=model['importance'].get) if model else "-"
+        outliers = group['outliers']
+        flagged = f"{outliers['slower']}↑ {outliers['faster']}↓" if outliers else "-"
+        ts = group['time_series']
+        if ts and ts['change_pct'] is not None:
+            trend = f"{ts['change_pct']:+.0f}%"
+        else:
+            trend = ts['trend'] if ts and ts['trend'] else "-"
+        print(f"  {key} {group['n_runs']:>6,} {group['avg_min']:>6.1f}m {group['p95_min']:>6.1f}m {r2:>6s} "
+              f"{top:>14s} {flagged:>9s} {trend:>10s}")
+    print()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Where Overmind analysis time goes, by hypothesis category.
+
+blast_radius, edges and total observations explain only part of the
+duration variance. Every hypothesis in a change result records how many
+observations it gathered, and the run store's hypotheses table (filled by
+ingest_results.py) keeps them. This module sorts the hypotheses into
+categories by title (HYPOTHESIS_CATEGORIES, first match wins), sums each
+run's observations per category, and fits for every scale
+
+    duration_seconds = fixed + a × blast_radius + b × edges + Σ cost_c × observations_c
+
+with non-negative costs, so each term is time the run spent rather than
+a correction. A category's cost per run (cost_c × its mean observations)
+ranks which investigation types dominate wall-clock time at that scale.
+The same terms are averaged over the slowest scenarios' runs to show
+where their time goes. R² of the report's model (blast radius, edges and
+total observations) on the same runs is shown for comparison.
+
+Only runs with rows in the hypotheses table are used; runs fetched from
+the dashboard API carry totals, not per-hypothesis counts.
+
+Usage:
+    python hypothesis_costs.py --store runs/
+    python analyze.py --store runs/ --hypothesis-costs
+"""
+
+import argparse
+import math
+import sys
+
+# (category, title pattern); hypotheses matching none are 'other'
+HYPOTHESIS_CATEGORIES = [
+    ('network_exposure', r'security group|ingress|egress|cidr|0\.0\.0\.0|open port|firewall|public'),
+    ('connectivity', r'\bvpc\b|peering|route|subnet|\bnat\b|\bdns\b|endpoint|transit'),
+    ('iam_access', r'\biam\b|\brole|polic|permission|principal|assume'),
+    ('encryption', r'\bkms\b|\bkey\b|encrypt|decrypt|certificate'),
+    ('compute', r'lambda|timeout|function|concurrency|\bec2\b|instance|container|\becs\b'),
+    ('messaging', r'\bsns\b|\bsqs\b|topic|queue|subscription|event'),
+    ('data_loss', r'delet|destroy|replace|orphan|retention|backup|snapshot'),
+]
+OTHER_CATEGORY = 'other'
+SIZE_FEATURES = ['blast_radius', 'edges']
+# Fewer timed runs with hypotheses than this and a scale gets no cost model
+MIN_COST_RUNS = 20
+SLOWEST_SCENARIOS = 3
+TOP_CATEGORIES = 3
+
+
+def categorize(titles):
+    """Category of each hypothesis title (a Series), matched case-insensitively."""
+    import pandas as pd
+
+    unique = pd.Series(titles.dropna().unique(), dtype=object)
+    category = pd.Series(OTHER_CATEGORY, index=unique.index, dtype=object)
+    unmatched = pd.Series(True, index=unique.index)
+    for name, pattern in HYPOTHESIS_CATEGORIES:
+        hit = unmatched & unique.str.contains(pattern, case=False, regex=True)
+        category[hit] = name
+        unmatched &= ~hit
+    return titles.map(dict(zip(unique, category))).fillna(OTHER_CATEGORY)
+
+
+def category_observations(runs, hypotheses):
+    """
+    Runs that have hypothesis rows, joined with their observations per category.
+
+    Returns (runs, categories): runs with one column per category
+    present, in HYPOTHESIS_CATEGORIES order.
+    """
+    by_run = (hypotheses.assign(category=categorize(hypotheses['title']))
+                        .pivot_table(index='run_id', columns='category', values='num_observations',
+                                     aggfunc='sum', fill_value=0))
+    order = [name for name, _ in HYPOTHESIS_CATEGORIES] + [OTHER_CATEGORY]
+    categories = [name for name in order if name in by_run.columns]
+    joined = runs.join(by_run[categories].astype(float), on='run_id', how='inner')
+    return joined.reset_index(drop=True), categories
+
+
+def _fit(X, y, positive):
+    from sklearn.linear_model import LinearRegression
+
+    model = LinearRegression(positive=positive)
+    model.fit(X, y)
+    return model, model.score(X, y)
+
+
+def scale_costs(df, categories):
+    """The cost model of one scale's runs; None if there are too few runs to fit it."""
+    import pandas as pd
+
+    from analyze import FEATURES
+
+    present = [c for c in categories if df[c].any()]
+    features = SIZE_FEATURES + present
+    if len(df) < max(MIN_COST_RUNS, len(features) + 2):
+        return None
+    y = df['duration_seconds'].to_numpy(dtype=float)
+    model, r2 = _fit(df[features].to_numpy(dtype=float), y, positive=True)
+    _, r2_base = _fit(df[FEATURES].to_numpy(dtype=float), y, positive=False)
+
+    coef = dict(zip(features, model.coef_))
+    # Seconds each term contributes to each run
+    terms = df[features].mul(pd.Series(coef), axis=1)
+    mean_seconds = float(y.mean())
+    ranked = sorted(present, key=lambda c: terms[c].mean(), reverse=True)
+
+    scenarios = []
+    minutes = df.groupby('scenario')['duration_seconds'].mean().sort_values(ascending=False) / 60
+    for scenario in minutes.index[:SLOWEST_SCENARIOS]:
+        mine = df['scenario'] == scenario
+        seconds = minutes[scenario] * 60
+        shares = (terms.loc[mine, present].mean() / seconds * 100).sort_values(ascending=False)
+        scenarios.append({
+            'scenario': scenario,
+            'n_runs': int(mine.sum()),
+            'avg_min': float(minutes[scenario]),
+            'categories': [{'category': c, 'share_pct': float(shares[c])}
+                           for c in shares.index[:TOP_CATEGORIES] if shares[c] > 0],
+        })
+
+    return {
+        'r2': float(r2),
+        'r2_base': float(r2_base),
+        'avg_seconds': mean_seconds,
+        'fixed_seconds': float(model.intercept_),
+        'size_seconds': float(terms[SIZE_FEATURES].sum(axis=1).mean()),
+        'categories': [
+            {
+                'category': c,
+                'seconds_per_observation': float(coef[c]),
+                'observations_per_run': float(df[c].mean()),
+                'seconds_per_run': float(terms[c].mean()),
+                'share_pct': float(terms[c].mean() / mean_seconds * 100),
+            }
+            for c in ranked
+        ],
+        'slowest_scenarios': scenarios,
+    }
+
+
+def cost_breakdown(runs, hypotheses, by='scale_multiplier'):
+    """
+    scale_costs() for each value of `by` (default: scale), from the runs
+    and the store's hypotheses table. Returns None when no timed run has
+    hypotheses.
+    """
+    runs = runs[runs['duration_seconds'].notna()]
+    if 'run_id' not in runs.columns or hypotheses is None or hypotheses.empty:
+        return None
+    df, categories = category_observations(runs, hypotheses)
+    if df.empty:
+        return None
+
+    scales = []
+    for scale, group in df.groupby(by, dropna=False, sort=True):
+        scale = None if isinstance(scale, float) and math.isnan(scale) else getattr(scale, 'item', lambda: scale)()
+        scales.append({'scale': scale, 'n_runs': len(group), 'costs': scale_costs(group, categories)})
+    return {'by': by, 'n_runs': len(df), 'categories': categories, 'scales': scales}
+
+
+def print_cost_breakdown(costs):
+    """Print the output of cost_breakdown()."""
+    print("-" * 40)
+    print("ANALYSIS TIME BY HYPOTHESIS CATEGORY")
+    print("-" * 40)
+    if costs is None:
+        print("  No timed runs with per-hypothesis observations (backfill with ingest_results.py)\n")
+        return
+
+    for scale in costs['scales']:
+        label = "n/a" if scale['scale'] is None else f"{scale['scale']}x"
+        fit = scale['costs']
+        if fit is None:
+            print(f"\n  Scale {label}: {scale['n_runs']} runs, too few for a cost model (need {MIN_COST_RUNS})")
+            continue
+        print(f"\n  Scale {label}: {scale['n_runs']} runs, {fit['avg_seconds'] / 60:.1f}m average, "
+              f"R² {fit['r2']:.2f} (vs {fit['r2_base']:.2f} from blast radius, edges and observations)")
+        print(f"    Fixed {fit['fixed_seconds']:.0f}s, blast radius and edges {fit['size_seconds']:.0f}s per run")
+        print(f"\n    {'Category':20s} {'s/obs':>8s} {'obs/run':>9s} {'s/run':>8s} {'Share':>7s}")
+        print("    " + "-" * 56)
+        for row in fit['categories']:
+            bar = "█" * int(max(row['share_pct'], 0) / 5)
+            print(f"    {row['category']:20s} {row['seconds_per_observation']:8.2f} "
+                  f"{row['observations_per_run']:9.1f} {row['seconds_per_run']:8.0f} "
+                  f"{row['share_pct']:6.1f}% {bar}")
+        if fit['slowest_scenarios']:
+            print("\n    Slowest scenarios:")
+            for scenario in fit['slowest_scenarios']:
+                split = ", ".join(f"{c['category']} {c['share_pct']:.0f}%" for c in scenario['categories'])
+                print(f"      {scenario['scenario']:25s} {scenario['avg_min']:5.1f}m  {split or '-'}")
+    print()
+
+
+def main():
+    from run_store import ANALYSIS_COLUMNS, load_hypotheses, load_store
+
+    parser = argparse.ArgumentParser(description="Break analysis time down by hypothesis category")
+    parser.add_argument('--store', required=True, help="Run store directory (backfilled with ingest_results.py)")
+    args = parser.parse_args()
+
+    hypotheses = load_hypotheses(args.store)
+    if hypotheses is None:
+        print(f"Error: '{args.store}' has no hypotheses table (run ingest_results.py first)", file=sys.stderr)
+        sys.exit(1)
+    print_cost_breakdown(cost_breakdown(load_store(args.store, columns=ANALYSIS_COLUMNS), hypotheses))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Bulk-load change-results.json artifacts into the run store.
+
+Backfilling history one artifact at a time with the workflow's `jq`
+recipe parses every file once per metric. This scans a directory tree for
+result artifacts and parses each file exactly once on a thread pool,
+extracting what change_results.extract_metrics() does: blast radius nodes
+and edges, total_observations, risks per severity and hypotheses per
+status. Rows are written in batches to the run store's day partitions,
+where `analyze.py --store` and `model_state.py update --store` read them;
+both leave out runs without a measured duration. Every
+hypothesis (title, status, numObservations) also gets a row in the
+store's hypotheses table, which `analyze.py --hypothesis-costs` reads.
+
+The results file does not record the scenario or how long the analysis
+took. For each artifact these come, in order, from:
+
+- a sidecar next to it (SIDECAR_NAMES) holding the dashboard payload the
+  workflow posts (runId, scenario, scaleMultiplier, overmindDurationMs,
+  createdAt)
+- the artifact directory's name, `change-analysis-<scenario>-<run id>`,
+  whose numeric workflow run ID is the runId the dashboard stores, so a
+  later fetch of the same run is recognised as already stored
+- the file's modification time (created_at) and its directory relative
+  to the scan root (run_id)
+
+A modification time is only an estimate (downloading an artifact resets
+it), so such rows are flagged `created_at_estimated`: they are filed under
+that day, but the store reads their created_at back as null, which keeps
+them out of the time windows and the duration model.
+
+Runs without a measured duration are stored but left out of the analysis
+and the duration model. Runs whose ID is already in the store are skipped,
+so ingesting the same tree twice adds nothing, and the store's high-water
+mark is not moved. The same goes for the hypotheses table, so re-ingesting
+artifacts backfilled before it existed fills in just their hypotheses.
+
+Usage:
+    python ingest_results.py artifacts/ --store runs/
+    python ingest_results.py artifacts/ --store runs/ --workers 16 --scale-multiplier 25
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+from change_results import extract_metrics, hypothesis_rows, metric_columns
+from fetch import to_record
+from run_store import HYPOTHESES_DIR, HYPOTHESIS_FIELDS, stored_run_ids, write_rows
+
+DEFAULT_PATTERN = "change-results*.json"
+DEFAULT_WORKERS = 8
+DEFAULT_BATCH_SIZE = 50_000
+SIDECAR_NAMES = ("run.json", "payload.json")
+ARTIFACT_DIR = re.compile(r"change-analysis-(?P<scenario>.+)-(?P<run_id>[0-9]+)")
+
+
+def find_artifacts(root, pattern=DEFAULT_PATTERN):
+    """Paths of every file under root whose name matches pattern, in sorted order."""
+    paths = []
+    for directory, subdirs, files in os.walk(root):
+        subdirs.sort()
+        paths.extend(os.path.join(directory, name) for name in sorted(files) if fnmatch.fnmatch(name, pattern))
+    return paths
+
+
+def _sidecar(directory):
+    for name in SIDECAR_NAMES:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+    return None
+
+
+def run_metadata(path, root, scale_multiplier=None):
+    """Scenario, duration, scale, run ID and created_at of the artifact at path (see the module docstring)."""
+    directory = os.path.dirname(path)
+    record = {
+        "scenario": None,
+        "duration_seconds": None,
+        "scale_multiplier": scale_multiplier,
+        "run_id": os.path.relpath(directory, root).replace(os.sep, "/"),
+        "created_at": datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc).isoformat(),
+        "created_at_estimated": True,
+    }
+    match = ARTIFACT_DIR.fullmatch(os.path.basename(directory))
+    if match:
+        record["scenario"] = match["scenario"]
+        record["run_id"] = match["run_id"]
+
+    run = _sidecar(directory)
+    if run:
+        from_run = to_record(run)
+        # to_record() reads a missing duration as 0
+        if not run.get('overmindDurationMs'):
+            from_run["duration_seconds"] = None
+        record.update((key, value) for key, value in from_run.items()
+                      if key in record and value is not None)
+        if from_run["created_at"] is not None:
+            record["created_at_estimated"] = False
+    return record
+
+
+def parse_artifact(path, root, scale_multiplier=None):
+    """
+    (run record, hypothesis rows) for one artifact, from a single parse.
+
+    The run record is its metrics plus run_metadata().
+    """
+    with open(path, 'rb') as f:
+        results = json.loads(f.read())
+    record = {**run_metadata(path, root, scale_multiplier), **metric_columns(extract_metrics(results))}
+    hypotheses = [{'run_id': record['run_id'], 'created_at': record['created_at'], **row}
+                  for row in hypothesis_rows(results)]
+    return record, hypotheses
+
+
+def parse_all(paths, root, workers=DEFAULT_WORKERS, scale_multiplier=None):
+    """
+    Yield (path, parse_artifact() result, error) for every path, parsed on a thread pool.
+
+    At most workers * 4 files are in flight, so memory stays flat however
+    many artifacts there are. Results come in completion order.
+    """
+    pending = iter(paths)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+
+        def submit():
+            for path in pending:
+                in_flight[pool.submit(parse_artifact, path, root, scale_multiplier)] = path
+                if len(in_flight) >= workers * 4:
+                    return
+
+        submit()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = in_flight.pop(future)
+                try:
+                    yield path, future.result(), None
+                except (OSError, ValueError, AttributeError, TypeError) as e:
+                    yield path, None, e
+            submit()
+
+
+def ingest(root, store_dir, pattern=DEFAULT_PATTERN, workers=DEFAULT_WORKERS,
+           batch_size=DEFAULT_BATCH_SIZE, scale_multiplier=None):
+    """
+    Ingest every artifact under root into store_dir.
+
+    Returns counts: files found, runs written, already stored, without a
+    duration, hypothesis rows written, and a list of (path, error) for
+    files that could not be read.
+    """
+    paths = find_artifacts(root, pattern)
+    hypotheses_dir = os.path.join(store_dir, HYPOTHESES_DIR)
+    os.makedirs(store_dir, exist_ok=True)
+    seen = stored_run_ids(store_dir)
+    seen_hypotheses = stored_run_ids(store_dir, hypotheses=True)
+    stats = {'files': len(paths), 'written': 0, 'duplicates': 0, 'untimed': 0, 'hypotheses': 0, 'errors': []}
+
+    batch, hypothesis_batch = [], []
+
+    def flush():
+        write_rows(store_dir, batch)
+        write_rows(hypotheses_dir, hypothesis_batch, HYPOTHESIS_FIELDS)
+        stats['written'] += len(batch)
+        stats['hypotheses'] += len(hypothesis_batch)
+        batch.clear()
+        hypothesis_batch.clear()
+
+    for path, parsed, error in parse_all(paths, root, workers, scale_multiplier):
+        if error is not None:
+            stats['errors'].append((path, error))
+            continue
+        record, hypotheses = parsed
+        if record['run_id'] not in seen_hypotheses:
+            seen_hypotheses.add(record['run_id'])
+            hypothesis_batch.extend(hypotheses)
+        if record['run_id'] in seen:
+            stats['duplicates'] += 1
+        else:
+            seen.add(record['run_id'])
+            stats['untimed'] += record['duration_seconds'] is None
+            batch.append(record)
+        if len(batch) >= batch_size or len(hypothesis_batch) >= batch_size:
+            flush()
+    flush()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load change-results.json artifacts into the run store")
+    parser.add_argument('root', help="Directory to scan for result artifacts")
+    parser.add_argument('--store', required=True, help="Run store directory")
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN, help="File name pattern of result artifacts")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Files parsed in parallel")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Runs per write to the store")
+    parser.add_argument('--scale-multiplier', type=int, help="Scale of artifacts whose sidecar does not say")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        print(f"Error: '{args.root}' is not a directory", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    stats = ingest(args.root, args.store, args.pattern, args.workers, args.batch_size, args.scale_multiplier)
+    elapsed = time.perf_counter() - start
+
+    for path, error in stats['errors'][:10]:
+        print(f"Skipped {path}: {error}", file=sys.stderr)
+    if len(stats['errors']) > 10:
+        print(f"... and {len(stats['errors']) - 10} more unreadable files", file=sys.stderr)
+    print(f"Ingested {stats['written']} runs from {stats['files']} files into {args.store} in {elapsed:.1f}s "
+          f"({stats['duplicates']} already stored, {stats['untimed']} without a duration, "
+          f"{stats['hypotheses']} hypotheses, "
+          f"{len(stats['errors'])} unreadable)")
+
+
+if __name__ == "__main__":
+    main()
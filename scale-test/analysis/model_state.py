@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Persisted, incrementally updated duration prediction model.
+
+The state file holds the sufficient statistics of the linear fit (count,
+means and the centered XᵀX / Xᵀy co-moment matrix, see moments.py) plus the
+fit derived from them and the IDs of the runs folded in. New runs are folded in with an O(features²) update
+per run instead of refitting, and analyze.py --model-state reads the
+formula, R² and feature importance from the same state.
+
+`predict` only reads the cached fit, so it answers without importing numpy
+or pandas - cheap enough to run in CI before submitting a plan.
+
+Usage:
+    python model_state.py update --state model.json --json runs.json
+    python model_state.py update --state model.json --store runs/
+    python model_state.py show --state model.json
+    python model_state.py predict --state model.json --blast-radius 800 --edges 2100 --observations 290
+"""
+
+import argparse
+import json
+import os
+import sys
+
+DEFAULT_STATE_PATH = "model-state.json"
+TARGET = "duration_seconds"
+FEATURES = ["blast_radius", "edges", "observations"]
+
+
+def load_state(path):
+    """Load a state file, or return None if it does not exist yet."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    """Write the state file atomically."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def state_moments(state):
+    """Rebuild the RunningMoments held in a state (empty if state is None)."""
+    from moments import RunningMoments
+
+    if state is None:
+        return RunningMoments([TARGET] + FEATURES)
+    return RunningMoments.from_dict(state["moments"])
+
+
+def fit_from_moments(moments):
+    """The cached fit stored alongside the moments (None until it is solvable)."""
+    features = moments.columns[1:]
+    if moments.n <= len(features):
+        return None
+    intercept, coef, r2, standardized = moments.linear_fit(features, moments.columns[0])
+    return {
+        "intercept": float(intercept),
+        "coefficients": dict(zip(features, map(float, coef))),
+        "r2": float(r2),
+        "importance": dict(zip(features, map(float, abs(standardized)))),
+    }
+
+
+def _missing(value):
+    # NaN and NaT are the only values unequal to themselves
+    return value is None or value != value
+
+
+def _usable(record):
+    """True if a record can be folded in: it is timed, has every feature, and is recognised when replayed."""
+    return not any(_missing(record.get(c)) for c in [TARGET] + FEATURES + ["created_at"])
+
+
+def update_state(state, records):
+    """
+    Fold records into a state and return the new state.
+
+    The state keeps the `run_ids` it has folded in, and records whose
+    `run_id` is among them are skipped, so replaying the same history does
+    not count runs twice while a run backfilled into the store later (older
+    than `updated_through`) is still added. A record without a `run_id` is
+    only added if its `created_at` is past `updated_through`; one without
+    `created_at` either (analyze.py's age_hours-only input, say) could not
+    be told apart on a replay, so it is skipped, as are records missing the
+    duration or a feature (backfilled artifacts without a sidecar): one of
+    those would turn the fit into NaN. Skipped records never move
+    `updated_through`.
+
+    A state written before `run_ids` was kept has folded in every run up to
+    its `updated_through`; those runs are recorded as seen without adding
+    them again.
+    """
+    from run_store import parse_timestamp
+
+    moments = state_moments(state)
+    updated_through = state.get("updated_through") if state else None
+    if updated_through is not None:
+        updated_through = parse_timestamp(updated_through)
+    legacy = state is not None and "run_ids" not in state
+    seen = set(state.get("run_ids", [])) if state else set()
+
+    rows = []
+    newest = updated_through
+    for record in records:
+        if not _usable(record):
+            continue
+        run_id = None if _missing(record.get("run_id")) else str(record["run_id"])
+        created_at = parse_timestamp(record["created_at"])
+        at_or_before_mark = updated_through is not None and created_at <= updated_through
+        if run_id is None or legacy:
+            if at_or_before_mark:
+                if run_id is not None:
+                    seen.add(run_id)
+                continue
+        if run_id is not None:
+            if run_id in seen:
+                continue
+            seen.add(run_id)
+        if newest is None or created_at > newest:
+            newest = created_at
+        rows.append([record[c] for c in moments.columns])
+
+    moments.update(rows)
+    return {
+        "updated_through": newest.isoformat() if newest else None,
+        "run_ids": sorted(seen),
+        "moments": moments.to_dict(),
+        "fit": fit_from_moments(moments),
+    }
+
+
+def predict(state, blast_radius, edges, observations):
+    """Predicted Overmind analysis duration in seconds from the cached fit."""
+    fit = state.get("fit")
+    if not fit:
+        raise ValueError("Model state has too few runs to predict from")
+    values = {"blast_radius": blast_radius, "edges": edges, "observations": observations}
+    return fit["intercept"] + sum(coef * values[feat] for feat, coef in fit["coefficients"].items())
+
+
+def _records_from_args(args):
+    if args.store:
+        from run_store import load_store
+        df = load_store(args.store, columns=[TARGET] + FEATURES + ["created_at", "run_id"], ages=False)
+        return df[df[TARGET].notna()].to_dict("records")
+    with open(args.json) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental scale test duration model")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    update = subparsers.add_parser("update", help="Fold new runs into the model state")
+    update.add_argument('--state', default=DEFAULT_STATE_PATH, help="Model state file")
+    source = update.add_mutually_exclusive_group(required=True)
+    source.add_argument('--json', type=str, help="JSON file of run records")
+    source.add_argument('--store', type=str, help="Run store directory")
+
+    show = subparsers.add_parser("show", help="Print the formula held in the model state")
+    show.add_argument('--state', default=DEFAULT_STATE_PATH, help="Model state file")
+
+    pred = subparsers.add_parser("predict", help="Estimate analysis duration for a plan")
+    pred.add_argument('--state', default=DEFAULT_STATE_PATH, help="Model state file")
+    pred.add_argument('--blast-radius', type=float, required=True, help="Blast radius (nodes)")
+    pred.add_argument('--edges', type=float, required=True, help="Blast radius edges")
+    pred.add_argument('--observations', type=float, required=True, help="Expected observations")
+    pred.add_argument('--format', choices=["text", "json"], default="text", help="Output format")
+
+    args = parser.parse_args()
+    state = load_state(args.state)
+
+    if args.command == "update":
+        before = state["moments"]["n"] if state else 0
+        records = _records_from_args(args)
+        skipped = sum(not _usable(record) for record in records)
+        state = update_state(state, records)
+        save_state(args.state, state)
+        print(f"Added {state['moments']['n'] - before} runs to {args.state} ({state['moments']['n']} total)")
+        if skipped:
+            print(f"Skipped {skipped} runs missing created_at, the duration or a feature", file=sys.stderr)
+        return
+
+    if state is None:
+        print(f"Error: Model state '{args.state}' not found (run 'update' first)", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == "show":
+        fit = state["fit"]
+        print(f"Runs: {state['moments']['n']}, updated through: {state['updated_through']}")
+        if fit is None:
+            print("Not enough runs to fit a model yet")
+            return
+        print(f"duration_seconds = {fit['intercept']:.1f}")
+        for feat, coef in fit["coefficients"].items():
+            sign = '+' if coef >= 0 else '-'
+            print(f"  {sign} {abs(coef):.4f} × {feat}")
+        print(f"R² = {fit['r2']:.3f}")
+        return
+
+    try:
+        seconds = predict(state, args.blast_radius, args.edges, args.observations)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.format == "json":
+        print(json.dumps({"duration_seconds": round(seconds, 1), "runs": state["moments"]["n"]}))
+    else:
+        print(f"Estimated analysis duration: {seconds:.0f}s ({seconds / 60:.1f}m) from {state['moments']['n']} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Running moments for incremental least squares and correlation.
+
+RunningMoments keeps the count, mean vector and centered co-moment matrix
+(the sum of outer products of deviations from the mean) of a set of
+columns. Chunks are merged with the pairwise update of Chan et al., so the
+statistics are exact and numerically stable however the rows are split.
+The co-moment matrix is the centered form of the normal equations: its
+feature block is XᵀX, its feature/target column is Xᵀy, and its diagonal
+divided by n gives the variances.
+"""
+
+import numpy as np
+
+
+class RunningMoments:
+    """Count, mean vector and centered co-moment matrix, merged chunk by chunk."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+
+    def update(self, values):
+        """Merge a 2-D array of rows (columns in self.columns order)."""
+        values = np.asarray(values, dtype=float)
+        n_b = len(values)
+        if n_b == 0:
+            return
+        mean_b = values.mean(axis=0)
+        centered = values - mean_b
+        comoment_b = centered.T @ centered
+
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.comoment += comoment_b + np.outer(delta, delta) * (self.n * n_b / n)
+        self.mean += delta * (n_b / n)
+        self.n = n
+
+    def to_dict(self):
+        return {
+            "columns": self.columns,
+            "n": self.n,
+            "mean": self.mean.tolist(),
+            "comoment": self.comoment.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        moments = cls(data["columns"])
+        moments.n = data["n"]
+        moments.mean = np.array(data["mean"], dtype=float)
+        moments.comoment = np.array(data["comoment"], dtype=float)
+        return moments
+
+    def index(self, column):
+        return self.columns.index(column)
+
+    def corr(self, a, b):
+        i, j = self.index(a), self.index(b)
+        return self.comoment[i, j] / np.sqrt(self.comoment[i, i] * self.comoment[j, j])
+
+    def linear_fit(self, features, target):
+        """
+        Least-squares fit of target on features from the centered normal equations.
+
+        A constant or collinear feature makes XᵀX singular; the minimum-norm
+        solution is returned then (a constant feature gets coefficient 0),
+        as LinearRegression does.
+
+        Returns (intercept, coefficients, r2, standardized coefficients).
+        """
+        f = [self.index(c) for c in features]
+        t = self.index(target)
+        sxx = self.comoment[np.ix_(f, f)]
+        sxy = self.comoment[f, t]
+        coef = np.linalg.lstsq(sxx, sxy, rcond=None)[0]
+        intercept = self.mean[t] - coef @ self.mean[f]
+        ss_tot = self.comoment[t, t]
+        r2 = 1 - (ss_tot - coef @ sxy) / ss_tot
+        # Population std, matching StandardScaler
+        standardized = coef * np.sqrt(np.diag(sxx) / self.n)
+        return intercept, coef, r2, standardized
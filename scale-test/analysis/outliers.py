@@ -0,0 +1,180 @@
+"""
+Pluggable outlier detection for scale test runs.
+
+Every detector scores all runs at once and returns, per run, the duration
+it expected (`baseline`), a signed `score` (positive = slower than
+expected) and whether the run is an outlier. The robust detectors work on
+the log ratio of actual to regression-predicted duration, so a
+lambda_timeout run with 12k edges is judged against what its size
+predicts. They then compare that ratio with its own scenario's history, so
+noisy scenarios need a larger deviation to be flagged.
+
+Detectors:
+    residual          the original rule: |actual - predicted| > 30% of predicted
+    scenario_mad      per-scenario median/MAD of the log ratio (modified z-score)
+    rolling_quantile  Tukey fences on a trailing window of each scenario's
+                      earlier runs, ordered by age_hours
+
+Register new detectors with @register_detector("name", "description").
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_METHOD = "scenario_mad"
+
+# Modified z-score cut-off recommended by Iglewicz and Hoaglin
+MAD_Z_THRESHOLD = 3.5
+MAD_MIN_RUNS = 5
+# Scales the MAD so it estimates the standard deviation for normal data
+MAD_SCALE = 0.6745
+
+ROLLING_WINDOW = 20
+ROLLING_MIN_RUNS = 5
+ROLLING_FENCE = 1.5
+
+RESIDUAL_THRESHOLD_PCT = 30
+
+DETECTORS = {}
+DESCRIPTIONS = {}
+
+
+def register_detector(name, description):
+    """Register a detector function under name; description heads the report section."""
+    def decorator(fn):
+        DETECTORS[name] = fn
+        DESCRIPTIONS[name] = description
+        return fn
+    return decorator
+
+
+def log_ratio(df):
+    """log(actual / predicted) duration, NaN where the prediction is not positive."""
+    predicted = df['predicted'].where(df['predicted'] > 0)
+    return np.log(df['duration_seconds'] / predicted)
+
+
+@register_detector("residual", f">{RESIDUAL_THRESHOLD_PCT}% deviation from expected")
+def residual_detector(df, threshold_pct=RESIDUAL_THRESHOLD_PCT):
+    residual_pct = (df['duration_seconds'] - df['predicted']) / df['predicted'] * 100
+    return pd.DataFrame({
+        'baseline': df['predicted'],
+        'score': residual_pct / threshold_pct,
+        'is_outlier': residual_pct.abs() > threshold_pct,
+    }, index=df.index)
+
+
+def baselines_from_arrays(ratios_by_scenario, min_runs=MAD_MIN_RUNS):
+    """scenario_baselines() from a dict of scenario -> array of log ratios."""
+    rows = {}
+    for scenario, ratios in ratios_by_scenario.items():
+        ratios = ratios[~np.isnan(ratios)]
+        if len(ratios) >= min_runs:
+            median = np.median(ratios)
+            rows[scenario] = (median, np.median(np.abs(ratios - median)))
+        else:
+            rows[scenario] = (np.nan, np.nan)
+    return pd.DataFrame.from_dict(rows, orient='index', columns=['median', 'mad'])
+
+
+def scenario_baselines(ratios, scenarios, min_runs=MAD_MIN_RUNS):
+    """
+    Per-scenario median and MAD of the log ratio.
+
+    Scenarios with fewer than min_runs scored runs get NaN, so none of
+    their runs are flagged.
+    """
+    grouped = ratios.groupby(scenarios)
+    median = grouped.median()
+    mad = (ratios - scenarios.map(median)).abs().groupby(scenarios).median()
+    enough = grouped.count() >= min_runs
+    return pd.DataFrame({
+        'median': median.where(enough),
+        'mad': mad.where(enough),
+    })
+
+
+@register_detector("scenario_mad", f"robust per-scenario baseline, |z| > {MAD_Z_THRESHOLD}")
+def scenario_mad_detector(df, threshold=MAD_Z_THRESHOLD, min_runs=MAD_MIN_RUNS, baselines=None):
+    """
+    Modified z-score of each run's log ratio against its scenario.
+
+    baselines (from scenario_baselines()) can be passed in when they were
+    computed elsewhere, e.g. over a whole streamed file.
+    """
+    ratios = log_ratio(df)
+    if baselines is None:
+        baselines = scenario_baselines(ratios, df['scenario'], min_runs)
+    median = df['scenario'].map(baselines['median'])
+    mad = df['scenario'].map(baselines['mad']).where(lambda m: m > 0)
+    score = MAD_SCALE * (ratios - median) / mad
+    return pd.DataFrame({
+        'baseline': df['predicted'] * np.exp(median),
+        'score': score,
+        'is_outlier': score.abs() > threshold,
+    }, index=df.index)
+
+
+@register_detector("rolling_quantile", "outside trailing per-scenario quartile fences")
+def rolling_quantile_detector(df, window=ROLLING_WINDOW, min_runs=ROLLING_MIN_RUNS, fence=ROLLING_FENCE):
+    """
+    Compare each run with the quartiles of the same scenario's previous runs.
+
+    Runs are ordered oldest first by age_hours. A run is flagged when its log
+    ratio falls outside [Q1 - fence*IQR, Q3 + fence*IQR] of the trailing
+    window. Without age_hours no run is scored.
+    """
+    if 'age_hours' not in df.columns:
+        nan = pd.Series(np.nan, index=df.index)
+        return pd.DataFrame({'baseline': nan, 'score': nan, 'is_outlier': False}, index=df.index)
+
+    ordered = df.assign(_ratio=log_ratio(df)).sort_values('age_hours', ascending=False, kind='stable')
+    trailing = ordered.groupby('scenario', sort=False)['_ratio'].shift(1)
+    rolling = trailing.groupby(ordered['scenario'], sort=False).rolling(window, min_periods=min_runs)
+    q1 = rolling.quantile(0.25).droplevel(0).reindex(ordered.index)
+    q2 = rolling.quantile(0.50).droplevel(0).reindex(ordered.index)
+    q3 = rolling.quantile(0.75).droplevel(0).reindex(ordered.index)
+    iqr = (q3 - q1).where(lambda v: v > 0)
+
+    ratio = ordered['_ratio']
+    result = pd.DataFrame({
+        'baseline': ordered['predicted'] * np.exp(q2),
+        'score': (ratio - q2) / iqr,
+        'is_outlier': (ratio > q3 + fence * iqr) | (ratio < q1 - fence * iqr),
+    }, index=ordered.index)
+    return result.reindex(df.index)
+
+
+def score_runs(df, method=DEFAULT_METHOD, **params):
+    """Score every run in df with the named detector (df needs a 'predicted' column)."""
+    if method not in DETECTORS:
+        raise ValueError(f"Unknown outlier method '{method}' (choose from {', '.join(sorted(DETECTORS))})")
+    return DETECTORS[method](df, **params)
+
+
+def flagged(df, scores):
+    """Flagged runs joined with their scores, slowest relative to expectation first."""
+    columns = ['scenario', 'duration_minutes', 'predicted', 'residual_pct']
+    columns += [c for c in ('run_id', 'created_at', 'age_hours') if c in df.columns]
+    runs = df.loc[scores['is_outlier'], columns].join(scores[['baseline', 'score']])
+    return runs.sort_values('score', ascending=False)
+
+
+def to_records(outliers, method):
+    """Machine-readable list of anomalous runs."""
+    records = []
+    for _, row in outliers.iterrows():
+        record = {
+            'scenario': row['scenario'],
+            'method': method,
+            'direction': 'slower' if row['score'] > 0 else 'faster',
+            'score': round(float(row['score']), 3),
+            'duration_seconds': round(float(row['duration_minutes']) * 60, 1),
+            'predicted_seconds': round(float(row['predicted']), 1),
+            'baseline_seconds': round(float(row['baseline']), 1),
+        }
+        for key, convert in (('run_id', str), ('created_at', str), ('age_hours', float)):
+            if key in row.index and pd.notna(row[key]):
+                record[key] = convert(row[key])
+        records.append(record)
+    return records
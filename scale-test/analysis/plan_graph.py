@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Local blast-radius pre-estimate from a Terraform plan JSON.
+
+Overmind reports the blast radius (nodes and edges) only after it has
+finished, and analyze.py shows that duration tracks both. This script
+approximates them before submission from the plan alone:
+
+    nodes   every resource instance in prior_state, plus planned creates
+    edges   configuration references between resources, resolved through
+            module inputs (var.*) and outputs (module.*.*), plus
+            prior_state attributes that hold another resource's id or
+            ARN (security group IDs, role ARNs, topic ARNs in policies...)
+
+The graph is stored as a compressed sparse row adjacency (two integer
+arrays). The estimate is a breadth-first search from the changed
+resources out to --depth hops. Its node count is the number of resources
+reached, and its edge count is the number of edges among them.
+Overmind also discovers cloud resources that are not in the plan, so
+these counts are a lower bound on what it will report. Given a
+model_state.py state, the estimate is turned into a duration from a fit
+of duration on blast radius and edges, made from the same running
+moments as the analyze.py formula.
+
+Usage:
+    python plan_graph.py ../../plan.json
+    python plan_graph.py plan.json --depth 3 --format json
+    python plan_graph.py plan.json --model-state model-state.json
+"""
+
+import argparse
+import json
+import re
+import sys
+from array import array
+from collections import defaultdict
+
+from plan_reader import PlanIndex, scan_plan
+
+DEFAULT_DEPTH = 2
+
+# Reference prefixes that never name a resource
+_NON_RESOURCE_REFS = {"var", "local", "each", "count", "path", "self", "terraform"}
+_INSTANCE_KEY = re.compile(r'\[(?:"[^"]*"|[^\]])*\]')
+_ARN = re.compile(r'arn:aws[\w-]*:[\w-]+:[\w-]*:\d*:[\w/:.+=@*-]+')
+# Attribute values shorter than this are too generic to link resources by
+_MIN_ID_LENGTH = 8
+_ID_ATTRIBUTES = ("id", "arn")
+
+
+def config_address(address):
+    """Instance address -> configuration address ('module.a[0].aws_x.y["k"]' -> 'module.a.aws_x.y')."""
+    return _INSTANCE_KEY.sub('', address)
+
+
+def instance_key(address):
+    """The instance keys of an address, e.g. '[0]["k"]', used to pair instances across resources."""
+    return "".join(_INSTANCE_KEY.findall(address))
+
+
+class _ConfigRefs:
+    """Resolves configuration references to resource configuration addresses."""
+
+    def __init__(self, configuration):
+        self.modules = {}  # module prefix -> configuration module
+        self.calls = {}    # module prefix -> (parent prefix, module call)
+        self._add_module("", configuration.get("root_module", {}))
+        self._outputs = {}
+        self._variables = {}
+
+    def _add_module(self, prefix, module):
+        self.modules[prefix] = module
+        for name, call in module.get("module_calls", {}).items():
+            child = f"{prefix}module.{name}"
+            self.calls[child] = (prefix, call)
+            self._add_module(child + ".", call.get("module", {}))
+
+    def resolve(self, ref, prefix):
+        """Resource configuration addresses a reference in module prefix points at."""
+        parts = _INSTANCE_KEY.sub('', ref).split(".")
+        if parts[0] in _NON_RESOURCE_REFS:
+            if parts[0] == "var" and len(parts) > 1:
+                return self._variable(prefix, parts[1])
+            return set()
+        if parts[0] == "module":
+            if len(parts) < 3:
+                return set()
+            return self._output(f"{prefix}module.{parts[1]}", parts[2])
+        if parts[0] == "data":
+            return {f"{prefix}{'.'.join(parts[:3])}"} if len(parts) >= 3 else set()
+        return {f"{prefix}{'.'.join(parts[:2])}"} if len(parts) >= 2 else set()
+
+    def resolve_all(self, refs, prefix):
+        targets = set()
+        for ref in refs:
+            targets |= self.resolve(ref, prefix)
+        return targets
+
+    def _output(self, module_path, name):
+        key = (module_path, name)
+        if key not in self._outputs:
+            self._outputs[key] = set()  # guards against cycles
+            module = self.modules.get(module_path + ".", {})
+            output = module.get("outputs", {}).get(name, {})
+            refs = output.get("expression", {}).get("references", [])
+            self._outputs[key] = self.resolve_all(refs, module_path + ".")
+        return self._outputs[key]
+
+    def _variable(self, prefix, name):
+        key = (prefix, name)
+        if key not in self._variables:
+            self._variables[key] = set()
+            module_path = prefix.rstrip(".")
+            if module_path in self.calls:
+                parent, call = self.calls[module_path]
+                refs = list(_iter_references(call.get("expressions", {}).get(name, {})))
+                self._variables[key] = self.resolve_all(refs, parent)
+        return self._variables[key]
+
+    def resource_references(self):
+        """(resource configuration address, referenced configuration addresses) for every resource."""
+        for prefix, module in self.modules.items():
+            for resource in module.get("resources", []):
+                refs = list(_iter_references(resource.get("expressions", {})))
+                for meta in ("count_expression", "for_each_expression"):
+                    refs += _iter_references(resource.get(meta, {}))
+                refs += resource.get("depends_on", [])
+                yield prefix + resource["address"], self.resolve_all(refs, prefix)
+
+
+def _iter_references(expressions):
+    """Every 'references' entry in a (nested) configuration expression."""
+    stack = [expressions]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            refs = node.get("references")
+            if isinstance(refs, list):
+                yield from refs
+            stack.extend(v for k, v in node.items() if k != "references")
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+def _iter_state_resources(module):
+    stack = [module]
+    while stack:
+        module = stack.pop()
+        yield from module.get("resources", [])
+        stack.extend(module.get("child_modules", []))
+
+
+def _iter_strings(values):
+    stack = [values]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, str):
+            yield node
+        elif isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+class PlanGraph:
+    """
+    Resource graph of a plan in compressed sparse row form.
+
+    Node i's neighbours are indices[indptr[i]:indptr[i + 1]]. Edges are
+    undirected and stored once in each direction.
+    """
+
+    def __init__(self, addresses, edges, changed):
+        self.addresses = addresses
+        self.changed = changed
+        neighbours = [[] for _ in addresses]
+        for a, b in edges:
+            neighbours[a].append(b)
+            neighbours[b].append(a)
+        self.indptr = array('I', [0])
+        self.indices = array('I')
+        for row in neighbours:
+            self.indices.extend(sorted(row))
+            self.indptr.append(len(self.indices))
+        self.n_edges = len(edges)
+
+    @classmethod
+    def from_plan(cls, path):
+        """Build the graph from the resource_changes, prior_state and configuration of a plan (one pass)."""
+        index = PlanIndex(path)
+        sections = scan_plan(path, ("prior_state", "configuration"), "resource_changes", index.add)
+        prior_state = sections.pop("prior_state", None) or {}
+        state_module = prior_state.get("values", {}).get("root_module", {})
+
+        addresses = []
+        node = {}
+
+        def add_node(address):
+            if address not in node:
+                node[address] = len(addresses)
+                addresses.append(address)
+            return node[address]
+
+        # prior_state: one node per instance, and the ids/ARNs it is known by
+        by_identifier = {}
+        state_strings = []
+        for resource in _iter_state_resources(state_module):
+            i = add_node(resource["address"])
+            values = resource.get("values") or {}
+            # A data source's id is often a shared value such as the region or account ID
+            for attribute in _ID_ATTRIBUTES if resource.get("mode") != "data" else ("arn",):
+                value = values.get(attribute)
+                if isinstance(value, str) and len(value) >= _MIN_ID_LENGTH:
+                    by_identifier.setdefault(value, i)
+            state_strings.append((i, values))
+        del prior_state
+
+        for address in index.addresses:
+            add_node(address)
+        changed = [node[address] for row, address in enumerate(index.addresses) if index.is_changed(row)]
+
+        edges = set()
+
+        def link(a, b):
+            if a != b:
+                edges.add((a, b) if a < b else (b, a))
+
+        # Attribute cross-references: a value equal to (or an ARN inside it) another resource's id/ARN
+        for i, values in state_strings:
+            for value in _iter_strings(values):
+                if len(value) < _MIN_ID_LENGTH:
+                    continue
+                target = by_identifier.get(value)
+                if target is not None:
+                    link(i, target)
+                elif "arn:" in value:
+                    for arn in _ARN.findall(value):
+                        target = by_identifier.get(arn)
+                        if target is not None:
+                            link(i, target)
+        del state_strings
+
+        # Configuration references, paired instance by instance where both sides share keys
+        instances = defaultdict(list)
+        for address, i in node.items():
+            instances[config_address(address)].append(i)
+        refs = _ConfigRefs(sections.get("configuration") or {})
+        for source, targets in refs.resource_references():
+            for target in targets:
+                cls._link_instances(instances.get(source, ()), instances.get(target, ()), addresses, link)
+
+        return cls(addresses, edges, changed)
+
+    @staticmethod
+    def _link_instances(sources, targets, addresses, link):
+        if not sources or not targets:
+            return
+        if len(sources) > 1 and len(targets) > 1:
+            by_key = {instance_key(addresses[t]): t for t in targets}
+            if len(by_key) == len(targets) and all(instance_key(addresses[s]) in by_key for s in sources):
+                for s in sources:
+                    link(s, by_key[instance_key(addresses[s])])
+                return
+        for s in sources:
+            for t in targets:
+                link(s, t)
+
+    def neighbours(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def blast_radius(self, depth=DEFAULT_DEPTH, seeds=None):
+        """
+        (nodes, edges) within depth hops of the changed resources.
+
+        edges counts the graph edges with both ends inside that set.
+        """
+        seeds = self.changed if seeds is None else seeds
+        reached = set(seeds)
+        frontier = list(reached)
+        for _ in range(depth):
+            next_frontier = []
+            for i in frontier:
+                for j in self.neighbours(i):
+                    if j not in reached:
+                        reached.add(j)
+                        next_frontier.append(j)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        twice_edges = sum(1 for i in reached for j in self.neighbours(i) if j in reached)
+        return len(reached), twice_edges // 2
+
+
+def estimate_duration(state, blast_radius, edges):
+    """
+    Duration in seconds predicted from blast radius and edges alone.
+
+    Observations are not known before submission. Fitting duration on the
+    other two features from the same moments gives the same result as
+    plugging the expected observation count into the full formula.
+    """
+    from model_state import state_moments
+
+    moments = state_moments(state)
+    if moments.n <= 2:
+        raise ValueError("Model state has too few runs to estimate from")
+    intercept, coef, _, _ = moments.linear_fit(["blast_radius", "edges"], "duration_seconds")
+    return float(intercept + coef[0] * blast_radius + coef[1] * edges)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate a plan's blast radius before submitting it")
+    parser.add_argument('plan', help="Plan JSON from `terraform show -json`")
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH, help="Hops to follow from changed resources")
+    parser.add_argument('--model-state', type=str, help="model_state.py state file: also estimate the duration")
+    parser.add_argument('--format', choices=['text', 'json'], default='text', help="Output format")
+    args = parser.parse_args()
+
+    try:
+        graph = PlanGraph.from_plan(args.plan)
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not read plan {args.plan}: {e}", file=sys.stderr)
+        sys.exit(1)
+    nodes, edges = graph.blast_radius(args.depth)
+
+    result = {
+        "resources": len(graph.addresses),
+        "graph_edges": graph.n_edges,
+        "changed": len(graph.changed),
+        "depth": args.depth,
+        "blast_radius": nodes,
+        "edges": edges,
+    }
+    if args.model_state:
+        from model_state import load_state
+
+        state = load_state(args.model_state)
+        if state is None:
+            print(f"Error: Model state '{args.model_state}' not found", file=sys.stderr)
+            sys.exit(1)
+        try:
+            result["duration_seconds"] = round(estimate_duration(state, nodes, edges), 1)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    if args.format == 'json':
+        print(json.dumps(result))
+        return
+    print(f"Plan graph: {result['resources']} resources, {result['graph_edges']} edges")
+    print(f"Changed resources: {result['changed']}")
+    print(f"Estimated blast radius ({args.depth} hops): {nodes} nodes, {edges} edges")
+    if "duration_seconds" in result:
+        seconds = result["duration_seconds"]
+        print(f"Estimated analysis duration: {seconds:.0f}s ({seconds / 60:.1f}m)")
+
+
+if __name__ == "__main__":
+    main()
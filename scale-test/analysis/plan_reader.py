@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Streaming, indexed reader for Terraform plan JSON (`terraform show -json`).
+
+At scale_multiplier=50 a plan is hundreds of MB, most of it in
+planned_values, prior_state and configuration. json.load() on that
+costs several seconds and several GB. This reader reads the file in
+fixed-size chunks and keeps one value in memory at a time. Sections
+before resource_changes are skipped, and values bigger than a chunk are
+skipped member by member. The resource_changes entries are decoded one
+at a time, and the reader stops as soon as that array ends, so
+prior_state and configuration are never read.
+
+PlanIndex keeps a compact index of each resource change: address, type,
+provider, actions, module and the byte range of its entry in the file.
+Queries are answered from the index. load() re-reads a single entry from
+its byte range when the full change is needed.
+
+Usage:
+    python plan_reader.py ../../plan.json                          # Counts by action and type
+    python plan_reader.py plan.json --type aws_security_group --changed
+    python plan_reader.py plan.json --action delete --format json
+    python plan_reader.py plan.json --address module.api_server.aws_instance.api --load
+"""
+
+import argparse
+import codecs
+import json
+import re
+import sys
+from array import array
+from collections import Counter, defaultdict
+
+CHUNK_SIZE = 1 << 20
+
+# Actions that leave the resource as it is
+UNCHANGED_ACTIONS = {"no-op", "read"}
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+_DELIMITERS = ' \t\n\r,]}'
+# A decode error this close to the end of the buffer may just mean the value continues in the next chunk
+_TRUNCATION_MARGIN = 8
+
+
+class _Reader:
+    """
+    Chunked reader that decodes or skips one JSON value at a time.
+
+    Values are parsed by the C decoder straight out of the buffer. A value
+    to be skipped that is larger than a chunk is walked one level down
+    instead, so at most about one chunk is ever decoded at once. Consumed
+    text is dropped on every refill. The byte offset of a position is
+    tracked incrementally, so offsets stay valid for non-ASCII plans.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0  # index into buf of the next unread character
+        self._cursor = 0  # index into buf whose byte offset is _cursor_bytes
+        self._cursor_bytes = 0
+
+    def byte_offset(self, index):
+        """File byte offset of buf[index] (index must not move backwards)."""
+        segment = self.buf[self._cursor:index]
+        self._cursor_bytes += len(segment) if segment.isascii() else len(segment.encode())
+        self._cursor = index
+        return self._cursor_bytes
+
+    def _read_more(self, at_least=0):
+        """Drop consumed text and append a chunk (or at_least bytes, if more)."""
+        data = self.f.read(max(self.chunk_size, at_least))
+        if not data:
+            raise ValueError("Unexpected end of plan JSON")
+        self.byte_offset(self.pos)
+        self.buf = self.buf[self.pos:] + self.decoder.decode(data)
+        self.pos = 0
+        self._cursor = 0
+
+    def _truncated(self, error):
+        """Whether a decode error may only mean the buffer ends mid-value."""
+        return error.msg.startswith("Unterminated string") or error.pos >= len(self.buf) - _TRUNCATION_MARGIN
+
+    def _error(self, error):
+        return ValueError(f"Invalid plan JSON at byte {self.byte_offset(error.pos)}: {error.msg}")
+
+    def peek(self):
+        """Skip whitespace and return the next character without consuming it."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            self._read_more()
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at byte {self.byte_offset(self.pos)}, found {found!r}")
+        self.pos += 1
+
+    def decode_value(self, keep=True):
+        """
+        Decode the next value and move past it.
+
+        A container larger than a chunk is walked member by member rather
+        than decoded in one piece; with keep=False its members are dropped
+        as they are read and None is returned.
+        """
+        first = self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if not self._truncated(e):
+                    raise self._error(e)
+                if first in '{[' and len(self.buf) - self.pos >= self.chunk_size:
+                    return self._walk(first, keep)
+                # Double the buffered text, so a long string n chunks in size takes log(n) attempts
+                self._read_more(len(self.buf) - self.pos)
+                continue
+            # A number or literal is only complete once a delimiter follows it
+            if first not in '{["' and (end == len(self.buf) or self.buf[end] not in _DELIMITERS):
+                try:
+                    self._read_more()
+                    continue
+                except ValueError:
+                    if end < len(self.buf):
+                        raise
+            self.pos = end
+            return value
+
+    def skip_value(self):
+        """Move past the next value without keeping it."""
+        self.decode_value(keep=False)
+
+    def _walk(self, opening, keep):
+        """Read a large object or array member by member."""
+        is_object = opening == '{'
+        value = ({} if is_object else []) if keep else None
+        self.pos += 1
+        while self.peek() != ('}' if is_object else ']'):
+            key = self.read_key() if is_object else None
+            member = self.decode_value(keep)
+            if keep:
+                if is_object:
+                    value[key] = member
+                else:
+                    value.append(member)
+            if self.peek() == ',':
+                self.pos += 1
+        self.pos += 1
+        return value
+
+    def read_key(self):
+        """Read an object key and the colon after it."""
+        if self.peek() != '"':
+            self.expect('"')
+        key = self.decode_value()
+        self.expect(':')
+        return key
+
+    def seek_key(self, key):
+        """Position the reader at the value of a top-level key; False if absent."""
+        self.expect('{')
+        while self.peek() != '}':
+            if self.read_key() == key:
+                return True
+            self.skip_value()
+            if self.peek() == ',':
+                self.pos += 1
+        return False
+
+
+def iter_array(path, key, chunk_size=CHUNK_SIZE):
+    """
+    Stream the elements of a top-level array as (value, start, end).
+
+    start and end are the element's byte offsets in the file. Sections
+    before key are skipped, and reading stops at the end of the array,
+    so later sections are never read at all.
+    """
+    with open(path, 'rb') as f:
+        reader = _Reader(f, chunk_size)
+        if not reader.seek_key(key):
+            return
+        reader.expect('[')
+        while reader.peek() != ']':
+            start = reader.byte_offset(reader.pos)
+            value = reader.decode_value()
+            yield value, start, reader.byte_offset(reader.pos)
+            if reader.peek() == ',':
+                reader.pos += 1
+
+
+def scan_plan(path, sections=(), stream=None, on_item=None, chunk_size=CHUNK_SIZE):
+    """
+    Read several parts of a plan in a single pass.
+
+    Decodes the top-level sections named in sections and feeds each
+    element of the top-level array named stream to on_item(value, start,
+    end). Other sections are skipped, and reading stops once everything
+    requested has been seen. Returns {section: value} for the sections found.
+    """
+    wanted = set(sections)
+    found = {}
+    with open(path, 'rb') as f:
+        reader = _Reader(f, chunk_size)
+        reader.expect('{')
+        while (wanted or stream is not None) and reader.peek() != '}':
+            key = reader.read_key()
+            if key in wanted:
+                found[key] = reader.decode_value()
+                wanted.discard(key)
+            elif key == stream:
+                reader.expect('[')
+                while reader.peek() != ']':
+                    start = reader.byte_offset(reader.pos)
+                    value = reader.decode_value()
+                    on_item(value, start, reader.byte_offset(reader.pos))
+                    if reader.peek() == ',':
+                        reader.pos += 1
+                reader.pos += 1
+                stream = None
+            else:
+                reader.skip_value()
+            if reader.peek() == ',':
+                reader.pos += 1
+    return found
+
+
+def read_section(path, key, chunk_size=CHUNK_SIZE):
+    """Decode a single top-level section (None if the plan has no such key)."""
+    return scan_plan(path, (key,), chunk_size=chunk_size).get(key)
+
+
+def iter_resource_changes(path, chunk_size=CHUNK_SIZE):
+    """Decoded resource_changes entries, one at a time."""
+    for change, _, _ in iter_array(path, 'resource_changes', chunk_size):
+        yield change
+
+
+def provider_short_name(provider_name):
+    """'registry.terraform.io/hashicorp/aws' -> 'aws'."""
+    return provider_name.rsplit('/', 1)[-1] if provider_name else ""
+
+
+class PlanIndex:
+    """
+    Compact index of a plan's resource_changes.
+
+    Each resource is a row number. The string columns share interned
+    values, and the lookup tables map a type, action, provider or module
+    to an array of row numbers.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.addresses = []
+        self.types = []
+        self.providers = []
+        self.actions = []
+        self.modules = []
+        self.offsets = array('q')  # start, end per row
+        self.by_address = {}
+        self.by_type = defaultdict(lambda: array('I'))
+        self.by_action = defaultdict(lambda: array('I'))
+        self.by_provider = defaultdict(lambda: array('I'))
+        self.by_module = defaultdict(lambda: array('I'))
+        self._interned = {}
+
+    @classmethod
+    def build(cls, path, chunk_size=CHUNK_SIZE):
+        """Index every resource change in the plan at path."""
+        index = cls(path)
+        scan_plan(path, stream='resource_changes', on_item=index.add, chunk_size=chunk_size)
+        return index
+
+    def add(self, change, start, end):
+        """Index one resource_changes entry found at bytes start..end of the file."""
+        row = len(self.addresses)
+        actions = self._intern(tuple(change.get('change', {}).get('actions', ())))
+        provider = self._intern(change.get('provider_name', ''))
+        module = self._intern(change.get('module_address') or '')
+
+        self.addresses.append(change['address'])
+        self.types.append(self._intern(change.get('type', '')))
+        self.providers.append(provider)
+        self.actions.append(actions)
+        self.modules.append(module)
+        self.offsets.extend((start, end))
+
+        self.by_address[change['address']] = row
+        self.by_type[self.types[row]].append(row)
+        for action in actions:
+            self.by_action[action].append(row)
+        self.by_provider[provider].append(row)
+        short = provider_short_name(provider)
+        if short != provider:
+            self.by_provider[short].append(row)
+        self.by_module[module].append(row)
+
+    def _intern(self, value):
+        return self._interned.setdefault(value, value)
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def is_changed(self, row):
+        return not UNCHANGED_ACTIONS.issuperset(self.actions[row])
+
+    def select(self, type=None, action=None, provider=None, module=None, changed=False):
+        """
+        Row numbers matching every given filter, in plan order.
+
+        provider matches the full provider name or its last segment ('aws').
+        changed keeps only rows with an action other than no-op/read.
+        """
+        rows = None
+        for table, value in ((self.by_type, type), (self.by_action, action),
+                             (self.by_provider, provider), (self.by_module, module)):
+            if value is None:
+                continue
+            matches = table.get(value, ())
+            rows = set(matches) if rows is None else rows.intersection(matches)
+        rows = range(len(self)) if rows is None else sorted(rows)
+        if changed:
+            rows = [row for row in rows if self.is_changed(row)]
+        return list(rows)
+
+    def row(self, row):
+        """The indexed fields of one row as a dict."""
+        return {
+            'address': self.addresses[row],
+            'type': self.types[row],
+            'provider': self.providers[row],
+            'actions': list(self.actions[row]),
+            'module': self.modules[row] or None,
+        }
+
+    def load(self, address):
+        """The full resource_changes entry for address, read from its byte range."""
+        row = self.by_address[address]
+        start, end = self.offsets[2 * row], self.offsets[2 * row + 1]
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            return json.loads(f.read(end - start))
+
+    def counts(self):
+        """Resource counts by action combination and by type."""
+        by_actions = Counter("+".join(actions) for actions in self.actions)
+        by_type = {t: len(rows) for t, rows in self.by_type.items()}
+        return by_actions, by_type
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query resource changes in a Terraform plan JSON")
+    parser.add_argument('plan', help="Plan JSON from `terraform show -json`")
+    parser.add_argument('--type', type=str, help="Resource type, e.g. aws_security_group")
+    parser.add_argument('--action', type=str, help="Action the change includes: create, update, delete, ...")
+    parser.add_argument('--provider', type=str, help="Provider, e.g. aws or registry.terraform.io/hashicorp/aws")
+    parser.add_argument('--module', type=str, help="Module address ('' for the root module)")
+    parser.add_argument('--changed', action='store_true', help="Only resources with a change other than no-op/read")
+    parser.add_argument('--address', type=str, help="Look up a single resource")
+    parser.add_argument('--load', action='store_true', help="With --address: print the full change entry")
+    parser.add_argument('--format', choices=['text', 'json'], default='text', help="Output format")
+    args = parser.parse_args()
+
+    try:
+        index = PlanIndex.build(args.plan)
+    except (OSError, ValueError) as e:
+        print(f"Error: Could not read plan {args.plan}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.address:
+        if args.address not in index.by_address:
+            print(f"Error: {args.address} is not in the plan's resource_changes", file=sys.stderr)
+            sys.exit(1)
+        entry = index.load(args.address) if args.load else index.row(index.by_address[args.address])
+        print(json.dumps(entry, indent=2))
+        return
+
+    filters = (args.type, args.action, args.provider, args.module)
+    if all(f is None for f in filters) and not args.changed:
+        by_actions, by_type = index.counts()
+        if args.format == 'json':
+            print(json.dumps({'resources': len(index), 'actions': by_actions, 'types': by_type}, indent=2))
+            return
+        print(f"{len(index)} resource changes in {args.plan}\n")
+        print("By action:")
+        for actions, count in by_actions.most_common():
+            print(f"  {actions:25s} {count:>7,}")
+        print("\nBy type:")
+        for resource_type, count in sorted(by_type.items(), key=lambda item: (-item[1], item[0])):
+            print(f"  {resource_type:45s} {count:>7,}")
+        return
+
+    rows = index.select(args.type, args.action, args.provider, args.module, args.changed)
+    if args.format == 'json':
+        print(json.dumps([index.row(row) for row in rows], indent=2))
+        return
+    for row in rows:
+        print(f"  {'+'.join(index.actions[row]):15s} {index.addresses[row]}")
+    print(f"\n{len(rows)} of {len(index)} resource changes")
+
+
+if __name__ == "__main__":
+    main()
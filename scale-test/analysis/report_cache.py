@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of analysis reports, keyed by a fingerprint of the runs.
+
+Re-running the analysis on unchanged input returns the stored report
+without building the DataFrame or fitting anything. Entries are pickles in
+one directory; every hit refreshes an entry's mtime and a write that takes
+the directory past max_bytes evicts the least recently used entries first.
+
+Two kinds of entry are kept:
+
+- Whole reports, keyed by the SHA-256 of the input file (or of the loaded
+  runs, for --store and --fetch) plus every parameter that changes the
+  report. --jobs and --format do not.
+- Time-window aggregates (per-period duration moments and per-scenario
+  recent/older sums) for blocks of runs. A run enters a block's key by
+  what the aggregates read from it: scenario, duration, and the period and
+  window its age falls in, not the age itself. A block ends after every
+  run whose row hash is a multiple of BLOCK_ROWS, so block boundaries
+  depend on the runs themselves rather than on their position: appending
+  or prepending runs changes only the blocks they land in. When the report
+  misses, the other blocks' aggregates come from the cache and are merged
+  with the new ones instead of being recomputed.
+
+--store derives age_hours from the current time, so its whole reports are
+keyed on the stored rows (created_at, not age_hours) plus the hour the ages
+were derived in: a cached report is reused for at most that hour. Its
+time-window blocks are reused across hours and appends, except for the
+blocks holding runs that moved into another period or window since.
+
+Every key includes FORMAT_VERSION, so entries pickled by an older version
+of the analysis are never returned.
+
+Usage:
+    python analyze.py --json data.json --cache .analysis-cache
+    python report_cache.py --cache .analysis-cache           # Show entries and size
+    python report_cache.py --cache .analysis-cache --clear
+
+From a notebook:
+    from analyze import OLDER_HOURS, PERIOD_BINS, RECENT_HOURS
+    from report_cache import ReportCache, file_fingerprint, report_key, report_params
+    params = report_params(RECENT_HOURS, OLDER_HOURS, PERIOD_BINS, None, 'scenario_mad')
+    report = ReportCache(".analysis-cache").get(report_key(file_fingerprint("data.json"), params))
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Expected runs per time-window block
+BLOCK_ROWS = 8192
+ENTRY_SUFFIX = ".pkl"
+_WINDOW_COLUMNS = ['scenario', 'duration_seconds', 'period', 'window']
+_READ_BLOCK = 1 << 20
+# Bump when the report dict or the window aggregates change shape
+FORMAT_VERSION = 1
+
+
+def file_fingerprint(path):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_READ_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _row_hashes(df, columns):
+    import pandas as pd
+
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def frame_fingerprint(df):
+    """SHA-256 of a DataFrame's column names and row hashes."""
+    digest = hashlib.sha256(json.dumps(list(map(str, df.columns))).encode())
+    digest.update(_row_hashes(df, list(df.columns)).tobytes())
+    return digest.hexdigest()
+
+
+def cache_key(kind, *parts):
+    """Entry name for kind ('report', 'windows') and JSON-serializable parts."""
+    payload = json.dumps([FORMAT_VERSION, *parts], sort_keys=True, default=str, separators=(',', ':'))
+    return f"{kind}-{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+def report_params(recent_hours, older_hours, period_bins, model_fit, outlier_method, by=None, stream=False,
+                  hypothesis_costs=False, ages_at=None):
+    """
+    The analysis parameters a cached report depends on, as a dict.
+
+    ages_at is the time age_hours is derived at, for inputs that only hold
+    created_at; it enters the key to the hour.
+    """
+    return {
+        'recent_hours': recent_hours,
+        'older_hours': older_hours,
+        'period_bins': list(period_bins),
+        'model_fit': model_fit,
+        'outlier_method': outlier_method,
+        'by': by,
+        'stream': stream,
+        'hypothesis_costs': hypothesis_costs,
+        'ages_at': ages_at.strftime('%Y-%m-%dT%H') if ages_at else None,
+    }
+
+
+def report_key(fingerprint, params):
+    """Entry name of the report for an input fingerprint and report_params()."""
+    return cache_key('report', fingerprint, params)
+
+
+class ReportCache:
+    """Size-bounded LRU directory of pickled entries."""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """The entry stored under key, or None (unreadable entries are dropped)."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            os.remove(path)
+            return None
+        os.utime(path)
+        return value
+
+    def put(self, key, value):
+        """Store value under key atomically, then evict down to max_bytes."""
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+
+    def entries(self):
+        """(path, bytes, mtime) of every entry, least recently used first."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(ENTRY_SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        entries.sort(key=lambda e: e[2])
+        return entries
+
+    def evict(self, keep=None):
+        """Remove least recently used entries until the total is within max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            os.remove(path)
+
+
+def _window_codes(age, recent_hours, older_hours, period_bins):
+    """Period index (NaN outside every period) and window (0 recent, 1 older, -1 neither) of each age."""
+    import pandas as pd
+
+    period = pd.cut(age, bins=period_bins, labels=False)
+    window = np.where(age <= recent_hours, 0, np.where(age > older_hours, 1, -1))
+    return period, window
+
+
+def window_keys(df, recent_hours, older_hours, period_bins):
+    """The columns the time-window aggregates depend on, one row per run (see row_blocks)."""
+    import pandas as pd
+
+    period, window = _window_codes(df['age_hours'].to_numpy(dtype=float), recent_hours, older_hours, period_bins)
+    return pd.DataFrame({'scenario': df['scenario'].to_numpy(), 'duration_seconds': df['duration_seconds'].to_numpy(),
+                         'period': period, 'window': window})
+
+
+def row_blocks(keys, block_rows=BLOCK_ROWS):
+    """
+    Content-defined blocks of the window_keys() rows.
+
+    Returns (fingerprint, first row, end row) per block, in row order.
+    """
+    hashes = _row_hashes(keys, _WINDOW_COLUMNS)
+    ends = np.flatnonzero(hashes % np.uint64(block_rows) == 0) + 1
+    bounds = [0] + [int(end) for end in ends if end < len(keys)] + [len(keys)]
+    return [
+        (hashlib.sha256(hashes[start:end].tobytes()).hexdigest(), start, end)
+        for start, end in zip(bounds[:-1], bounds[1:])
+        if end > start
+    ]
+
+
+def _window_aggregates(df, blocks, recent_hours, older_hours, period_bins):
+    """
+    Period moments and scenario window sums for (block id, first row, end row) blocks.
+
+    All blocks are aggregated together with bincount over integer codes;
+    returns {block id: {'periods': ..., 'windows': ...}}.
+    """
+    import pandas as pd
+
+    from analyze import period_labels
+
+    labels = period_labels(period_bins)
+    positions = np.concatenate([np.arange(start, end) for _, start, end in blocks])
+    block = np.repeat(np.arange(len(blocks)), [end - start for _, start, end in blocks])
+    frame = df.iloc[positions]
+    minutes = frame['duration_minutes'].to_numpy(dtype=float)
+    age = frame['age_hours'].to_numpy(dtype=float)
+
+    # Period moments: two passes per (block, period) so m2 stays accurate
+    period, window = _window_codes(age, recent_hours, older_hours, period_bins)
+    binned = ~np.isnan(period)
+    key = block[binned] * len(labels) + period[binned].astype(np.int64)
+    size = len(blocks) * len(labels)
+    n = np.bincount(key, minlength=size).astype(float)
+    with np.errstate(invalid='ignore'):
+        mean = np.bincount(key, minutes[binned], minlength=size) / n
+    m2 = np.bincount(key, (minutes[binned] - mean[key]) ** 2, minlength=size)
+
+    # Scenario window sums; runs in neither window (or without an age) are left out
+    codes, scenarios = pd.factorize(frame['scenario'])
+    windowed = window >= 0
+    key = (block[windowed] * len(scenarios) + codes[windowed]) * 2 + window[windowed]
+    size = len(blocks) * len(scenarios) * 2
+    counts = np.bincount(key, minlength=size).reshape(len(blocks), -1)
+    sums = np.bincount(key, minutes[windowed], minlength=size).reshape(len(blocks), -1)
+    window_index = pd.MultiIndex.from_product([scenarios, ['recent', 'older']])
+
+    aggregates = {}
+    for i, (block_id, _, _) in enumerate(blocks):
+        rows = slice(i * len(labels), (i + 1) * len(labels))
+        present = n[rows] > 0
+        periods = pd.DataFrame({'n': n[rows], 'mean': mean[rows], 'm2': m2[rows]}, index=labels)
+        present_windows = counts[i] > 0
+        windows = pd.DataFrame({'sum': sums[i], 'count': counts[i]}, index=window_index)
+        aggregates[block_id] = {'periods': periods[present], 'windows': windows[present_windows]}
+    return aggregates
+
+
+def _merge_periods(parts):
+    """Combine per-block (n, mean, m2) rows per period (Chan et al. pairwise update, all at once)."""
+    import pandas as pd
+
+    parts = pd.concat(parts)
+    n = parts['n'].groupby(level=0).sum()
+    mean = (parts['n'] * parts['mean']).groupby(level=0).sum() / n
+    spread = parts['n'] * (parts['mean'] - mean.reindex(parts.index).to_numpy()) ** 2
+    m2 = (parts['m2'] + spread).groupby(level=0).sum()
+    return n, mean, m2
+
+
+def cached_time_series(cache, df, recent_hours, older_hours, period_bins, profile=None):
+    """
+    analyze.time_series_stats() with the time-window aggregates cached per block.
+
+    Only blocks missing from the cache are aggregated; the result is the
+    same dict time_series_stats() returns.
+    """
+    import pandas as pd
+
+    from analyze import period_labels, timed, trend_table
+
+    if 'age_hours' not in df.columns:
+        return None
+
+    rows = len(df)
+    with timed(profile, 'time_series.trend_corr', rows):
+        time_corr = df['duration_seconds'].corr(df['age_hours'])
+
+    params = [recent_hours, older_hours, list(period_bins)]
+    with timed(profile, 'time_series.blocks', rows) as stage:
+        blocks = row_blocks(window_keys(df, recent_hours, older_hours, period_bins))
+        aggregates = {}
+        missing = []
+        for position, (fingerprint, start, end) in enumerate(blocks):
+            cached = cache.get(cache_key('windows', fingerprint, params))
+            if cached is None:
+                missing.append((position, start, end))
+            else:
+                aggregates[position] = cached
+        if missing:
+            computed = _window_aggregates(df, missing, recent_hours, older_hours, period_bins)
+            for position, value in computed.items():
+                cache.put(cache_key('windows', blocks[position][0], params), value)
+                aggregates[position] = value
+        stage['rows'] = sum(end - start for _, start, end in missing)
+
+    with timed(profile, 'time_series.merge', len(blocks)):
+        labels = period_labels(period_bins)
+        n, mean, m2 = _merge_periods([aggregates[p]['periods'] for p in range(len(blocks))])
+        std = np.sqrt(m2 / (n - 1).where(n > 1))
+        stats = pd.DataFrame({'avg_min': mean, 'std_min': std, 'count': n.astype(int)})
+        stats = stats.reindex([label for label in labels if label in stats.index]).round(1)
+
+        windows = pd.concat([aggregates[p]['windows'] for p in range(len(blocks))])
+        windows = windows.groupby(level=[0, 1]).sum()
+        means = (windows['sum'] / windows['count']).unstack().reindex(columns=['recent', 'older'])
+        trends = trend_table(means, df['scenario'].value_counts())
+
+    return {
+        'time_corr': time_corr,
+        'labels': labels,
+        'period_stats': stats,
+        'trends': trends,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the analysis report cache")
+    parser.add_argument('--cache', required=True, help="Cache directory")
+    parser.add_argument('--clear', action='store_true', help="Remove every entry")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.cache):
+        print(f"Error: Cache directory '{args.cache}' not found", file=sys.stderr)
+        sys.exit(1)
+    cache = ReportCache(args.cache)
+    if args.clear:
+        removed = len(cache.entries())
+        cache.clear()
+        print(f"Removed {removed} entries from {args.cache}")
+        return
+
+    entries = cache.entries()
+    kinds = {}
+    for path, size, _ in entries:
+        kind = os.path.basename(path).split('-', 1)[0]
+        count, total = kinds.get(kind, (0, 0))
+        kinds[kind] = (count + 1, total + size)
+    print(f"{args.cache}: {len(entries)} entries, {sum(s for _, s, _ in entries) / 2**20:.1f} MB")
+    for kind, (count, total) in sorted(kinds.items()):
+        print(f"  {kind:10s} {count:6d} entries {total / 2**20:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Machine-readable form of the analysis report.
+
+report_to_dict() turns the dict built by analyze.compute_report() (or
+streaming.stream_report()) into plain JSON types: DataFrames become lists
+of rows and NaN becomes null. iter_ndjson() flattens the same result into
+one record per line, each tagged with a "record" type, for tools that
+ingest logs line by line:
+
+    {"record": "summary", "n_runs": 152, "n_scenarios": 7, "r2": 0.81, ...}
+    {"record": "correlation", "metric": "blast_radius", "value": 0.74}
+    {"record": "coefficient", "feature": "edges", "value": 0.0123, "importance": 0.41}
+    {"record": "outlier", "scenario": "lambda_timeout", "score": 4.2, ...}
+    {"record": "scenario", "scenario": "combined_all", "avg_min": 18.2, ...}
+    {"record": "period", "period": "Last 24h", "avg_min": 15.1, ...}
+    {"record": "scenario_trend", "scenario": "shared_sg_open", "change_pct": 12.5, ...}
+    {"record": "group", "scenario": "lambda_timeout", "scale_multiplier": 10, "n_runs": 40, "r2": 0.72, ...}
+    {"record": "hypothesis_cost", "scale_multiplier": 25, "category": "compute", "seconds_per_run": 310.5, ...}
+    {"record": "stage", "stage": "model", "seconds": 0.004, "rows": 152}
+"""
+
+import math
+
+
+def _number(value, digits=None):
+    """A float for JSON, or None for NaN/missing values."""
+    if value is None:
+        return None
+    value = float(value)
+    if math.isnan(value):
+        return None
+    return round(value, digits) if digits is not None else value
+
+
+def _rows(frame, key, digits=2):
+    """DataFrame rows as dicts, with the index under key."""
+    return [
+        {key: str(index), **{col: _number(value, digits) for col, value in row.items()}}
+        for index, row in frame.iterrows()
+    ]
+
+
+def _rounded(value, digits):
+    """value with every float in it (through dicts and lists) rounded."""
+    if isinstance(value, dict):
+        return {k: _rounded(v, digits) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_rounded(v, digits) for v in value]
+    return _number(value, digits) if isinstance(value, float) else value
+
+
+def _groups(grouped):
+    """grouped.group_reports() output with rounded numbers and named keys."""
+    groups = []
+    for group in grouped['groups']:
+        row = dict(zip(grouped['keys'], group['key']))
+        row.update({k: _rounded(v, 2) for k, v in group.items() if k not in ('key', 'correlations', 'model')})
+        row['correlations'] = _rounded(group['correlations'], 4)
+        model = group['model']
+        row['model'] = model and {
+            'intercept': _number(model['intercept'], 2),
+            'coefficients': _rounded(model['coefficients'], 6),
+            'r2': _number(model['r2'], 4),
+            'importance': _rounded(model['importance'], 4),
+        }
+        groups.append(row)
+    return {'by': grouped['keys'], 'groups': groups}
+
+
+def report_to_dict(report, stages=None):
+    """JSON-serializable dict of a compute_report() result, plus optional stage timings."""
+    from analyze import trend_label
+    from outliers import to_records
+
+    result = {
+        'n_runs': int(report['n_runs']),
+        'n_scenarios': int(report['n_scenarios']),
+        'correlations': {metric: _number(value, 4) for metric, value in report['correlations'].items()},
+        'model': {
+            'intercept': _number(report['intercept'], 2),
+            'coefficients': {feat: _number(coef, 6) for feat, coef in report['coefficients'].items()},
+            'r2': _number(report['r2'], 4),
+            'importance': {feat: _number(value, 4) for feat, value in report['importance'].items()},
+        },
+        'outliers': {
+            'method': report['outlier_method'],
+            'description': report['outlier_description'],
+            'runs': to_records(report['outliers'], report['outlier_method']),
+        },
+        'scenario_summary': _rows(report['summary'], 'scenario'),
+        'time_series': None,
+    }
+
+    ts = report['time_series']
+    if ts is not None:
+        trend, _ = trend_label(ts['time_corr'])
+        result['time_series'] = {
+            'time_corr': _number(ts['time_corr'], 4),
+            'trend': trend,
+            'periods': _rows(ts['period_stats'].reindex([p for p in ts['labels'] if p in ts['period_stats'].index]),
+                             'period'),
+            'scenario_trends': _rows(ts['trends'], 'scenario'),
+        }
+
+    if report.get('groups'):
+        result['groups'] = _groups(report['groups'])
+
+    if 'hypothesis_costs' in report:
+        result['hypothesis_costs'] = _rounded(report['hypothesis_costs'], 3)
+
+    if stages is not None:
+        result['profile'] = [
+            {'stage': s['stage'], 'seconds': round(s['seconds'], 6), 'rows': s['rows']} for s in stages
+        ]
+    return result
+
+
+def iter_ndjson(result):
+    """Flatten a report_to_dict() result into typed NDJSON records."""
+    model = result['model']
+    ts = result['time_series']
+    yield {
+        'record': 'summary',
+        'n_runs': result['n_runs'],
+        'n_scenarios': result['n_scenarios'],
+        'intercept': model['intercept'],
+        'r2': model['r2'],
+        'outlier_method': result['outliers']['method'],
+        'outlier_count': len(result['outliers']['runs']),
+        'trend': ts['trend'] if ts else None,
+        'time_corr': ts['time_corr'] if ts else None,
+    }
+    for metric, value in result['correlations'].items():
+        yield {'record': 'correlation', 'metric': metric, 'value': value}
+    for feat, coef in model['coefficients'].items():
+        yield {'record': 'coefficient', 'feature': feat, 'value': coef, 'importance': model['importance'][feat]}
+    for run in result['outliers']['runs']:
+        yield {'record': 'outlier', **run}
+    for row in result['scenario_summary']:
+        yield {'record': 'scenario', **row}
+    if ts:
+        for row in ts['periods']:
+            yield {'record': 'period', **row}
+        for row in ts['scenario_trends']:
+            yield {'record': 'scenario_trend', **row}
+    for group in (result.get('groups') or {}).get('groups', []):
+        model = group['model'] or {}
+        ts = group['time_series'] or {}
+        yield {
+            'record': 'group',
+            **{key: group[key] for key in result['groups']['by']},
+            **{k: group[k] for k in ('n_runs', 'avg_min', 'std_min', 'p50_min', 'p95_min')},
+            'r2': model.get('r2'),
+            'intercept': model.get('intercept'),
+            'outliers_slower': (group['outliers'] or {}).get('slower'),
+            'outliers_faster': (group['outliers'] or {}).get('faster'),
+            'trend': ts.get('trend'),
+            'change_pct': ts.get('change_pct'),
+        }
+    costs = result.get('hypothesis_costs') or {}
+    for scale in costs.get('scales', []):
+        for row in (scale['costs'] or {}).get('categories', []):
+            yield {'record': 'hypothesis_cost', costs['by']: scale['scale'], 'n_runs': scale['n_runs'],
+                   'r2': scale['costs']['r2'], **row}
+    for stage in result.get('profile') or []:
+        yield {'record': 'stage', **stage}
@@ -0,0 +1,389 @@
+"""
+Incremental on-disk run store for scale test analysis.
+
+Runs are kept as a Parquet dataset partitioned by day
+(`<store>/date=YYYY-MM-DD/part-*.parquet`) alongside a small `_meta.json`
+holding the high-water mark: the newest `created_at` in the store and the
+run IDs seen at that timestamp. Fetches only append runs past the mark, and
+loads read back just the columns the analysis needs. ingest_results.py
+backfills the same partitions from change-results.json artifacts without
+moving the mark; fetches skip runs whose IDs are already stored. A
+backfilled run whose time was only estimated (from a file's mtime) is
+flagged `created_at_estimated`; it still needs a day partition, but loads
+read its created_at back as null.
+
+Every append writes one more part file per day, so once a day holds more
+than COMPACT_PARTS of them they are rewritten as one. The new file is
+staged under a `_` name (which readers ignore) and a `_compacting.json`
+journal lists the parts it replaces; if a compaction is interrupted, the
+next load or write of the store finishes it.
+
+Usage:
+    python run_store.py --store runs/ --fetch    # Append new runs from the API
+    python run_store.py --store runs/            # Show what is in the store
+    python run_store.py --store runs/ --compact  # Rewrite every day as a single file
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import uuid
+from datetime import datetime, timezone
+
+from fetch import DEFAULT_PAGE_SIZE, DEFAULT_WORKERS, FetchError, fetch_pages, iter_page_runs, to_record
+
+META_FILE = "_meta.json"
+INCOMING_DIR = "_incoming"
+# One row per hypothesis of a backfilled run (see ingest_results.py)
+HYPOTHESES_DIR = "_hypotheses"
+COMPACT_JOURNAL = "_compacting.json"
+# Part files a day may hold before they are compacted into one
+COMPACT_PARTS = 16
+
+# Columns loaded by default - everything analyze() and analyze_time_series() read
+ANALYSIS_COLUMNS = [
+    "scenario", "duration_seconds", "risk_count", "blast_radius",
+    "edges", "observations", "scale_multiplier", "run_id", "created_at",
+]
+
+SCHEMA_FIELDS = [
+    ("run_id", "string"),
+    ("scenario", "string"),
+    ("created_at", "timestamp"),
+    ("created_at_estimated", "bool"),
+    ("duration_seconds", "float64"),
+    ("risk_count", "int64"),
+    ("blast_radius", "int64"),
+    ("edges", "int64"),
+    ("observations", "int64"),
+    ("scale_multiplier", "int64"),
+    ("high_risk_count", "int64"),
+    ("medium_risk_count", "int64"),
+    ("low_risk_count", "int64"),
+    ("hypotheses", "int64"),
+    ("hypotheses_proven", "int64"),
+    ("hypotheses_disproven", "int64"),
+]
+
+HYPOTHESIS_FIELDS = [
+    ("run_id", "string"),
+    ("created_at", "timestamp"),
+    ("title", "string"),
+    ("status", "string"),
+    ("num_observations", "int64"),
+]
+
+
+def _schema(fields=SCHEMA_FIELDS):
+    import pyarrow as pa
+
+    types = {
+        "string": pa.string(),
+        "timestamp": pa.timestamp("ms", tz="UTC"),
+        "float64": pa.float64(),
+        "int64": pa.int64(),
+        "bool": pa.bool_(),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in fields])
+
+
+def parse_timestamp(value):
+    """Parse an ISO-8601 timestamp (or epoch milliseconds) into an aware datetime."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def read_meta(store_dir):
+    """Return the store's high-water mark as (created_at or None, run IDs at that time)."""
+    path = os.path.join(store_dir, META_FILE)
+    if not os.path.exists(path):
+        return None, set()
+    with open(path) as f:
+        meta = json.load(f)
+    hwm = meta.get("high_water_mark")
+    return (parse_timestamp(hwm) if hwm else None), set(meta.get("ids_at_mark", []))
+
+
+def _write_meta(store_dir, hwm, ids_at_mark):
+    path = os.path.join(store_dir, META_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            "high_water_mark": hwm.isoformat() if hwm else None,
+            "ids_at_mark": sorted(ids_at_mark),
+        }, f)
+    os.replace(tmp_path, path)
+
+
+def is_new(record, hwm, ids_at_mark):
+    """True if a record is past the store's high-water mark."""
+    if hwm is None:
+        return True
+    created = parse_timestamp(record["created_at"])
+    return created > hwm or (created == hwm and record.get("run_id") not in ids_at_mark)
+
+
+def _partitions(directory):
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.startswith("date=")]
+
+
+def _part_files(partition):
+    return sorted(name for name in os.listdir(partition) if name.startswith("part-") and name.endswith(".parquet"))
+
+
+def _finish_compaction(partition):
+    """Complete (or discard) a compaction of partition that was interrupted."""
+    journal = os.path.join(partition, COMPACT_JOURNAL)
+    try:
+        with open(journal) as f:
+            plan = json.load(f)
+    except FileNotFoundError:
+        # Staged before the journal was written: the parts are untouched
+        for name in os.listdir(partition):
+            if name.startswith("_part-") and name.endswith(".parquet"):
+                os.remove(os.path.join(partition, name))
+        return
+    staged = os.path.join(partition, "_" + plan["final"])
+    if os.path.exists(staged):
+        for name in plan["replaces"]:
+            try:
+                os.remove(os.path.join(partition, name))
+            except FileNotFoundError:
+                pass
+        try:
+            os.replace(staged, os.path.join(partition, plan["final"]))
+        except FileNotFoundError:
+            pass  # Another process finished it first
+    try:
+        os.remove(journal)
+    except FileNotFoundError:
+        pass
+
+
+def compact_partition(partition, fields=SCHEMA_FIELDS, max_parts=COMPACT_PARTS):
+    """
+    Rewrite a day's part files as one if it has more than max_parts.
+
+    Returns the number of files merged (0 if the day was left alone).
+    """
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    _finish_compaction(partition)
+    parts = _part_files(partition)
+    if len(parts) <= max(max_parts, 1):
+        return 0
+    table = ds.dataset([os.path.join(partition, name) for name in parts], schema=_schema(fields),
+                       format="parquet").to_table()
+    final = f"part-{uuid.uuid4().hex}.parquet"
+    pq.write_table(table, os.path.join(partition, "_" + final))
+    tmp_path = os.path.join(partition, COMPACT_JOURNAL + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump({"final": final, "replaces": parts}, f)
+    os.replace(tmp_path, os.path.join(partition, COMPACT_JOURNAL))
+    _finish_compaction(partition)
+    return len(parts)
+
+
+def compact_store(store_dir, max_parts=1):
+    """Compact every day of the store and of its hypotheses table; returns the files merged."""
+    merged = sum(compact_partition(partition, SCHEMA_FIELDS, max_parts) for partition in _partitions(store_dir))
+    hypotheses_dir = os.path.join(store_dir, HYPOTHESES_DIR)
+    return merged + sum(compact_partition(partition, HYPOTHESIS_FIELDS, max_parts)
+                        for partition in _partitions(hypotheses_dir))
+
+
+def _dataset(directory, fields=SCHEMA_FIELDS):
+    import pyarrow.dataset as ds
+
+    for partition in _partitions(directory):
+        if os.path.exists(os.path.join(partition, COMPACT_JOURNAL)):
+            _finish_compaction(partition)
+    return ds.dataset(directory, schema=_schema(fields), format="parquet", partitioning="hive",
+                      exclude_invalid_files=True, ignore_prefixes=["_", "."])
+
+
+def stored_run_ids(store_dir, hypotheses=False):
+    """Every run ID already in the store (or, with hypotheses, in its hypotheses table)."""
+    directory = os.path.join(store_dir, HYPOTHESES_DIR) if hypotheses else store_dir
+    if not os.path.isdir(directory):
+        return set()
+    fields = HYPOTHESIS_FIELDS if hypotheses else SCHEMA_FIELDS
+    table = _dataset(directory, fields).to_table(columns=["run_id"])
+    return set(table.column("run_id").drop_null().to_pylist())
+
+
+def write_rows(store_dir, records, fields=SCHEMA_FIELDS):
+    """
+    Write records to the store's day partitions, one file per day.
+
+    Records without a `created_at` cannot be placed in the store and are
+    skipped; the high-water mark is left alone. fields is the table's
+    schema (HYPOTHESIS_FIELDS for the hypotheses table). A day left with
+    more than COMPACT_PARTS files is compacted. Returns the rows written,
+    by day.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    by_day = {}
+    for record in records:
+        if not record.get("created_at"):
+            continue
+        row = {name: record.get(name) for name, _ in fields}
+        row["created_at"] = parse_timestamp(record["created_at"])
+        by_day.setdefault(row["created_at"].strftime("%Y-%m-%d"), []).append(row)
+
+    schema = _schema(fields)
+    for day, rows in sorted(by_day.items()):
+        partition = os.path.join(store_dir, f"date={day}")
+        os.makedirs(partition, exist_ok=True)
+        table = pa.Table.from_pylist(rows, schema=schema)
+        name = f"part-{uuid.uuid4().hex}.parquet"
+        # Staged under a `_` name so readers skip it until it is complete
+        tmp_path = os.path.join(partition, f"_{name}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(partition, name))
+        compact_partition(partition, fields)
+    return by_day
+
+
+def append_runs(store_dir, records):
+    """
+    Append records past the high-water mark to the store, one file per day.
+
+    Records without a `created_at` cannot be placed in the store, and runs
+    already in it (backfilled by ingest_results.py, say) are not added
+    twice; both are skipped. Returns the number of runs appended.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    hwm, ids_at_mark = read_meta(store_dir)
+    stored = stored_run_ids(store_dir)
+
+    by_day = write_rows(store_dir, (
+        record for record in records
+        if record.get("created_at") and is_new(record, hwm, ids_at_mark)
+        and (record.get("run_id") is None or record["run_id"] not in stored)
+    ))
+    if not by_day:
+        return 0
+
+    new_hwm, new_ids = hwm, set(ids_at_mark)
+    appended = 0
+    for rows in by_day.values():
+        appended += len(rows)
+        for row in rows:
+            if new_hwm is None or row["created_at"] > new_hwm:
+                new_hwm, new_ids = row["created_at"], {row["run_id"]}
+            elif row["created_at"] == new_hwm:
+                new_ids.add(row["run_id"])
+
+    # Meta is written last, so a crash mid-append only leaves rows that the
+    # next fetch re-appends rather than a mark that skips unsaved rows
+    _write_meta(store_dir, new_hwm, {i for i in new_ids if i is not None})
+    return appended
+
+
+def fetch_into_store(store_dir, page_size=DEFAULT_PAGE_SIZE, workers=DEFAULT_WORKERS):
+    """
+    Fetch runs newer than the store's high-water mark and append them.
+
+    The mark is sent to the API as `since`; paging also stops at the first
+    page that reaches back past the mark, since results come newest first.
+    Pages land in `<store>/_incoming` so an interrupted fetch resumes.
+    """
+    hwm, ids_at_mark = read_meta(store_dir)
+    incoming = os.path.join(store_dir, INCOMING_DIR)
+    params = {"since": hwm.isoformat()} if hwm else None
+
+    def reached_mark(runs):
+        return hwm is not None and any(
+            not is_new(to_record(run), hwm, ids_at_mark)
+            for run in runs if run.get('createdAt') or run.get('timestamp')
+        )
+
+    fetch_pages(incoming, page_size=page_size, workers=workers, params=params, stop=reached_mark)
+    appended = append_runs(store_dir, (to_record(run) for run in iter_page_runs(incoming)))
+    shutil.rmtree(incoming)
+    return appended
+
+
+def add_age_hours(df, now=None):
+    """Derive an `age_hours` column from `created_at`, relative to `now` (default the current time)."""
+    now = now or datetime.now(timezone.utc)
+    df["age_hours"] = (now - df["created_at"]).dt.total_seconds() / 3600
+    return df
+
+
+def load_store(store_dir, columns=None, now=None, ages=True):
+    """
+    Load the store as a DataFrame, reading only the requested columns.
+
+    An `age_hours` column is derived from `created_at` (see add_age_hours)
+    so the time series analysis works unchanged; with ages=False it is left
+    out. Estimated creation times read back as null, so those runs have no
+    age and stay out of every time window. Files written before a column
+    was added read it back as nulls.
+    """
+    columns = list(columns or ANALYSIS_COLUMNS)
+    read = columns
+    if "created_at" in columns and "created_at_estimated" not in columns:
+        read = columns + ["created_at_estimated"]
+    df = _dataset(store_dir).to_table(columns=read).to_pandas()
+
+    if "created_at" in columns:
+        df.loc[df["created_at_estimated"].eq(True), "created_at"] = None
+        df = df[columns]
+
+    if ages and "created_at" in df.columns:
+        add_age_hours(df, now)
+    return df
+
+
+def load_hypotheses(store_dir):
+    """The store's hypotheses table as a DataFrame, or None if nothing was backfilled with them."""
+    directory = os.path.join(store_dir, HYPOTHESES_DIR)
+    if not os.path.isdir(directory):
+        return None
+    return _dataset(directory, HYPOTHESIS_FIELDS).to_table().to_pandas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the local scale test run store")
+    parser.add_argument('--store', required=True, help="Run store directory")
+    parser.add_argument('--fetch', action='store_true', help="Append runs newer than the high-water mark")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help="Runs per page")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Page requests in flight")
+    parser.add_argument('--compact', action='store_true', help="Rewrite every day of the store as a single file")
+    args = parser.parse_args()
+
+    if args.fetch:
+        try:
+            appended = fetch_into_store(args.store, args.page_size, args.workers)
+        except FetchError as e:
+            print(f"Error fetching from API: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Appended {appended} new runs to {args.store}")
+    if args.compact:
+        print(f"Compacted {compact_store(args.store)} files in {args.store}")
+
+    hwm, _ = read_meta(args.store)
+    df = load_store(args.store, columns=["scenario"]) if os.path.isdir(args.store) else None
+    if df is None or df.empty:
+        print(f"{args.store} is empty")
+    elif hwm is None:
+        print(f"{args.store}: {len(df)} runs (backfilled only, nothing fetched yet)")
+    else:
+        print(f"{args.store}: {len(df)} runs, newest fetched at {hwm.isoformat()}")
+
+
+if __name__ == "__main__":
+    main()
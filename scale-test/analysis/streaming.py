@@ -0,0 +1,277 @@
+"""
+Streaming (out-of-core) analysis for run histories too large to hold in memory.
+
+Records are read from NDJSON (one JSON object per line) or from a JSON array
+that is decoded incrementally, in chunks of `chunk_size` rows. Each chunk
+updates running aggregates and is then dropped:
+
+- co-moments of duration and every metric (correlations, and the centered
+  normal equations for the linear fit and feature importance)
+- per-scenario counts, means and variances (scenario summary)
+- per-period counts, means and variances (time series)
+- per-scenario window sums (recent vs older trends)
+
+A second pass scores residuals against the fitted model to find outliers;
+the scenario_mad detector takes one more pass, holding one float per run to
+get exact per-scenario medians. rolling_quantile needs every run of a
+scenario in age order and is not available here.
+The result is the same report dict analyze.compute_report() builds, so
+print_report() output is identical to the in-memory path.
+
+Usage:
+    python streaming.py runs.ndjson
+    python streaming.py runs.json --chunk-size 100000
+"""
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from analyze import (
+    FEATURES, METRICS, OLDER_HOURS, OUTLIER_METHODS, PERIOD_BINS, RECENT_HOURS,
+    finalize_summary, period_labels, print_report, timed, trend_table, trend_windows,
+)
+from moments import RunningMoments
+from outliers import DESCRIPTIONS, baselines_from_arrays, flagged, log_ratio, score_runs
+
+DEFAULT_CHUNK_SIZE = 50_000
+STREAMABLE_OUTLIER_METHODS = ['scenario_mad', 'residual']
+READ_BLOCK_SIZE = 1 << 20
+
+
+class EmptyInputError(ValueError):
+    """Raised when the streamed file holds no runs."""
+
+
+def iter_records(filepath):
+    """Yield records from an NDJSON file or a top-level JSON array, one at a time."""
+    decoder = json.JSONDecoder()
+    with open(filepath) as f:
+        buf = f.read(READ_BLOCK_SIZE)
+        stripped = buf.lstrip()
+        if not stripped.startswith('['):
+            # NDJSON: one record per line
+            for line in _iter_lines(buf, f):
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        buf, pos = stripped[1:], 0
+        while True:
+            # Skip whitespace and separators without copying the buffer
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf) and buf[pos] == ']':
+                return
+            try:
+                record, pos_end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                more = f.read(READ_BLOCK_SIZE)
+                if not more:
+                    raise
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield record
+            pos = pos_end
+
+
+def _iter_lines(head, f):
+    pending = head
+    for block in iter(lambda: f.read(READ_BLOCK_SIZE), ''):
+        pending += block
+        *lines, pending = pending.split('\n')
+        yield from lines
+    *lines, pending = pending.split('\n')
+    yield from lines
+    yield pending
+
+
+def iter_chunks(records, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Group an iterable of records into DataFrames of at most chunk_size rows."""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield _frame(chunk)
+            chunk = []
+    if chunk:
+        yield _frame(chunk)
+
+
+def _frame(chunk):
+    df = pd.DataFrame(chunk)
+    df['duration_minutes'] = df['duration_seconds'] / 60
+    return df
+
+
+class GroupMoments:
+    """Per-group count, mean and M2 (sum of squared deviations) for a set of columns."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.n = pd.Series(dtype=float)
+        self.mean = pd.DataFrame(columns=self.columns, dtype=float)
+        self.m2 = pd.DataFrame(columns=self.columns, dtype=float)
+
+    def update(self, df, keys):
+        grouped = df.groupby(keys, sort=False, observed=True)[self.columns]
+        n_b = grouped.size().astype(float)
+        mean_b = grouped.mean()
+        m2_b = grouped.var(ddof=0).mul(n_b, axis=0)
+
+        index = self.n.index.append(n_b.index.difference(self.n.index, sort=False))
+        n_a = self.n.reindex(index, fill_value=0.0)
+        mean_a = self.mean.reindex(index).fillna(0.0)
+        m2_a = self.m2.reindex(index).fillna(0.0)
+        n_b = n_b.reindex(index, fill_value=0.0)
+        mean_b = mean_b.reindex(index).fillna(0.0)
+        m2_b = m2_b.reindex(index).fillna(0.0)
+
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        self.mean = mean_a + delta.mul(n_b / n, axis=0)
+        self.m2 = m2_a + m2_b + (delta ** 2).mul(n_a * n_b / n, axis=0)
+        self.n = n
+
+    def std(self, ddof=1):
+        """Sample standard deviation per group (NaN where n <= ddof)."""
+        denom = (self.n - ddof).where(self.n > ddof)
+        return np.sqrt(self.m2.div(denom, axis=0))
+
+
+def stream_report(filepath, chunk_size=DEFAULT_CHUNK_SIZE, recent_hours=RECENT_HOURS,
+                  older_hours=OLDER_HOURS, period_bins=PERIOD_BINS, model_fit=None,
+                  outlier_method=OUTLIER_METHODS[0], profile=None):
+    """
+    Build the analyze.compute_report() dict by streaming filepath two or three times.
+
+    Only running aggregates and the (usually small) set of outliers are kept
+    in memory; every chunk is discarded once it has been folded in.
+
+    As in compute_report(), a model_fit from model_state.py replaces the
+    regression fitted on the streamed runs. Raises ValueError for outlier
+    methods that cannot be streamed, and EmptyInputError if the file holds
+    no runs. profile is the same stage hook compute_report() takes; here
+    each pass over the file is one stage.
+
+    As with a DataFrame of every run, the time series is reported if any
+    run has age_hours, and runs without one are left out of it.
+    """
+    if outlier_method not in STREAMABLE_OUTLIER_METHODS:
+        raise ValueError(f"Outlier method '{outlier_method}' is not available in streaming mode "
+                         f"(choose from {', '.join(STREAMABLE_OUTLIER_METHODS)})")
+    labels = period_labels(period_bins)
+    moments = RunningMoments(['duration_seconds'] + METRICS)
+    age_moments = RunningMoments(['duration_seconds', 'age_hours'])
+    scenarios = GroupMoments(['duration_minutes', 'edges', 'blast_radius'])
+    periods = GroupMoments(['duration_minutes'])
+    window_sums = pd.DataFrame(columns=['recent', 'older'], dtype=float)
+    window_counts = pd.DataFrame(columns=['recent', 'older'], dtype=float)
+    has_age = False
+
+    # Pass 1: running aggregates
+    with timed(profile, 'pass1.aggregates') as stage:
+        for df in iter_chunks(iter_records(filepath), chunk_size):
+            moments.update(df[moments.columns].to_numpy())
+            scenarios.update(df, 'scenario')
+
+            if 'age_hours' in df.columns:
+                has_age = True
+                aged = df['age_hours'].notna().to_numpy()
+                age_moments.update(df.loc[aged, age_moments.columns].to_numpy())
+                df['period'] = pd.cut(df['age_hours'], bins=period_bins, labels=labels).astype(object)
+                periods.update(df, 'period')
+
+                window = pd.Series(trend_windows(df['age_hours'], recent_hours, older_hours), index=df.index)
+                grouped = df.groupby(['scenario', window], sort=False)['duration_minutes']
+                sums = grouped.sum().unstack().reindex(columns=['recent', 'older'])
+                counts = grouped.count().unstack().reindex(columns=['recent', 'older'])
+                window_sums = window_sums.add(sums, fill_value=0)
+                window_counts = window_counts.add(counts, fill_value=0)
+        stage['rows'] = moments.n
+    if moments.n == 0:
+        raise EmptyInputError(f"No runs in {filepath}")
+
+    correlations = {m: moments.corr('duration_seconds', m) for m in METRICS}
+    if model_fit is not None:
+        intercept = model_fit['intercept']
+        coef = np.array([model_fit['coefficients'][f] for f in FEATURES])
+        r2 = model_fit['r2']
+        standardized = np.array([model_fit['importance'][f] for f in FEATURES])
+    else:
+        intercept, coef, r2, standardized = moments.linear_fit(FEATURES, 'duration_seconds')
+
+    def scored_chunks():
+        for df in iter_chunks(iter_records(filepath), chunk_size):
+            df['predicted'] = intercept + df[FEATURES].to_numpy(dtype=float) @ coef
+            df['residual_pct'] = (df['duration_seconds'] - df['predicted']) / df['predicted'] * 100
+            yield df
+
+    params = {}
+    if outlier_method == 'scenario_mad':
+        # Pass 2b: per-scenario log ratios for exact medians
+        with timed(profile, 'pass2.baselines', moments.n):
+            ratios = {}
+            for df in scored_chunks():
+                for scenario, values in log_ratio(df).groupby(df['scenario'], sort=False):
+                    ratios.setdefault(scenario, []).append(values.to_numpy())
+            params['baselines'] = baselines_from_arrays({s: np.concatenate(v) for s, v in ratios.items()})
+            del ratios
+
+    # Pass 2: score runs against the fitted model, keeping only outliers
+    with timed(profile, 'pass2.outliers', moments.n):
+        outliers = [flagged(df, score_runs(df, outlier_method, **params)) for df in scored_chunks()]
+        outliers = pd.concat(outliers).sort_values('score', ascending=False, kind='stable')
+
+    std = scenarios.std()
+    summary = pd.DataFrame({
+        'avg_min': scenarios.mean['duration_minutes'],
+        'std_min': std['duration_minutes'],
+        'avg_edges': scenarios.mean['edges'],
+        'avg_nodes': scenarios.mean['blast_radius'],
+    }).sort_index()
+
+    time_series = None
+    if has_age:
+        period_stats = pd.DataFrame({
+            'avg_min': periods.mean['duration_minutes'],
+            'std_min': periods.std()['duration_minutes'],
+            'count': periods.n,
+        }).round(1)
+        means = window_sums / window_counts
+        time_series = {
+            'time_corr': age_moments.corr('duration_seconds', 'age_hours') if age_moments.n > 1 else np.nan,
+            'labels': labels,
+            'period_stats': period_stats,
+            'trends': trend_table(means, scenarios.n),
+        }
+
+    return {
+        'n_runs': moments.n,
+        'n_scenarios': len(scenarios.n),
+        'correlations': correlations,
+        'intercept': intercept,
+        'coefficients': dict(zip(FEATURES, coef)),
+        'r2': r2,
+        'importance': dict(zip(FEATURES, np.abs(standardized))),
+        'outlier_method': outlier_method,
+        'outlier_description': DESCRIPTIONS[outlier_method],
+        'outliers': outliers,
+        'summary': finalize_summary(summary),
+        'time_series': time_series,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze scale test durations without loading all runs")
+    parser.add_argument('path', help="NDJSON file or JSON array of run records")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    args = parser.parse_args()
+
+    print_report(stream_report(args.path, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic run generator for benchmarking the analysis at scale.
+
+The shape follows the real history in analyze.SAMPLE_DATA: a weighted
+scenario mix, blast radius of a few hundred to ~1,100 nodes, edges around
+2-3x the node count, and a heavy tail for lambda_timeout where some
+runs reach 7k-12k edges. Durations come from a linear model of blast
+radius, edges and observations plus per-scenario lognormal noise. Ages
+spread uniformly over the last `max_age_hours`.
+
+Usage:
+    python synthetic.py --runs 100000 --out runs.ndjson
+    python synthetic.py --runs 1000000 --seed 7 --out runs.ndjson
+    python synthetic.py --runs 200000 --extra-scenarios 30 --scales 1,5,10,25,50 --out runs.ndjson
+"""
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+# scenario: (weight, mean blast radius, duration noise sigma)
+SCENARIOS = {
+    "shared_sg_open": (0.16, 700, 0.30),
+    "lambda_timeout": (0.16, 950, 0.25),
+    "vpc_peering_change": (0.16, 650, 0.20),
+    "central_sns_change": (0.14, 620, 0.18),
+    "combined_all": (0.13, 800, 0.22),
+    "combined_network": (0.13, 740, 0.22),
+    "kms_orphan_simulation": (0.12, 600, 0.25),
+}
+# Share of lambda_timeout runs in the 7k-12k edge tail
+LAMBDA_TAIL_SHARE = 0.25
+
+
+def generate_runs(n, seed=0, max_age_hours=240, extra_scenarios=0, scales=None):
+    """
+    Generate n synthetic run records as a DataFrame.
+
+    Args:
+        n: Number of runs
+        seed: RNG seed; the same seed always gives the same runs
+        max_age_hours: Runs are spread uniformly over this many hours
+        extra_scenarios: Additional generic scenarios beyond the real ones,
+            to benchmark many-scenario histories
+        scales: scale_multiplier values to spread runs over. Blast radius,
+            edges and observations grow in proportion to scale / 5 (the
+            nightly default), so durations follow. Without scales there
+            is no scale_multiplier column.
+    """
+    rng = np.random.default_rng(seed)
+
+    names = list(SCENARIOS)
+    weights = np.array([SCENARIOS[s][0] for s in names])
+    mean_nodes = np.array([SCENARIOS[s][1] for s in names], dtype=float)
+    sigma = np.array([SCENARIOS[s][2] for s in names])
+    if extra_scenarios:
+        names += [f"scenario_{i:03d}" for i in range(extra_scenarios)]
+        weights = np.concatenate([weights, np.full(extra_scenarios, weights.mean())])
+        mean_nodes = np.concatenate([mean_nodes, rng.uniform(400, 1000, extra_scenarios)])
+        sigma = np.concatenate([sigma, rng.uniform(0.15, 0.35, extra_scenarios)])
+    weights = weights / weights.sum()
+
+    idx = rng.choice(len(names), size=n, p=weights)
+    blast_radius = np.clip(rng.normal(mean_nodes[idx], 150), 100, None).round()
+    edges = blast_radius * rng.uniform(2.2, 3.2, n)
+
+    # lambda_timeout heavy tail: a share of runs fan out to 7k-12k edges
+    tail = (np.array(names)[idx] == "lambda_timeout") & (rng.random(n) < LAMBDA_TAIL_SHARE)
+    edges[tail] = rng.uniform(7000, 12500, tail.sum())
+    edges = edges.round()
+
+    observations = np.clip(blast_radius * 0.36 + rng.normal(0, 30, n), 50, None).round()
+    noise = rng.lognormal(0, sigma[idx])
+    risk_count = rng.poisson(0.6, n)
+    age_hours = rng.uniform(0, max_age_hours, n).round(1)
+
+    # Drawn last so runs without scales stay the same for a given seed
+    scale = None
+    if scales:
+        scale = rng.choice(np.asarray(scales), size=n)
+        factor = scale / 5
+        blast_radius = (blast_radius * factor).round()
+        edges = (edges * factor).round()
+        observations = (observations * factor).round()
+
+    expected = 250 + 0.4 * blast_radius + 0.01 * edges + 1.8 * observations
+    duration = expected * noise
+
+    runs = pd.DataFrame({
+        "scenario": pd.Categorical.from_codes(idx, names).astype(str),
+        "duration_seconds": duration.round(),
+        "risk_count": risk_count,
+        "blast_radius": blast_radius.astype(int),
+        "edges": edges.astype(int),
+        "observations": observations.astype(int),
+        "age_hours": age_hours,
+    })
+    if scale is not None:
+        runs["scale_multiplier"] = scale
+    return runs
+
+
+def write_ndjson(df, path):
+    """Write runs to an NDJSON file, one record per line."""
+    with open(path, 'w') as f:
+        for record in df.to_dict('records'):
+            f.write(json.dumps(record) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic scale test runs")
+    parser.add_argument('--runs', type=int, default=10_000, help="Number of runs")
+    parser.add_argument('--seed', type=int, default=0, help="RNG seed")
+    parser.add_argument('--extra-scenarios', type=int, default=0, help="Generic scenarios to add")
+    parser.add_argument('--scales', type=str, help="Comma-separated scale_multiplier values to spread runs over, e.g. 1,5,10,25,50")
+    parser.add_argument('--out', required=True, help="NDJSON output file")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",")] if args.scales else None
+    write_ndjson(generate_runs(args.runs, args.seed, extra_scenarios=args.extra_scenarios, scales=scales), args.out)
+    print(f"Wrote {args.runs} runs to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
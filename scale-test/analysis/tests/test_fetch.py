@@ -0,0 +1,200 @@
+"""fetch.fetch_pages() against a stub dashboard API on localhost."""
+
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from fetch import FetchError, fetch_pages, iter_page_runs, page_path
+
+PAGE_SIZE = 10
+
+
+class StubAPI:
+    """Serves runs newest first from /api/results?page=N&limit=M."""
+
+    def __init__(self, n_runs, total_pages=False, paginated=True):
+        self.runs = [{"runId": str(i), "scenario": "s", "overmindDurationMs": 1000 * (i + 1)}
+                     for i in range(n_runs)]
+        self.total_pages = total_pages
+        self.paginated = paginated
+        self.requests = []
+        # page -> number of times to answer with `status` before succeeding (None: always fail)
+        self.failures = {}
+        self.status = 404
+        self.delays = {}
+        self.lock = threading.Lock()
+
+    def respond(self, query):
+        page, limit = int(query['page'][0]), int(query['limit'][0])
+        with self.lock:
+            self.requests.append(page)
+            remaining = self.failures.get(page, 0)
+            if remaining is None or remaining > 0:
+                if remaining:
+                    self.failures[page] = remaining - 1
+                return self.status, None
+        if page in self.delays:
+            self.delays[page].wait(5)
+        results = self.runs[(page - 1) * limit:page * limit] if self.paginated else self.runs
+        if self.total_pages:
+            return 200, {"results": results, "totalPages": -(-len(self.runs) // limit)}
+        return 200, results
+
+
+@pytest.fixture
+def api():
+    stub = StubAPI(45)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, body = stub.respond(parse_qs(urlparse(self.path).query))
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    stub.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield stub
+    for event in stub.delays.values():
+        event.set()
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(api, out_dir, **kwargs):
+    return fetch_pages(str(out_dir), url=api.url, api_key="test", page_size=PAGE_SIZE, **kwargs)
+
+
+def saved_pages(out_dir):
+    return sorted(int(name[5:-5]) for name in os.listdir(out_dir) if name.endswith(".json"))
+
+
+def run_ids(out_dir):
+    return [run["runId"] for run in iter_page_runs(str(out_dir))]
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_pages_in_order(api, tmp_path, workers):
+    assert fetch(api, tmp_path, workers=workers) == 5
+    assert saved_pages(tmp_path) == [1, 2, 3, 4, 5]
+    assert run_ids(tmp_path) == [str(i) for i in range(45)]
+
+
+def test_total_pages_ends_fetch(api, tmp_path):
+    api.runs = api.runs[:40]
+    api.total_pages = True
+    assert fetch(api, tmp_path, workers=4) == 4
+    assert saved_pages(tmp_path) == [1, 2, 3, 4]
+    assert len(run_ids(tmp_path)) == 40
+
+
+def test_stop_ends_fetch_and_drops_speculative_pages(api, tmp_path):
+    assert fetch(api, tmp_path, workers=4, stop=lambda runs: any(run["runId"] == "15" for run in runs)) == 2
+    assert saved_pages(tmp_path) == [1, 2]
+    assert run_ids(tmp_path) == [str(i) for i in range(20)]
+
+
+def test_transient_errors_are_retried(api, tmp_path):
+    api.status = 503
+    api.failures = {2: 1}
+    assert fetch(api, tmp_path, workers=2) == 5
+    assert api.requests.count(2) == 2
+    assert len(run_ids(tmp_path)) == 45
+
+
+def test_failed_page_raises_fetch_error(api, tmp_path):
+    api.failures = {3: None}
+    with pytest.raises(FetchError, match="page 3"):
+        fetch(api, tmp_path, workers=1)
+    assert saved_pages(tmp_path) == [1, 2]
+
+
+def test_pages_in_flight_are_kept_on_failure(api, tmp_path):
+    # Page 2 fails while page 1 is still in flight; page 1 must be written
+    api.delays = {1: threading.Event()}
+    api.failures = {2: None}
+    threading.Timer(0.2, api.delays[1].set).start()
+    with pytest.raises(FetchError, match="page 2"):
+        fetch(api, tmp_path, workers=4)
+    assert 1 in saved_pages(tmp_path)
+    assert 2 not in saved_pages(tmp_path)
+    # Nothing is requested after the failure beyond the pages already in flight
+    assert max(api.requests) <= 4
+
+
+def test_resume_skips_pages_on_disk(api, tmp_path):
+    api.failures = {4: None}
+    with pytest.raises(FetchError):
+        fetch(api, tmp_path, workers=1)
+    assert saved_pages(tmp_path) == [1, 2, 3]
+
+    api.failures = {}
+    api.requests.clear()
+    assert fetch(api, tmp_path, workers=2) == 5
+    # Page 1 is fetched again only to check that no runs arrived in between
+    assert api.requests.count(1) == 1
+    assert {2, 3}.isdisjoint(api.requests)
+    assert run_ids(tmp_path) == [str(i) for i in range(45)]
+
+
+def test_complete_directory_is_reused_unless_refreshed(api, tmp_path):
+    fetch(api, tmp_path, workers=2)
+    api.runs = [{"runId": f"new-{i}"} for i in range(3)] + api.runs
+    api.requests.clear()
+
+    fetch(api, tmp_path, workers=2)
+    assert api.requests == []
+    assert len(run_ids(tmp_path)) == 45
+
+    assert fetch(api, tmp_path, workers=2, refresh=True) == 5
+    assert run_ids(tmp_path)[:3] == ["new-0", "new-1", "new-2"]
+    assert len(run_ids(tmp_path)) == 48
+
+
+def test_refresh_drops_pages_past_the_new_end(api, tmp_path):
+    fetch(api, tmp_path, workers=2)
+    api.runs = api.runs[:25]
+    assert fetch(api, tmp_path, workers=2, refresh=True) == 3
+    assert saved_pages(tmp_path) == [1, 2, 3]
+    assert not os.path.exists(page_path(str(tmp_path), 5))
+
+
+def test_resume_after_new_runs_starts_over(api, tmp_path):
+    api.failures = {4: None}
+    with pytest.raises(FetchError):
+        fetch(api, tmp_path, workers=1)
+
+    # Seven runs arrive before the resume, shifting every page boundary
+    api.runs = [{"runId": f"new-{i}"} for i in range(7)] + api.runs
+    api.failures = {}
+    assert fetch(api, tmp_path, workers=2) == 6
+    assert run_ids(tmp_path) == [run["runId"] for run in api.runs]
+
+
+def test_runs_repeated_across_pages_are_read_once(api, tmp_path):
+    fetch(api, tmp_path, workers=1)
+    # Page 2 also holds the last three runs of page 1
+    page = json.loads(open(page_path(str(tmp_path), 2)).read())
+    page["results"] = api.runs[7:20]
+    with open(page_path(str(tmp_path), 2), 'w') as f:
+        json.dump(page, f)
+    assert run_ids(tmp_path) == [str(i) for i in range(45)]
+
+
+def test_api_ignoring_pages_ends_after_one_page(api, tmp_path):
+    api.paginated = False
+    assert fetch(api, tmp_path, workers=4) == 1
+    assert saved_pages(tmp_path) == [1]
+    assert run_ids(tmp_path) == [str(i) for i in range(45)]
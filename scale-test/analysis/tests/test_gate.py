@@ -0,0 +1,40 @@
+"""analyze.py --gate: a regression and a gate that cannot run must exit differently."""
+
+import json
+import os
+import subprocess
+import sys
+
+from gate import REGRESSION_EXIT_CODE
+from synthetic import generate_runs
+
+ANALYZE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "analyze.py")
+
+
+def gate(tmp_path, runs):
+    path = tmp_path / "runs.json"
+    path.write_text(json.dumps(runs.to_dict("records")))
+    return subprocess.run([sys.executable, ANALYZE, "--json", str(path), "--gate"], capture_output=True, text=True)
+
+
+def test_regression_exit_code(tmp_path):
+    runs = generate_runs(600, seed=4)
+    slow = (runs["scenario"] == "lambda_timeout") & (runs["age_hours"] <= 24)
+    runs.loc[slow, "duration_seconds"] *= 1.5
+    result = gate(tmp_path, runs)
+    assert result.returncode == REGRESSION_EXIT_CODE, result.stderr
+    verdict = json.loads(result.stdout)
+    assert not verdict["passed"]
+    assert "REGRESSION: lambda_timeout" in result.stderr
+
+
+def test_passing_gate_exits_zero(tmp_path):
+    result = gate(tmp_path, generate_runs(600, seed=4))
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout)["passed"]
+
+
+def test_ungateable_runs_are_an_error(tmp_path):
+    result = gate(tmp_path, generate_runs(50, seed=4).drop(columns="age_hours"))
+    assert result.returncode == 1
+    assert result.stderr.startswith("Error: ")
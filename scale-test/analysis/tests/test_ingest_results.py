@@ -0,0 +1,50 @@
+"""Backfilled runs must line up with fetched ones and keep estimated times out of the windows."""
+
+import json
+import math
+import os
+
+from ingest_results import ingest
+from run_store import append_runs, load_store
+
+RESULTS = {"risks": [], "hypotheses": [], "change": {"metadata": {"numAffectedItems": 700, "numAffectedEdges": 2000,
+                                                                   "total_observations": 250}}}
+
+
+def artifact(root, name, sidecar=None):
+    directory = os.path.join(root, name)
+    os.makedirs(directory)
+    with open(os.path.join(directory, "change-results.json"), 'w') as f:
+        json.dump(RESULTS, f)
+    if sidecar:
+        with open(os.path.join(directory, "run.json"), 'w') as f:
+            json.dump(sidecar, f)
+
+
+def test_run_id_is_the_workflow_run(tmp_path):
+    root, store = str(tmp_path / "artifacts"), str(tmp_path / "store")
+    artifact(root, "change-analysis-shared_sg_open-123456")
+    assert ingest(root, store)['written'] == 1
+
+    df = load_store(store, columns=["run_id", "scenario"])
+    assert df.to_dict('records') == [{"run_id": "123456", "scenario": "shared_sg_open"}]
+    # The dashboard reports the same run under its workflow run ID
+    fetched = {"run_id": "123456", "scenario": "shared_sg_open", "duration_seconds": 600.0,
+               "created_at": "2026-01-01T00:00:00Z"}
+    assert append_runs(store, [fetched]) == 0
+
+
+def test_estimated_created_at_has_no_age(tmp_path):
+    root, store = str(tmp_path / "artifacts"), str(tmp_path / "store")
+    artifact(root, "change-analysis-lambda_timeout-1")
+    artifact(root, "change-analysis-lambda_timeout-2", {"overmindDurationMs": 500_000})
+    artifact(root, "change-analysis-lambda_timeout-3", {"overmindDurationMs": 500_000,
+                                                        "createdAt": "2026-01-01T00:00:00Z"})
+    ingest(root, store)
+
+    df = load_store(store).set_index("run_id").sort_index()
+    assert df["created_at"].isna().tolist() == [True, True, False]
+    assert [math.isnan(age) for age in df["age_hours"]] == [True, True, False]
+    assert df.at["2", "duration_seconds"] == 500.0
+    estimated = load_store(store, columns=["run_id", "created_at_estimated"]).set_index("run_id").sort_index()
+    assert estimated["created_at_estimated"].tolist() == [True, True, False]
@@ -0,0 +1,84 @@
+"""Incremental model state updates must never count a run twice."""
+
+import argparse
+import math
+
+import pytest
+
+from model_state import _records_from_args, update_state
+from run_store import write_rows
+
+
+def record(i, **overrides):
+    return {"duration_seconds": 300.0 + 7 * i + (i % 5) * 11, "blast_radius": 100 + i, "edges": 250 + 3 * i + i % 7,
+            "observations": 40 + (i * i) % 13, "created_at": f"2026-01-01T00:{i:02d}:00Z", **overrides}
+
+
+def test_constant_feature_still_fits():
+    # Every run at the same blast radius makes XᵀX singular
+    state = update_state(None, [record(i, blast_radius=100) for i in range(20)])
+    fit = state["fit"]
+    assert fit["coefficients"]["blast_radius"] == 0
+    assert all(math.isfinite(v) for v in fit["coefficients"].values())
+    assert math.isfinite(fit["r2"])
+
+
+def test_replaying_history_adds_nothing():
+    records = [record(i) for i in range(30)]
+    state = update_state(None, records)
+    assert state["moments"]["n"] == 30
+    assert update_state(state, records)["moments"] == state["moments"]
+
+
+def test_runs_backfilled_before_the_mark_are_added_once():
+    records = [record(i, run_id=str(i)) for i in range(10)]
+    state = update_state(None, records)
+    backfilled = record(40, run_id="backfilled", created_at="2025-12-01T00:00:00Z")
+
+    state = update_state(state, records + [backfilled])
+    assert state["moments"]["n"] == 11
+    assert state["updated_through"] == "2026-01-01T00:09:00+00:00"
+    assert update_state(state, records + [backfilled, backfilled])["moments"] == state["moments"]
+
+
+def test_state_without_run_ids_counts_runs_up_to_its_mark_as_seen():
+    records = [record(i, run_id=str(i)) for i in range(10)]
+    state = update_state(None, records[:5])
+    del state["run_ids"]
+
+    state = update_state(state, records)
+    assert state["moments"]["n"] == 10
+    assert state["run_ids"] == sorted(str(i) for i in range(10))
+
+
+def test_records_without_created_at_are_skipped():
+    records = [{k: v for k, v in record(i).items() if k != "created_at"} for i in range(10)]
+    state = update_state(None, records)
+    assert state["moments"]["n"] == 0
+    assert state["updated_through"] is None
+
+    state = update_state(update_state(None, [record(i) for i in range(10)]), records)
+    assert state["moments"]["n"] == 10
+    assert all(math.isfinite(v) for v in state["fit"]["coefficients"].values())
+
+
+@pytest.mark.parametrize("column", ["duration_seconds", "edges"])
+@pytest.mark.parametrize("value", [None, math.nan])
+def test_records_missing_a_metric_are_skipped(column, value):
+    # The incomplete runs are the newest: they must not move updated_through either
+    records = [record(i) for i in range(10)] + [record(i, **{column: value}) for i in range(10, 15)]
+    state = update_state(None, records)
+    assert state["moments"]["n"] == 10
+    assert state["updated_through"] == "2026-01-01T00:09:00+00:00"
+    assert all(math.isfinite(v) for v in state["fit"]["coefficients"].values())
+
+
+def test_store_runs_without_a_duration_are_skipped(tmp_path):
+    store = str(tmp_path / "store")
+    write_rows(store, [record(i, run_id=str(i), scenario="s") for i in range(10)]
+               + [record(i, run_id=str(i), scenario="s", duration_seconds=None) for i in range(10, 15)])
+    records = _records_from_args(argparse.Namespace(store=store, json=None))
+    assert len(records) == 10
+    state = update_state(None, records)
+    assert state["moments"]["n"] == 10
+    assert state["updated_through"] == "2026-01-01T00:09:00+00:00"
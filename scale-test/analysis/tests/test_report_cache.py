@@ -0,0 +1,95 @@
+"""Reports of an unchanged run store must come back from the cache."""
+
+import functools
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import analyze
+import report_cache
+from report_cache import ReportCache
+from run_store import load_store, write_rows
+from synthetic import generate_runs
+
+NOW = datetime(2026, 3, 1, 12, 30, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def store(tmp_path):
+    runs = generate_runs(300, seed=5)
+    runs['run_id'] = [str(i) for i in range(len(runs))]
+    runs['created_at'] = [(NOW - timedelta(hours=age)).isoformat() for age in runs.pop('age_hours')]
+    write_rows(str(tmp_path / "store"), runs.to_dict('records'))
+    return str(tmp_path / "store")
+
+
+def report_json(store, cache, ages_at, capsys):
+    data = analyze.load_from_store(store, False, 0, 0, ages=cache is None)
+    analyze.analyze(data, output_format='json', cache=cache, ages_at=ages_at)
+    return json.loads(capsys.readouterr().out)
+
+
+def test_unchanged_store_hits(store, tmp_path, monkeypatch, capsys):
+    cache = ReportCache(str(tmp_path / "cache"))
+    first = report_json(store, cache, NOW, capsys)
+
+    def recompute(*args, **kwargs):
+        raise AssertionError("report was recomputed")
+
+    monkeypatch.setattr(analyze, 'compute_report', recompute)
+    assert report_json(store, cache, NOW + timedelta(minutes=20), capsys) == first
+
+
+def test_ages_derived_after_the_lookup(store, tmp_path, capsys):
+    cached = report_json(store, ReportCache(str(tmp_path / "cache")), NOW, capsys)
+    analyze.analyze(load_store(store, now=NOW), output_format='json')
+    assert json.loads(capsys.readouterr().out) == cached
+
+
+def test_next_hour_misses(store, tmp_path, capsys):
+    cache = ReportCache(str(tmp_path / "cache"))
+    report_json(store, cache, NOW, capsys)
+    before = len(cache.entries())
+    report_json(store, cache, NOW + timedelta(hours=1), capsys)
+    assert len(cache.entries()) > before
+
+
+@pytest.fixture
+def computed_rows(monkeypatch):
+    """Rows aggregated per cached_time_series() call, with blocks small enough for the test store."""
+    rows = []
+    aggregate = report_cache._window_aggregates
+
+    def counting(df, blocks, *args):
+        rows.append(sum(end - start for _, start, end in blocks))
+        return aggregate(df, blocks, *args)
+
+    monkeypatch.setattr(report_cache, 'row_blocks', functools.partial(report_cache.row_blocks, block_rows=16))
+    monkeypatch.setattr(report_cache, '_window_aggregates', counting)
+    return rows
+
+
+def test_window_blocks_outlive_the_hour(store, tmp_path, computed_rows, capsys):
+    cache = ReportCache(str(tmp_path / "cache"))
+    report_json(store, cache, NOW, capsys)
+    later = NOW + timedelta(hours=1)
+    cached = report_json(store, cache, later, capsys)
+    # Only blocks with a run that moved into another period or window are aggregated again
+    assert computed_rows[0] == 300
+    assert computed_rows[1] < 60
+
+    analyze.analyze(load_store(store, now=later), output_format='json')
+    assert json.loads(capsys.readouterr().out) == cached
+
+
+def test_appended_runs_reuse_the_other_blocks(store, tmp_path, computed_rows, capsys):
+    cache = ReportCache(str(tmp_path / "cache"))
+    report_json(store, cache, NOW, capsys)
+    # Ten runs from the last hour, as a nightly fetch would append them
+    new = generate_runs(10, seed=6).drop(columns='age_hours')
+    new['run_id'] = [f"new-{i}" for i in range(len(new))]
+    new['created_at'] = [(NOW - timedelta(minutes=5 * i)).isoformat() for i in range(len(new))]
+    write_rows(store, new.to_dict('records'))
+    report_json(store, cache, NOW, capsys)
+    assert computed_rows[1] < 60
@@ -0,0 +1,128 @@
+"""Day partitions of the run store: writes, compaction and its recovery."""
+
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from fetch import to_record
+from run_store import (COMPACT_JOURNAL, COMPACT_PARTS, _part_files, append_runs, compact_partition, compact_store,
+                       fetch_into_store, load_store, read_meta, write_rows)
+from test_fetch import api  # noqa: F401 (fixture)
+
+ANALYZE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "analyze.py")
+
+
+def record(i, day=1):
+    return {"run_id": str(i), "scenario": "s", "duration_seconds": float(i), "blast_radius": i,
+            "created_at": f"2026-01-{day:02d}T{i % 24:02d}:{i % 60:02d}:00Z"}
+
+
+def partition(store, day=1):
+    return os.path.join(store, f"date=2026-01-{day:02d}")
+
+
+def stored_ids(store):
+    return sorted(load_store(store, columns=["run_id"])["run_id"], key=int)
+
+
+def test_writes_are_compacted_past_the_part_limit(tmp_path):
+    store = str(tmp_path)
+    for i in range(COMPACT_PARTS * 2 + 3):
+        write_rows(store, [record(i), record(i, day=2)])
+    assert len(_part_files(partition(store))) <= COMPACT_PARTS
+    assert stored_ids(store) == sorted([str(i) for i in range(COMPACT_PARTS * 2 + 3)] * 2, key=int)
+
+
+def test_compact_store_leaves_one_file_per_day(tmp_path):
+    store = str(tmp_path)
+    for i in range(5):
+        write_rows(store, [record(i), record(i, day=3)])
+    assert compact_store(store) == 10
+    assert len(_part_files(partition(store))) == 1
+    assert len(_part_files(partition(store, 3))) == 1
+    assert stored_ids(store) == sorted([str(i) for i in range(5)] * 2, key=int)
+
+
+@pytest.mark.parametrize("removed", [0, 2, 4])
+def test_interrupted_compaction_is_finished_on_load(tmp_path, removed):
+    store = str(tmp_path)
+    for i in range(4):
+        write_rows(store, [record(i)])
+    day = partition(store)
+    parts = _part_files(day)
+
+    # Stage and journal a compaction, then "crash" after removing some parts
+    compact_partition(day, max_parts=1)
+    (final,) = _part_files(day)
+    os.rename(os.path.join(day, final), os.path.join(day, "_" + final))
+    for name in parts[removed:]:
+        open(os.path.join(day, name), 'wb').write(b"")  # placeholders for the parts not yet removed
+    with open(os.path.join(day, COMPACT_JOURNAL), 'w') as f:
+        json.dump({"final": final, "replaces": parts}, f)
+
+    assert stored_ids(store) == ["0", "1", "2", "3"]
+    assert _part_files(day) == [final]
+    assert not os.path.exists(os.path.join(day, COMPACT_JOURNAL))
+
+
+def test_staged_file_without_journal_is_discarded(tmp_path):
+    store = str(tmp_path)
+    for i in range(3):
+        write_rows(store, [record(i)])
+    day = partition(store)
+    with open(os.path.join(day, "_part-stale.parquet"), 'wb') as f:
+        f.write(b"partial")
+    compact_partition(day)
+    assert "_part-stale.parquet" not in os.listdir(day)
+    assert stored_ids(store) == ["0", "1", "2"]
+
+
+def test_append_at_the_mark_adds_only_unseen_ids(tmp_path):
+    store = str(tmp_path)
+    tied = [dict(record(i), created_at="2026-01-01T12:00:00Z") for i in range(3)]
+    assert append_runs(store, [dict(record(5), created_at="2026-01-01T06:00:00Z")] + tied[:2]) == 3
+    hwm, ids_at_mark = read_meta(store)
+    assert hwm == datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+    assert ids_at_mark == {"0", "1"}
+
+    # A run at the same created_at as the mark is still new; one before it is not
+    assert append_runs(store, tied + [dict(record(7), created_at="2026-01-01T11:00:00Z")]) == 1
+    assert read_meta(store)[1] == {"0", "1", "2"}
+
+
+def test_reappending_the_same_runs_adds_nothing(tmp_path):
+    store = str(tmp_path)
+    records = [record(i) for i in range(5)]
+    assert append_runs(store, records) == 5
+    meta = open(os.path.join(store, "_meta.json")).read()
+    assert append_runs(store, records) == 0
+    assert open(os.path.join(store, "_meta.json")).read() == meta
+    assert stored_ids(store) == ["0", "1", "2", "3", "4"]
+
+
+def test_fetch_stops_at_the_mark(api, tmp_path, monkeypatch):  # noqa: F811
+    monkeypatch.setenv("SCALE_DASHBOARD_URL", api.url)
+    monkeypatch.setenv("SCALE_DASHBOARD_API_KEY", "test")
+    newest = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    for i, run in enumerate(api.runs):
+        run["createdAt"] = (newest - timedelta(minutes=i)).isoformat()
+    store = str(tmp_path)
+    assert append_runs(store, [to_record(run) for run in api.runs[20:]]) == 25
+
+    api.requests.clear()
+    assert fetch_into_store(store, page_size=10, workers=1) == 20
+    # Page 3 reaches back to run 20, the mark; pages 4 and 5 are never requested
+    assert api.requests == [1, 2, 3]
+    assert stored_ids(store) == [str(i) for i in range(45)]
+    assert not os.path.exists(os.path.join(store, "_incoming"))
+
+
+def test_analyze_missing_store_is_an_error(tmp_path):
+    missing = str(tmp_path / "runs")
+    result = subprocess.run([sys.executable, ANALYZE, "--store", missing], capture_output=True, text=True)
+    assert result.returncode == 1
+    assert result.stderr.strip() == f"Error: Run store '{missing}' not found"
@@ -0,0 +1,112 @@
+"""--stream must report exactly what the in-memory analysis reports."""
+
+import functools
+import json
+import math
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from analyze import compute_report, print_report
+from report_json import report_to_dict
+from streaming import EmptyInputError, stream_report
+from synthetic import generate_runs
+
+ANALYZE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "analyze.py")
+
+
+@pytest.fixture(scope="module")
+def runs():
+    return generate_runs(400, seed=3)
+
+
+@pytest.fixture(scope="module")
+def inputs(runs, tmp_path_factory):
+    directory = tmp_path_factory.mktemp("runs")
+    records = runs.to_dict("records")
+    array, ndjson = directory / "runs.json", directory / "runs.ndjson"
+    array.write_text(json.dumps(records, indent=1))
+    ndjson.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return {"array": str(array), "ndjson": str(ndjson)}
+
+
+@functools.lru_cache(maxsize=None)
+def analyze(*args):
+    result = subprocess.run([sys.executable, ANALYZE, *args], capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def assert_close(streamed, in_memory, path="report"):
+    """Equal, except that floats may differ in their last rounded digit."""
+    if isinstance(in_memory, dict):
+        assert streamed.keys() == in_memory.keys(), path
+        for key in in_memory:
+            assert_close(streamed[key], in_memory[key], f"{path}.{key}")
+    elif isinstance(in_memory, list):
+        assert len(streamed) == len(in_memory), path
+        for i, (a, b) in enumerate(zip(streamed, in_memory)):
+            assert_close(a, b, f"{path}[{i}]")
+    elif isinstance(in_memory, float) and isinstance(streamed, (int, float)):
+        assert math.isclose(streamed, in_memory, rel_tol=1e-6, abs_tol=1e-3), path
+    else:
+        assert streamed == in_memory, path
+
+
+@pytest.mark.parametrize("source", ["ndjson", "array"])
+@pytest.mark.parametrize("chunk_size", [1, 7, 64])
+def test_text_report_matches(inputs, source, chunk_size):
+    streamed = analyze("--json", inputs[source], "--stream", "--chunk-size", str(chunk_size))
+    assert streamed == analyze("--json", inputs["array"])
+
+
+@pytest.mark.parametrize("source", ["ndjson", "array"])
+@pytest.mark.parametrize("outliers", ["scenario_mad", "residual"])
+def test_json_report_matches(inputs, source, outliers):
+    streamed = analyze("--json", inputs[source], "--stream", "--chunk-size", "13", "--format", "json",
+                       "--outliers", outliers)
+    in_memory = analyze("--json", inputs["array"], "--format", "json", "--outliers", outliers)
+    assert_close(json.loads(streamed), json.loads(in_memory))
+
+
+def test_age_hours_missing_from_first_chunks(runs, tmp_path):
+    # The first 50 runs have no age_hours at all; a few later ones have it null
+    records = runs.to_dict("records")
+    for record in records[:50]:
+        del record["age_hours"]
+    for record in records[200:210]:
+        record["age_hours"] = None
+    path = tmp_path / "runs.ndjson"
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+    streamed = stream_report(str(path), chunk_size=20)
+    in_memory = compute_report(pd.DataFrame(records))
+    assert streamed["time_series"] is not None
+    assert_close(report_to_dict(streamed), report_to_dict(in_memory))
+
+
+def test_text_output_matches_with_missing_ages(runs, tmp_path, capsys):
+    records = runs.to_dict("records")
+    for record in records[:30]:
+        del record["age_hours"]
+    path = tmp_path / "runs.ndjson"
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+    print_report(stream_report(str(path), chunk_size=16))
+    streamed = capsys.readouterr().out
+    print_report(compute_report(pd.DataFrame(records)))
+    assert streamed == capsys.readouterr().out
+
+
+@pytest.mark.parametrize("content", ["", "\n", "[]", "[\n]\n"])
+def test_empty_input(tmp_path, content):
+    path = tmp_path / "empty.json"
+    path.write_text(content)
+    with pytest.raises(EmptyInputError):
+        stream_report(str(path))
+    result = subprocess.run([sys.executable, ANALYZE, "--json", str(path), "--stream"],
+                            capture_output=True, text=True)
+    assert result.returncode == 1
+    assert result.stderr.startswith("Error: No runs in")